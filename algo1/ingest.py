@@ -0,0 +1,377 @@
+"""
+複数ソースからの非同期取り込み（asyncio）と、ソースごとの頻出要素要約。
+
+各コレクタ（TCP / UDP / Unix ソケット）をソースとして待ち受け、
+1 行 1 レコード（"IP" または "IP タイムスタンプ"）を受け取る。
+
+    読み取り   ソースごとに batch_size 件、または flush_interval 秒ごとにバッチ化
+    背圧       ソースごとのキューは上限 queue_size バッチ。満杯なら TCP / Unix は
+               読み取りを止める（カーネルのバッファが埋まり送信側も止まる）。
+               UDP は止められないので、あふれたバッチを捨てて dropped に数える
+    要約       ソースごとの MisraGries / SpaceSaving（summaries.py）にバッチ単位で加算
+    top-k      top() のたびに各ソースの要約をマージして全体の上位を求める
+    遅延       lag() でソースごとの未処理件数（backlog）、キュー長、バッチの待ち時間、
+               イベント時刻（タイムスタンプ付きレコード）からの遅れを返す
+
+動作確認（ローカルの代替プロデューサを使う）:
+    python ingest.py             デモ
+    python -m pytest -q          test_ingest.py（件数・背圧・UDP の破棄・上下限）
+"""
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+from summaries import MisraGries, SpaceSaving
+
+
+SUMMARIES = {"mg": MisraGries, "ss": SpaceSaving}
+
+
+def parse_line(line):
+    """
+    1 行をパースして (要素, イベント時刻 or None) を返す。空行は None。
+    """
+    parts = line.split()
+    if not parts:
+        return None
+    ts = None
+    if len(parts) > 1:
+        try:
+            ts = float(parts[1])
+        except ValueError:
+            ts = None
+    return parts[0], ts
+
+
+class _Batcher:
+    """
+    レコードを貯めて、件数か時間でバッチとして送り出す。
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.items = []
+        self.latest = None
+        self.started = None
+
+    def add(self, line):
+        """1 行を追加する。空行なら False。"""
+        rec = parse_line(line)
+        if rec is None:
+            return False
+        elem, ts = rec
+        if not self.items:
+            self.started = time.monotonic()
+        self.items.append(elem)
+        if ts is not None and (self.latest is None or ts > self.latest):
+            self.latest = ts
+        return True
+
+    def full(self):
+        return len(self.items) >= self.batch_size
+
+    def take(self):
+        batch = (time.monotonic(), self.items, self.latest)
+        self.items, self.latest, self.started = [], None, None
+        return batch
+
+
+class Source:
+    """
+    1 つのソース（コレクタ）の状態。
+
+    属性:
+        summary: ソースごとの要約
+        batcher (_Batcher): 送り出し前のレコード（同じソースの全接続で共有）
+        queue (asyncio.Queue): (作成時刻, 要素リスト, 最新イベント時刻) のバッチ
+        received: 読み取ったレコード数（処理待ち・破棄を含む）
+        records / batches / dropped: 処理件数、処理バッチ数、捨てた件数（UDP のみ）
+        queue_delay / max_queue_delay: バッチがキューで待った時間（最新 / 最大、秒）
+        event_lag: 最後に処理したバッチの、最新イベント時刻からの遅れ（秒）
+    """
+
+    def __init__(self, name, summary, queue_size, batch_size):
+        self.name = name
+        self.summary = summary
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.batcher = _Batcher(batch_size)
+        self.received = 0
+        self.records = 0
+        self.batches = 0
+        self.dropped = 0
+        self.queue_delay = 0.0
+        self.max_queue_delay = 0.0
+        self.event_lag = None
+        self.last_seen = None
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, src):
+        self.src = src
+
+    def datagram_received(self, data, addr):
+        batcher = self.src.batcher
+        for line in data.decode("utf-8", "replace").splitlines():
+            self.src.received += batcher.add(line)
+            if batcher.full():
+                batch = batcher.take()
+                try:
+                    self.src.queue.put_nowait(batch)
+                except asyncio.QueueFull:
+                    # UDP は送信側を止められない → 捨てて数える
+                    self.src.dropped += len(batch[1])
+
+
+class Ingestor:
+    """
+    複数ソースの非同期取り込み。
+
+    パラメータ:
+        k (int): 要約のパラメータ（MisraGries / SpaceSaving の k）
+        summary (str): "ss"（SpaceSaving）または "mg"（MisraGries）
+        batch_size (int): 1 バッチの最大レコード数
+        flush_interval (float): 未満のバッチを送り出すまでの最大待ち時間（秒）
+        queue_size (int): ソースごとのキューに置けるバッチ数の上限（背圧）
+    """
+
+    def __init__(self, k=100, summary="ss", batch_size=1000, flush_interval=0.1, queue_size=8):
+        self.k = k
+        self.summary_cls = SUMMARIES[summary]
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.sources = {}
+        self._servers = []
+        self._transports = []
+        self._tasks = []
+        self._readers = set()
+
+    # 1 回の read で読むバイト数
+    READ_SIZE = 1 << 16
+
+    # ------------------------------------------------------------
+    # ソースの追加
+    # ------------------------------------------------------------
+    def _new_source(self, name):
+        if name in self.sources:
+            raise ValueError(f"duplicate source: {name}")
+        src = Source(name, self.summary_cls(self.k), self.queue_size, self.batch_size)
+        self.sources[name] = src
+        self._tasks.append(asyncio.ensure_future(self._consume(src)))
+        self._tasks.append(asyncio.ensure_future(self._flush_loop(src)))
+        return src
+
+    async def add_tcp(self, name, host="127.0.0.1", port=0):
+        """TCP で待ち受ける。実際に割り当てられたポートを返す。"""
+        src = self._new_source(name)
+        server = await asyncio.start_server(
+            lambda r, w: self._read_stream(src, r, w), host, port)
+        self._servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    async def add_unix(self, name, path):
+        """Unix ドメインソケットで待ち受ける。"""
+        src = self._new_source(name)
+        server = await asyncio.start_unix_server(
+            lambda r, w: self._read_stream(src, r, w), path)
+        self._servers.append(server)
+        return path
+
+    async def add_udp(self, name, host="127.0.0.1", port=0):
+        """UDP で待ち受ける（1 データグラムに 1 行以上）。割り当てられたポートを返す。"""
+        src = self._new_source(name)
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UDPProtocol(src), local_addr=(host, port))
+        self._transports.append(transport)
+        return transport.get_extra_info("sockname")[1]
+
+    # ------------------------------------------------------------
+    # 読み取り → バッチ → キュー
+    # ------------------------------------------------------------
+    async def _read_stream(self, src, reader, writer):
+        # 読み取りは取り消さない（取り消すと読みかけのデータを失うことがある）。
+        # 時間によるバッチの送り出しは _flush_loop が受け持つ
+        pending = b""
+        task = asyncio.current_task()
+        self._readers.add(task)
+        try:
+            while True:
+                data = await reader.read(self.READ_SIZE)
+                lines = (pending + data).split(b"\n")
+                pending = lines.pop() if data else b""
+                for line in lines:
+                    src.received += src.batcher.add(line.decode("utf-8", "replace"))
+                    if src.batcher.full():
+                        # キューが満杯ならここで待つ → 読み取りが止まる（背圧）
+                        await src.queue.put(src.batcher.take())
+                if not data:
+                    break
+        finally:
+            self._readers.discard(task)
+            writer.close()
+
+    async def _flush_loop(self, src):
+        # flush_interval 以上たまっている未満のバッチを送り出す（キューが満杯なら次回）
+        while True:
+            await asyncio.sleep(self.flush_interval / 2)
+            b = src.batcher
+            if b.items and time.monotonic() - b.started >= self.flush_interval and not src.queue.full():
+                src.queue.put_nowait(b.take())
+
+    async def _consume(self, src):
+        while True:
+            created, items, latest = await src.queue.get()
+            now = time.monotonic()
+            src.summary.update_counts(Counter(items))
+            src.records += len(items)
+            src.batches += 1
+            src.queue_delay = now - created
+            src.max_queue_delay = max(src.max_queue_delay, src.queue_delay)
+            if latest is not None:
+                src.event_lag = time.time() - latest
+            src.last_seen = time.time()
+            src.queue.task_done()
+
+    # ------------------------------------------------------------
+    # 問い合わせ
+    # ------------------------------------------------------------
+    def merged(self, names=None):
+        """指定ソース（省略時は全ソース）の要約をマージした新しい要約を返す。"""
+        total = self.summary_cls(self.k)
+        for name in names or self.sources:
+            total.merge(self.sources[name].summary)
+        return total
+
+    def top(self, m=10, names=None):
+        """全体の上位 m 件: (要素, 推定値, 下限, 上限)。"""
+        return self.merged(names).top(m)
+
+    def lag(self):
+        """ソースごとの処理状況と遅延。"""
+        return {
+            name: {
+                "received": s.received,
+                "records": s.records,
+                "backlog": s.received - s.records - s.dropped,
+                "batches": s.batches,
+                "queued_batches": s.queue.qsize(),
+                "dropped": s.dropped,
+                "queue_delay": round(s.queue_delay, 4),
+                "max_queue_delay": round(s.max_queue_delay, 4),
+                "event_lag": None if s.event_lag is None else round(s.event_lag, 4),
+            }
+            for name, s in self.sources.items()
+        }
+
+    async def drain(self):
+        """たまっているレコードを送り出し、全キューが空になるまで待つ。"""
+        for src in self.sources.values():
+            if src.batcher.items:
+                await src.queue.put(src.batcher.take())
+        await asyncio.gather(*(s.queue.join() for s in self.sources.values()))
+
+    async def close(self):
+        """待ち受けをやめ、接続中のストリームを読み終えてから全レコードを処理する。"""
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        for t in self._transports:
+            t.close()
+        await asyncio.gather(*self._readers, return_exceptions=True)
+        await self.drain()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+# ============================================================
+# ローカルの代替プロデューサ（動作確認用）
+# ============================================================
+def fake_ips(n, seed=0, hot=5):
+    """少数の頻出 IP が混ざった擬似イベント列。"""
+    rng = random.Random(seed)
+    heavy = [f"10.0.0.{i}" for i in range(1, hot + 1)]
+    for _ in range(n):
+        if rng.random() < 0.3:
+            yield rng.choice(heavy)
+        else:
+            yield f"192.168.{rng.randrange(256)}.{rng.randrange(256)}"
+
+
+async def stream_producer(writer, items, per_write=200):
+    """TCP / Unix の書き込み側。drain() で受信側の背圧を受ける。"""
+    buf = []
+    for ip in items:
+        buf.append(f"{ip} {time.time():.6f}\n")
+        if len(buf) >= per_write:
+            writer.write("".join(buf).encode())
+            await writer.drain()
+            buf = []
+    if buf:
+        writer.write("".join(buf).encode())
+        await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def tcp_producer(port, items, host="127.0.0.1"):
+    _, writer = await asyncio.open_connection(host, port)
+    await stream_producer(writer, items)
+
+
+async def unix_producer(path, items):
+    _, writer = await asyncio.open_unix_connection(path)
+    await stream_producer(writer, items)
+
+
+async def udp_producer(port, items, host="127.0.0.1", per_datagram=20):
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        asyncio.DatagramProtocol, remote_addr=(host, port))
+    buf = []
+    for ip in items:
+        buf.append(f"{ip} {time.time():.6f}")
+        if len(buf) >= per_datagram:
+            transport.sendto("\n".join(buf).encode())
+            buf = []
+            await asyncio.sleep(0)
+    if buf:
+        transport.sendto("\n".join(buf).encode())
+    transport.close()
+
+
+async def _demo():
+    ing = Ingestor(k=50, batch_size=500, queue_size=4)
+    tcp_port = await ing.add_tcp("collector-tcp")
+    udp_port = await ing.add_udp("collector-udp")
+    producers = [tcp_producer(tcp_port, fake_ips(50000, seed=1)),
+                 udp_producer(udp_port, fake_ips(20000, seed=2))]
+
+    unix_path = None
+    if hasattr(asyncio, "start_unix_server") and os.name != "nt":
+        unix_path = os.path.join(tempfile.mkdtemp(), "collector.sock")
+        await ing.add_unix("collector-unix", unix_path)
+        producers.append(unix_producer(unix_path, fake_ips(30000, seed=3)))
+
+    await asyncio.gather(*producers)
+    await asyncio.sleep(ing.flush_interval * 2)
+    await ing.drain()
+
+    print("全体の上位（要素, 推定値, 下限, 上限）:")
+    for row in ing.top(5):
+        print(" ", row)
+    for name, info in ing.lag().items():
+        print(name, info)
+
+    await ing.close()
+    if unix_path:
+        os.remove(unix_path)
+
+
+if __name__ == "__main__":
+    asyncio.run(_demo())
@@ -0,0 +1,193 @@
+"""
+ストリーム要約（Misra-Gries / Space-Saving）のクラス版。
+
+algo1.py / algo3.py の関数版と同じ規則で 1 要素ずつ更新できるほか、
+チャンク単位の (要素, 回数) の一括更新と、要約同士のマージに対応する。
+どちらも推定値の誤差に保証付きの上下限を返す。
+
+    MisraGries(k)   候補は最大 k-1 個（misra_gries_v3_1 と同じ）
+                    推定値 c について  c <= 真の頻度 <= c + (n - Σc) / k
+    SpaceSaving(k)  候補は最大 k 個（misra_gries_v3_3 と同じ置換規則）
+                    推定値 c, 誤差 e について  c - e <= 真の頻度 <= c  （e <= n / k）
+
+マージ（Agarwal et al., "Mergeable Summaries", 2012）:
+    MisraGries   カウントを足し合わせ、k 番目に大きい値を全体から引いて正のものだけ残す
+    SpaceSaving  片方に無い要素はその要約の最小カウントを足し（満杯のときのみ）、上位 k 個を残す
+"""
+
+import heapq
+
+
+class MisraGries:
+    """
+    Misra-Gries 要約（候補は最大 k-1 個）。
+
+    パラメータ:
+        k (int): 頻度が n/k を超える要素は必ず候補に残る
+
+    属性:
+        counter (dict): 候補要素とその推定カウント（真の頻度の下限）
+        n (int): 処理した要素数（重み付き）
+    """
+
+    def __init__(self, k):
+        if k < 2:
+            raise ValueError("k must be >= 2")
+        self.k = k
+        self.counter = {}
+        self.n = 0
+
+    def update(self, elem, count=1):
+        """1 要素（count 回分）を追加する。"""
+        if count == 1:
+            self.n += 1
+            if elem in self.counter:
+                self.counter[elem] += 1
+            elif len(self.counter) < self.k - 1:
+                self.counter[elem] = 1
+            else:
+                # 候補が k-1 に達している → 全部のカウントを -1
+                for key in list(self.counter):
+                    self.counter[key] -= 1
+                    if self.counter[key] == 0:
+                        del self.counter[key]
+        else:
+            self.update_counts({elem: count})
+
+    def update_counts(self, counts):
+        """
+        (要素 → 回数) をまとめて追加する（チャンクごとの集計結果など）。
+        集計結果は誤差 0 の要約とみなしてマージする。
+        """
+        exact = MisraGries(self.k)
+        exact.counter = {e: int(c) for e, c in dict(counts).items() if c > 0}
+        exact.n = sum(exact.counter.values())
+        self.merge(exact)
+
+    def merge(self, other):
+        """other（同じ k の MisraGries）をこの要約にマージする。"""
+        for elem, c in other.counter.items():
+            self.counter[elem] = self.counter.get(elem, 0) + c
+        self.n += other.n
+
+        if len(self.counter) > self.k - 1:
+            # k 番目に大きいカウントを全体から引く
+            cut = heapq.nlargest(self.k, self.counter.values())[-1]
+            self.counter = {e: c - cut for e, c in self.counter.items() if c > cut}
+        return self
+
+    def error_bound(self):
+        """推定値の誤差の上限 (n - Σc) / k。"""
+        return (self.n - sum(self.counter.values())) / self.k
+
+    def outside_bound(self):
+        """候補に無い要素の真の頻度の上限。"""
+        return self.error_bound()
+
+    def top(self, m=None):
+        """
+        推定カウントの大きい順に (要素, 推定値, 下限, 上限) を返す。
+        """
+        err = self.error_bound()
+        items = sorted(self.counter.items(), key=lambda kv: kv[1], reverse=True)[:m]
+        return [(e, c, c, c + err) for e, c in items]
+
+    def __len__(self):
+        return len(self.counter)
+
+
+class SpaceSaving:
+    """
+    Space-Saving 要約（候補は最大 k 個、最小カウントの要素を置き換える）。
+
+    パラメータ:
+        k (int): 保持する候補数
+
+    属性:
+        counter (dict): 候補要素とその推定カウント（真の頻度の上限）
+        error (dict): 各候補の過大評価の上限
+        n (int): 処理した要素数（重み付き）
+    """
+
+    def __init__(self, k):
+        if k < 1:
+            raise ValueError("k must be >= 1")
+        self.k = k
+        self.counter = {}
+        self.error = {}
+        self.n = 0
+
+    def update(self, elem, count=1):
+        """1 要素（count 回分）を追加する。"""
+        self.n += count
+        if elem in self.counter:
+            self.counter[elem] += count
+        elif len(self.counter) < self.k:
+            self.counter[elem] = count
+            self.error[elem] = 0
+        else:
+            # 最小のカウントを持つ要素を削除し、置き換える
+            min_elem = min(self.counter, key=self.counter.get)
+            min_count = self.counter.pop(min_elem)
+            del self.error[min_elem]
+            self.counter[elem] = min_count + count
+            self.error[elem] = min_count
+
+    def update_counts(self, counts):
+        """
+        (要素 → 回数) をまとめて追加する。集計結果は誤差 0 の要約としてマージする。
+        """
+        exact = SpaceSaving(max(self.k, 1))
+        exact.counter = {e: int(c) for e, c in dict(counts).items() if c > 0}
+        exact.error = dict.fromkeys(exact.counter, 0)
+        exact.n = sum(exact.counter.values())
+        self.merge(exact)
+
+    def outside_bound(self):
+        """候補に無い要素の真の頻度の上限（満杯でなければ 0）。"""
+        return min(self.counter.values()) if len(self.counter) >= self.k else 0
+
+    def merge(self, other):
+        """other（SpaceSaving）をこの要約にマージする。"""
+        f1, f2 = self.outside_bound(), other.outside_bound()
+        counter, error = {}, {}
+        for elem in self.counter.keys() | other.counter.keys():
+            counter[elem] = self.counter.get(elem, f1) + other.counter.get(elem, f2)
+            error[elem] = self.error.get(elem, f1) + other.error.get(elem, f2)
+
+        keep = heapq.nlargest(self.k, counter, key=counter.get)
+        self.counter = {e: counter[e] for e in keep}
+        self.error = {e: error[e] for e in keep}
+        self.n += other.n
+        return self
+
+    def top(self, m=None):
+        """
+        推定カウントの大きい順に (要素, 推定値, 下限, 上限) を返す。
+        """
+        items = sorted(self.counter.items(), key=lambda kv: kv[1], reverse=True)[:m]
+        return [(e, c, c - self.error[e], c) for e, c in items]
+
+    def __len__(self):
+        return len(self.counter)
+
+
+if __name__ == "__main__":
+    # 動作確認
+    data = [1, 2, 1, 3, 1, 2, 1, 4, 5, 1]
+
+    mg = MisraGries(3)
+    for x in data:
+        mg.update(x)
+    print(mg.counter)  # 出力例: {1: 3, 5: 1}（misra_gries_v3_1 と同じ）
+
+    ss = SpaceSaving(3)
+    for x in data:
+        ss.update(x)
+    print(ss.top())    # (要素, 推定値, 下限, 上限)
+
+    # チャンク単位の更新（要素ごとの回数）
+    mg2 = MisraGries(3)
+    mg2.update_counts({1: 5, 2: 2})
+    mg2.update_counts({3: 1, 4: 1, 5: 1})
+    print(mg2.top())
@@ -0,0 +1,162 @@
+"""
+ingest.py のテスト（ローカルの代替プロデューサを使う）。
+
+消費側を止めたり遅くしたりして、
+    - 送った件数とマージ後の件数が一致すること
+    - キューが満杯になると TCP / Unix の読み取りが止まること（背圧）
+    - UDP であふれたバッチが dropped に数えられること
+    - top() の下限 <= 真の頻度 <= 上限 が成り立つこと
+を確かめる。
+
+実行: python -m pytest -q test_ingest.py   （または python test_ingest.py）
+"""
+
+import asyncio
+import os
+import random
+import tempfile
+from collections import Counter
+
+from ingest import Ingestor, tcp_producer, unix_producer, udp_producer
+
+
+class SlowIngestor(Ingestor):
+    """
+    消費側を gate が開くまで止め、開いた後も 1 バッチごとに delay 秒待つ Ingestor。
+    """
+
+    def __init__(self, delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.gate = asyncio.Event()
+        self.delay = delay
+
+    async def _consume(self, src):
+        get = src.queue.get
+
+        async def slow_get():
+            await self.gate.wait()
+            await asyncio.sleep(self.delay)
+            return await get()
+
+        src.queue.get = slow_get
+        await super()._consume(src)
+
+
+def skewed_ips(n, seed=0, distinct=30):
+    """distinct 種類の IP からなる偏った列（頻度はおよそ 1/i）。"""
+    rng = random.Random(seed)
+    ips = [f"10.0.{i // 256}.{i % 256}" for i in range(distinct)]
+    weights = [1 / (i + 1) for i in range(distinct)]
+    return rng.choices(ips, weights, k=n)
+
+
+async def _wait_until(cond, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    end = loop.time() + timeout
+    while not cond():
+        assert loop.time() < end, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _check_backpressure(kind):
+    async def run():
+        ing = SlowIngestor(delay=0.001, k=64, batch_size=100, queue_size=2)
+        items = skewed_ips(200_000, seed=1)
+
+        if kind == "tcp":
+            port = await ing.add_tcp("src")
+            producer = asyncio.ensure_future(tcp_producer(port, items))
+        else:
+            path = os.path.join(tempfile.mkdtemp(), "src.sock")
+            await ing.add_unix("src", path)
+            producer = asyncio.ensure_future(unix_producer(path, items))
+        src = ing.sources["src"]
+
+        # 消費側が止まっている間: キューが満杯になり、読み取りもそこで止まる
+        await _wait_until(src.queue.full)
+        await asyncio.sleep(0.3)
+        assert src.records == 0
+        # キューの 2 バッチ + put で待っている 1 バッチだけを読んだところで止まる
+        assert src.received == (ing.queue_size + 1) * ing.batch_size
+        if kind == "unix":
+            # ソケットのバッファが小さいので送信側も止まっている
+            assert not producer.done()
+
+        ing.gate.set()
+        await producer
+        await ing.close()
+
+        truth = Counter(items)
+        assert src.received == src.records == src.summary.n == len(items)
+        assert src.dropped == 0
+        # 種類数 < k なので推定値は正確
+        assert {e: c for e, c, lo, hi in ing.top(None)} == truth
+        assert all(lo == c == hi for _, c, lo, hi in ing.top(None))
+
+    asyncio.run(run())
+
+
+def test_tcp_backpressure_and_exact_totals():
+    _check_backpressure("tcp")
+
+
+def test_unix_backpressure_and_exact_totals():
+    if not hasattr(asyncio, "start_unix_server"):
+        return
+    _check_backpressure("unix")
+
+
+def test_udp_overflow_is_dropped():
+    async def run():
+        ing = SlowIngestor(k=64, batch_size=20, queue_size=1)
+        port = await ing.add_udp("udp")
+        src = ing.sources["udp"]
+        items = skewed_ips(2_000, seed=2)
+
+        # 消費側が止まっている間に送る → 1 バッチだけキューに入り、残りは破棄
+        await udp_producer(port, items, per_datagram=20)
+        await _wait_until(lambda: src.received == len(items))
+        assert src.queue.full()
+        assert src.dropped == len(items) - ing.batch_size
+
+        ing.gate.set()
+        await ing.close()
+        assert src.records == src.summary.n == ing.batch_size
+        assert src.records + src.dropped == len(items)
+        assert ing.lag()["udp"]["backlog"] == 0
+
+    asyncio.run(run())
+
+
+def test_merged_top_bounds():
+    async def run():
+        for summary in ("ss", "mg"):
+            ing = SlowIngestor(delay=0.001, k=8, summary=summary, batch_size=500, queue_size=2)
+            a = await ing.add_tcp("a")
+            b = await ing.add_tcp("b")
+            ing.gate.set()
+            xs = skewed_ips(30_000, seed=3, distinct=200)
+            ys = skewed_ips(20_000, seed=4, distinct=200)
+            await asyncio.gather(tcp_producer(a, xs), tcp_producer(b, ys))
+            await ing.close()
+
+            truth = Counter(xs) + Counter(ys)
+            merged = ing.merged()
+            assert merged.n == len(xs) + len(ys)
+            assert ing.sources["a"].records == len(xs)
+            assert ing.sources["b"].records == len(ys)
+            for e, c, lo, hi in ing.top(None):
+                assert lo <= truth[e] <= hi
+            # 候補に無い要素の真の頻度も上限を超えない
+            top = {e for e, *_ in ing.top(None)}
+            assert all(c <= merged.outside_bound() for e, c in truth.items() if e not in top)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_tcp_backpressure_and_exact_totals()
+    test_unix_backpressure_and_exact_totals()
+    test_udp_overflow_is_dropped()
+    test_merged_top_bounds()
+    print("ok")
@@ -1,16 +1,30 @@
-from .loader import load_pois
-from .utils import latlon_to_xy
+from .loader import load_pois, poi_brand
+from .utils import Projection
 from rtree.rect import Rect
 from rtree.rtree import RTree
 
 def build_rtree(csv_path):
-    pois = load_pois(csv_path)
-    tree = RTree(max_entries=32)   # 建议 32 或 64
-    # 批量插入（见下）
+    return build_rtree_from_pois(load_pois(csv_path))
+
+# 直接从 POI 列表建树（例如车站列表，用于空间连接）
+# category_key: 节点类别摘要所用的键，默认按品牌；按类型可传 loader.poi_type
+#               （请用模块级函数：spatial_join 的多进程模式要把树 pickle 给子进程，
+#                lambda / 局部函数无法 pickle，届时只能退回单进程）
+# projection  : 平面投影，默认以本数据集重心为中心；
+#               两棵树要做空间连接时应共用同一个投影
+def build_rtree_from_pois(pois, category_key=poi_brand, projection=None):
+    if projection is None:
+        projection = Projection.fit([p["lat"] for p in pois], [p["lon"] for p in pois])
+    tree = RTree(max_entries=32, category_key=category_key,
+                 count_categories=True, projection=projection)   # 建议 32 或 64
+    # 批量插入：每 1000 个一批交给 insert_many（按 Z-order 缓冲下推）
+    batch = []
     for i, p in enumerate(pois):
-        x, y = latlon_to_xy(p["lat"], p["lon"])
-        rect = Rect(x, y, x, y)
-        tree.insert(rect, p)
+        x, y = projection.to_xy(p["lat"], p["lon"])
+        batch.append((Rect(x, y, x, y), p))
         if (i+1) % 1000 == 0:
+            tree.insert_many(batch)
+            batch = []
             print(f"Inserted {i+1}/{len(pois)}")
+    tree.insert_many(batch)
     return tree
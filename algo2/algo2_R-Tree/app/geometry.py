@@ -0,0 +1,172 @@
+import numpy as np
+
+from rtree.rect import Rect
+from rtree.rtree import OUTSIDE, PARTIAL, INSIDE
+
+
+# 向量化判断时每批处理的 “点 × 边” 数量上限（控制内存）
+_CHUNK = 1_000_000
+
+
+# ============================================================
+# ✅ 工具：线段与矩形是否相交（Liang–Barsky，对所有线段向量化）
+# ============================================================
+def _segments_hit_rect(x0, y0, x1, y1, rect):
+    dx = x1 - x0
+    dy = y1 - y0
+    t0 = np.zeros(len(x0))
+    t1 = np.ones(len(x0))
+    hit = np.ones(len(x0), dtype=bool)
+
+    for p, q in ((-dx, x0 - rect.xmin), (dx, rect.xmax - x0),
+                 (-dy, y0 - rect.ymin), (dy, rect.ymax - y0)):
+        parallel = p == 0
+        hit &= ~(parallel & (q < 0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.where(parallel, 0.0, q / np.where(parallel, 1.0, p))
+        enter = ~parallel & (p < 0)
+        leave = ~parallel & (p > 0)
+        t0 = np.where(enter, np.maximum(t0, r), t0)
+        t1 = np.where(leave, np.minimum(t1, r), t1)
+
+    return hit & (t0 <= t1)
+
+
+# ============================================================
+# ✅ 工具：点到线段的距离（点 × 线段 矩阵）
+# ============================================================
+def _point_segment_dist(px, py, x0, y0, x1, y1):
+    dx = x1 - x0
+    dy = y1 - y0
+    len_sq = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = ((px[:, None] - x0) * dx + (py[:, None] - y0) * dy) / len_sq
+    t = np.clip(np.nan_to_num(t), 0.0, 1.0)
+    cx = x0 + t * dx
+    cy = y0 + t * dy
+    return np.hypot(px[:, None] - cx, py[:, None] - cy)
+
+
+# ============================================================
+# ✅ 多边形区域（平面坐标）
+# ============================================================
+class Polygon:
+    """
+    输入：顶点 xs, ys（R-tree 平面坐标，首尾可不闭合）
+    提供：
+        bounds()             外接矩形
+        classify(rect)       节点 MBR 与多边形的关系（给 RTree.search_region 用）
+        contains(px, py)     向量化射线法点在多边形内判断
+    """
+
+    def __init__(self, xs, ys):
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if len(xs) < 3:
+            raise ValueError("polygon needs at least 3 vertices")
+
+        # 边：第 i 个顶点 → 第 i+1 个顶点（自动闭合）
+        self.x0, self.y0 = xs, ys
+        self.x1, self.y1 = np.roll(xs, -1), np.roll(ys, -1)
+        self.rect = Rect(xs.min(), ys.min(), xs.max(), ys.max())
+
+    def bounds(self):
+        return self.rect
+
+    def classify(self, rect):
+        # 1) 外接矩形不相交 → 直接剪枝
+        if not self.rect.intersect(rect):
+            return OUTSIDE
+
+        # 2) 有边穿过节点矩形 → 部分相交
+        if _segments_hit_rect(self.x0, self.y0, self.x1, self.y1, rect).any():
+            return PARTIAL
+
+        # 3) 没有任何边碰到节点矩形：节点要么整体在内，要么整体在外
+        cx = np.array([(rect.xmin + rect.xmax) / 2])
+        cy = np.array([(rect.ymin + rect.ymax) / 2])
+        return INSIDE if self.contains(cx, cy)[0] else OUTSIDE
+
+    def contains(self, px, py):
+        px = np.asarray(px, dtype=float)
+        py = np.asarray(py, dtype=float)
+        inside = np.zeros(len(px), dtype=bool)
+
+        step = max(1, _CHUNK // len(self.x0))
+        for s in range(0, len(px), step):
+            x = px[s:s + step, None]
+            y = py[s:s + step, None]
+            # 射线法：统计水平向右的射线与各边的交点数（奇数 → 在内）
+            crosses = (self.y0 > y) != (self.y1 > y)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x_at = self.x0 + (y - self.y0) * (self.x1 - self.x0) / (self.y1 - self.y0)
+            inside[s:s + step] = np.count_nonzero(crosses & (x < x_at), axis=1) % 2 == 1
+
+        return inside
+
+
+# ============================================================
+# ✅ 走廊区域：折线两侧 width 范围（平面坐标）
+# ============================================================
+class Corridor:
+    """
+    输入：折线顶点 xs, ys（R-tree 平面坐标）、缓冲宽度 width（米）
+    提供：
+        bounds()             外接矩形（已按 width 外扩）
+        classify(rect)       节点 MBR 与走廊的关系（给 RTree.search_region 用）
+        distances(px, py)    向量化点到折线的最短距离
+    """
+
+    def __init__(self, xs, ys, width):
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if len(xs) < 2:
+            raise ValueError("polyline needs at least 2 vertices")
+
+        self.width = float(width)
+        self.x0, self.y0 = xs[:-1], ys[:-1]
+        self.x1, self.y1 = xs[1:], ys[1:]
+        self.rect = Rect(xs.min() - width, ys.min() - width,
+                         xs.max() + width, ys.max() + width)
+
+    def bounds(self):
+        return self.rect
+
+    def classify(self, rect):
+        if not self.rect.intersect(rect):
+            return OUTSIDE
+
+        corners_x = np.array([rect.xmin, rect.xmin, rect.xmax, rect.xmax])
+        corners_y = np.array([rect.ymin, rect.ymax, rect.ymin, rect.ymax])
+        corner_dist = _point_segment_dist(corners_x, corners_y,
+                                          self.x0, self.y0, self.x1, self.y1)
+
+        # 到某条线段的距离是凸函数：四个角都在同一线段的缓冲区内 → 整个矩形都在
+        if (corner_dist <= self.width).all(axis=0).any():
+            return INSIDE
+
+        # 矩形到折线的最短距离 = 0（线段穿过矩形），或在角点 / 线段端点处取得
+        if _segments_hit_rect(self.x0, self.y0, self.x1, self.y1, rect).any():
+            return PARTIAL
+        if corner_dist.min() <= self.width:
+            return PARTIAL
+        ends_x = np.concatenate([self.x0, self.x1[-1:]])
+        ends_y = np.concatenate([self.y0, self.y1[-1:]])
+        gap_x = np.maximum(np.maximum(rect.xmin - ends_x, ends_x - rect.xmax), 0.0)
+        gap_y = np.maximum(np.maximum(rect.ymin - ends_y, ends_y - rect.ymax), 0.0)
+        if (np.hypot(gap_x, gap_y) <= self.width).any():
+            return PARTIAL
+        return OUTSIDE
+
+    def distances(self, px, py):
+        px = np.asarray(px, dtype=float)
+        py = np.asarray(py, dtype=float)
+        out = np.empty(len(px))
+
+        step = max(1, _CHUNK // len(self.x0))
+        for s in range(0, len(px), step):
+            d = _point_segment_dist(px[s:s + step], py[s:s + step],
+                                    self.x0, self.y0, self.x1, self.y1)
+            out[s:s + step] = d.min(axis=1)
+
+        return out
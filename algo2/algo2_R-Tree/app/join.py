@@ -0,0 +1,149 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from .utils import haversine_distance
+
+
+# ============================================================
+# ✅ 同步遍历两棵 R-tree：只下钻 MBR 距离 ≤ d 的节点对
+# ============================================================
+def _join_pairs(pairs, distance_m, plane_d, out):
+    """
+    pairs     : [(node_a, rect_a, node_b, rect_b), ...] 待处理的节点对及其 MBR
+    distance_m: 真实距离阈值（haversine，米）
+    plane_d   : 平面 MBR 剪枝阈值（≥ distance_m 在平面上可能对应的最大长度）
+    out       : 结果列表，追加 (data_a, data_b, 距离米)
+    """
+    stack = list(pairs)
+
+    while stack:
+        na, ra, nb, rb = stack.pop()
+
+        # -------- 两边都是叶子：先各自过滤，再按 x 排序扫描 --------
+        if na.leaf and nb.leaf:
+            _join_leaves(na, ra, nb, rb, distance_m, plane_d, out)
+            continue
+
+        # -------- 只展开非叶的一侧（两棵树高度不同时），或两侧都展开 --------
+        children_a = [(na, ra)] if na.leaf else na.children
+        children_b = [(nb, rb)] if nb.leaf else nb.children
+
+        near_b = [(cb, rcb) for cb, rcb in children_b if rcb.min_dist(ra) <= plane_d]
+        for ca, rca in children_a:
+            if rca.min_dist(rb) > plane_d:
+                continue
+            for cb, rcb in near_b:
+                if rca.min_dist(rcb) <= plane_d:
+                    stack.append((ca, rca, cb, rcb))
+
+    return out
+
+
+def _join_leaves(na, ra, nb, rb, distance_m, plane_d, out):
+    # 只保留离对方 MBR 足够近的条目
+    ea = [(d, r) for d, r in na.children if r.min_dist(rb) <= plane_d]
+    eb = [(d, r) for d, r in nb.children if r.min_dist(ra) <= plane_d]
+    if not ea or not eb:
+        return
+
+    # 按 xmin 排序：eb 中 xmin 超出 rxa.xmax + d 的条目可以提前结束
+    eb.sort(key=lambda e: e[1].xmin)
+
+    for da, rxa in ea:
+        lo = rxa.xmin - plane_d
+        hi = rxa.xmax + plane_d
+        for db, rxb in eb:
+            if rxb.xmin > hi:
+                break
+            if rxb.xmax < lo or rxa.min_dist(rxb) > plane_d:
+                continue
+            d = haversine_distance(da["lat"], da["lon"], db["lat"], db["lon"])
+            if d <= distance_m:
+                out.append((da, db, d))
+
+
+# ============================================================
+# ✅ 并行模式：每个进程持有两棵树的副本，只接收顶层节点对的下标
+# ============================================================
+_WORKER_TREES = None
+
+
+# 树要经 initargs pickle 给子进程（spawn 时）；category_key 是 lambda / 局部函数时无法 pickle
+def _picklable(tree):
+    try:
+        pickle.dumps(tree.category_key)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return False
+    return True
+
+
+def _init_worker(tree_a, tree_b):
+    global _WORKER_TREES
+    _WORKER_TREES = (tree_a, tree_b)
+
+
+def _join_task(index_pairs, distance_m, plane_d):
+    tree_a, tree_b = _WORKER_TREES
+    pairs = [
+        tree_a.root.children[i] + tree_b.root.children[j]
+        for i, j in index_pairs
+    ]
+    return _join_pairs(pairs, distance_m, plane_d, [])
+
+
+# ============================================================
+# ✅ 空间连接主函数
+# ============================================================
+def spatial_join(tree_a, tree_b, distance_m=300, workers=None):
+    """
+    例：tree_a = 车站，tree_b = 便利店 → 每个车站 300 m 内的所有便利店
+    输入：
+        tree_a, tree_b : 两棵 RTree（data 需含 lat / lon），必须使用同一个投影
+                         （build_rtree_from_pois(..., projection=另一棵树.projection)）
+        distance_m     : 距离阈值（米）
+        workers        : None / 1 → 单进程；>1 → 把顶层节点对分给多个进程
+                         （树的 category_key 无法 pickle 时提示并退回单进程）
+    输出：[(data_a, data_b, 距离米), ...]
+    """
+    root_a, root_b = tree_a.root, tree_b.root
+
+    if not root_a.children or not root_b.children:
+        return []
+
+    proj = tree_a.projection
+    if proj is None or proj != tree_b.projection:
+        raise ValueError("spatial_join requires both trees to share the same projection")
+
+    # 平面剪枝阈值：真实距离 ≤ d 的点对，其平面距离不超过 d × 投影比例上界
+    ra, rb = tree_a._calc_rect(root_a), tree_b._calc_rect(root_b)
+    lat_lo = min(proj.to_latlon(0, r.ymin)[0] for r in (ra, rb))
+    lat_hi = max(proj.to_latlon(0, r.ymax)[0] for r in (ra, rb))
+    plane_d = distance_m * proj.scale_bound(lat_lo, lat_hi)
+
+    if workers and workers > 1 and not (_picklable(tree_a) and _picklable(tree_b)):
+        print("⚠️ spatial_join: category_key 无法 pickle（lambda / 局部函数？），退回单进程；"
+              "请改用模块级函数，例如 loader.poi_type")
+        workers = 1
+
+    # 根节点是叶子（小树）或只要求单进程 → 直接串行
+    if not workers or workers <= 1 or root_a.leaf or root_b.leaf:
+        return _join_pairs([(root_a, ra, root_b, rb)], distance_m, plane_d, [])
+
+    # 顶层节点对（MBR 距离 ≤ d）按轮询分成若干批
+    index_pairs = [
+        (i, j)
+        for i, (_, rca) in enumerate(root_a.children)
+        for j, (_, rcb) in enumerate(root_b.children)
+        if rca.min_dist(rcb) <= plane_d
+    ]
+    n_tasks = min(len(index_pairs), workers * 4)
+    if n_tasks == 0:
+        return []
+    batches = [index_pairs[k::n_tasks] for k in range(n_tasks)]
+
+    result = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(tree_a, tree_b)) as pool:
+        for part in pool.map(_join_task, batches, [distance_m] * n_tasks, [plane_d] * n_tasks):
+            result.extend(part)
+    return result
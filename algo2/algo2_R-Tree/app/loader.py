@@ -1,4 +1,22 @@
 import csv
+import unicodedata
+
+
+# 品牌别名：规范化后的名称前缀 → 统一的品牌名（按顺序匹配，长前缀在前）
+BRAND_PREFIXES = [
+    ("ナチュラルローソン", "ナチュラルローソン"),
+    ("ローソンストア100", "ローソンストア100"),
+    ("ローソン", "ローソン"),
+    ("lawson", "ローソン"),
+    ("セブンイレブン", "セブン-イレブン"),
+    ("7eleven", "セブン-イレブン"),
+    ("ファミリーマート", "ファミリーマート"),
+    ("familymart", "ファミリーマート"),
+    ("ミニストップ", "ミニストップ"),
+    ("ministop", "ミニストップ"),
+    ("デイリーヤマザキ", "デイリーヤマザキ"),
+    ("newdays", "NewDays"),
+]
 
 def load_pois(path):
     pois = []
@@ -16,3 +34,30 @@ def load_pois(path):
             })
 
     return pois
+
+
+def normalize_brand(name):
+    """
+    店名 / 品牌名 → 统一的品牌名
+    例： "セブン－イレブン 新宿店" / "7-Eleven" → "セブン-イレブン"
+    未知品牌原样返回（去掉首尾空白），空名返回 ""
+    """
+    if not name:
+        return ""
+    key = unicodedata.normalize("NFKC", name).lower()
+    for ch in " -・":
+        key = key.replace(ch, "")
+    for prefix, brand in BRAND_PREFIXES:
+        if key.startswith(prefix):
+            return brand
+    return name.strip()
+
+
+# R-tree 的类别键：POI → 品牌
+def poi_brand(p):
+    return normalize_brand(p["name"])
+
+
+# R-tree 的类别键：POI → @type
+def poi_type(p):
+    return p["type"]
@@ -1,21 +1,36 @@
 from rtree.rect import Rect
-from .utils import latlon_to_xy
-from app.utils import latlon_to_xy, haversine_distance
+from app.utils import haversine_distance
+from app.geometry import Polygon, Corridor
+from app.loader import normalize_brand
 
-def search_nearby(tree, lat0, lon0, radius_m=500):
+
+# brand 参数 → RTree 查询的 categories 参数
+def _brand_filter(brand):
+    return None if brand is None else normalize_brand(brand)
+
+
+# 建树时的投影：经纬度查询都要换算到树的平面坐标，没有投影就无法换算
+def _projection(tree):
+    if tree.projection is None:
+        raise ValueError("latitude/longitude queries require a tree built with a projection "
+                         "(build_rtree_from_pois or RTree(projection=...))")
+    return tree.projection
+
+
+def search_nearby(tree, lat0, lon0, radius_m=500, stats=None, brand=None):
     """
     1) 先用矩形 R-tree 搜索（粗筛）
     2) 再用 haversine 精确筛选真实距离
+    stats: 可选 QueryStats，统计粗筛阶段的访问量
+    brand: 可选，只找该品牌（例如 "ファミリーマート"），不含该品牌的子树直接跳过
     """
 
-    # 把中心点变成 R-tree 的坐标系
-    x0, y0 = latlon_to_xy(lat0, lon0)
-
-    # 创建“方形搜索框”，长度 radius_m
-    rect = Rect(x0 - radius_m, y0 - radius_m, x0 + radius_m, y0 + radius_m)
+    # 半径 radius_m 的球冠 → 经纬度最小外接框 → 按建树时的投影换成平面矩形
+    # （投影是线性的，所以这个框既不会漏点，也不会比真实圆大太多）
+    rect = Rect(*_projection(tree).radius_box_xy(lat0, lon0, radius_m))
 
-    # 用 R-tree 粗筛出所有可能的点
-    candidates = tree.search(rect)
+    # 用 R-tree 粗筛：逐个取出候选点，边取边过滤，不先把候选全部放进列表
+    candidates = tree.iter_search(rect, stats=stats, categories=_brand_filter(brand))
 
     results = []
 
@@ -27,9 +42,119 @@ def search_nearby(tree, lat0, lon0, radius_m=500):
     # 按距离排序
     results.sort(key=lambda x: x[1])
     return results
-def range_query(tree, lat_min, lon_min, lat_max, lon_max):
-    x1, y1 = latlon_to_xy(lat_min, lon_min)
-    x2, y2 = latlon_to_xy(lat_max, lon_max)
-    rect = Rect(min(x1,x2), min(y1,y2), max(x1,x2), max(y1,y2))
-    return tree.search(rect)
+def range_query(tree, lat_min, lon_min, lat_max, lon_max, stats=None, brand=None):
+    rect = _latlon_rect(tree, lat_min, lon_min, lat_max, lon_max)
+    return tree.search(rect, stats=stats, categories=_brand_filter(brand))
+
+
+
+# 经纬度范围 → R-tree 平面矩形（使用建树时的投影）
+def _latlon_rect(tree, lat_min, lon_min, lat_max, lon_max):
+    return Rect(*_projection(tree).box_xy(lat_min, lon_min, lat_max, lon_max))
+
+
+# 经纬度点列 → 平面坐标 xs, ys
+def _project_all(tree, latlons):
+    proj = _projection(tree)
+    return zip(*(proj.to_xy(lat, lon) for lat, lon in latlons))
+
+
+# ============================================================
+# ✅ 计数 / 密度：只要数量时不必把 POI 全部取出来
+# ============================================================
+def count_in_range(tree, lat_min, lon_min, lat_max, lon_max, brand=None):
+    rect = _latlon_rect(tree, lat_min, lon_min, lat_max, lon_max)
+    return tree.count(rect, categories=_brand_filter(brand))
+
+
+def density_grid(tree, lat_min, lon_min, lat_max, lon_max, nx, ny, brand=None):
+    """
+    把范围划成 nx × ny 个格子（仪表盘瓦片），返回每格的 POI 数量
+    输出：grid[iy][ix]，iy=0 为最南一行
+    """
+    rect = _latlon_rect(tree, lat_min, lon_min, lat_max, lon_max)
+    return tree.density(rect, nx, ny, categories=_brand_filter(brand))
+
+
+# ============================================================
+# ✅ k 近邻：例如“最近的 7-Eleven”
+# ============================================================
+def search_nearest(tree, lat0, lon0, k=1, stats=None, brand=None):
+    """
+    1) R-tree best-first 搜索平面坐标下最近的 k 个 POI
+    2) 平面距离与真实距离略有差别：以其中最远的真实距离为半径再做一次
+       半径查询，保证返回的是按 haversine 计的真正最近的 k 个
+    输出：[(poi, 距离米), ...]，按距离排序
+    stats: 只统计 best-first 搜索的访问量（第 2 步不重复计入），returned 为最终返回数
+    """
+    found = tree.nearest(_projection(tree).to_xy(lat0, lon0), k,
+                         categories=_brand_filter(brand), stats=stats)
+    if not found:
+        return []
+
+    radius = max(haversine_distance(lat0, lon0, p["lat"], p["lon"]) for p, _ in found)
+    results = search_nearby(tree, lat0, lon0, radius, brand=brand)[:k]
+    if stats is not None:
+        stats.returned += len(results) - len(found)
+    return results
+
+
+
+# 叶子条目 rect 的中心点（点数据的 rect 退化为一个点）
+def _entry_xy(entries):
+    px = [(r.xmin + r.xmax) / 2 for _, r in entries]
+    py = [(r.ymin + r.ymax) / 2 for _, r in entries]
+    return px, py
+
+
+# ============================================================
+# ✅ 多边形查询：例如“某个区界内的所有便利店”
+# ============================================================
+def search_polygon(tree, polygon, stats=None):
+    """
+    polygon: [(lat, lon), ...] 多边形顶点（首尾可不闭合）
+    1) 节点 MBR 与多边形做剪枝 / 整体命中判断（RTree.search_region）
+    2) 只对部分相交的叶子条目做一次向量化点在多边形内判断
+    """
+    region = Polygon(*_project_all(tree, polygon))
+
+    inside, partial = tree.search_region(region, stats=stats)
+    results = [data for data, _ in inside]
+
+    if partial:
+        mask = region.contains(*_entry_xy(partial))
+        results.extend(data for (data, _), hit in zip(partial, mask) if hit)
+
+    if stats is not None:
+        stats.entries_tested += len(partial)
+        stats.returned += len(results)
+    return results
+
+
+# ============================================================
+# ✅ 走廊查询：例如“路线两侧 200 m 内的便利店”
+# ============================================================
+def search_corridor(tree, polyline, width_m=200, stats=None):
+    """
+    polyline: [(lat, lon), ...] 路线顶点
+    width_m : 路线两侧的缓冲宽度（米，按 R-tree 平面坐标计算）
+    输出：[(poi, 到路线的距离), ...]，按距离排序
+    """
+    region = Corridor(*_project_all(tree, polyline), width_m)
+
+    inside, partial = tree.search_region(region, stats=stats)
 
+    # 整体命中的条目也需要距离（用于排序），一起做一次向量化计算
+    entries = inside + partial
+    if not entries:
+        return []
+    dist = region.distances(*_entry_xy(entries))
+
+    results = [(data, float(d)) for (data, _), d in zip(entries, dist) if d <= width_m]
+
+    if stats is not None:
+        stats.entries_tested += len(partial)
+        stats.returned += len(results)
+
+    results.sort(key=lambda x: x[1])
+    return results
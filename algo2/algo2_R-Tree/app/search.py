@@ -1,5 +1,8 @@
 import math
 
+from .loader import normalize_brand
+from .utils import radius_bbox
+
 
 # ✅ Haversine 球面距离（米）
 def haversine(lat1, lon1, lat2, lon2):
@@ -15,25 +18,18 @@ def haversine(lat1, lon1, lat2, lon2):
 
 
 # ✅ 半径查询函数
-def search_nearby(tree, lat, lon, radius):
+def search_nearby(tree, lat, lon, radius, brand=None):
     """
-    输入：树、中心点经纬度、半径（米）
+    输入：树、中心点经纬度、半径（米）、可选品牌（例如 "セブン-イレブン"）
     输出：[{name, lat, lon, distance_m}, ...]
     """
 
-    # -------------- 1) 先做一个粗略的“经纬度范围”框 --------------
-    # 1度纬度 ≈ 111km
-    delta_lat = radius / 111000.0
-    # 1度经度 ≈ 111km * cos(lat)
-    delta_lon = radius / (111000.0 * math.cos(math.radians(lat)))
-
-    lat_min = lat - delta_lat
-    lat_max = lat + delta_lat
-    lon_min = lon - delta_lon
-    lon_max = lon + delta_lon
+    # -------------- 1) 半径球冠的经纬度最小外接框（不漏点且尽量小） --------------
+    lat_min, lon_min, lat_max, lon_max = radius_bbox(lat, lon, radius)
 
     # -------------- 2) 用 R-Tree 做范围查询 --------------
-    candidates = tree.range_query(lat_min, lon_min, lat_max, lon_max)
+    categories = None if brand is None else normalize_brand(brand)
+    candidates = tree.iter_range(lat_min, lon_min, lat_max, lon_max, categories=categories)
 
     # -------------- 3) 精确判断“是否在半径范围内” --------------
     results = []
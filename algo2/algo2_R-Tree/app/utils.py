@@ -1,5 +1,7 @@
 import math
 
+# 旧的逐点换算：x 按每个点自己的纬度缩放，不同纬度的点之间平面会变形。
+# 建索引 / 查询请使用下面的 Projection（整个数据集共用一个投影）
 def latlon_to_xy(lat, lon):
     x = lon * 111000 * math.cos(math.radians(lat))
     y = lat * 111000
@@ -18,3 +20,91 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
 
     return R * c
+
+
+# 地球半径（米），与 haversine_distance 保持一致
+EARTH_RADIUS_M = 6371000
+
+
+# ============================================================
+# ✅ 半径 r 的球冠在经纬度上的最小外接框（保守且紧）
+# ============================================================
+def radius_bbox(lat, lon, radius_m):
+    """
+    输出：(lat_min, lon_min, lat_max, lon_max)
+    纬度方向：沿经线的距离正好是 R·Δφ
+    经度方向：球冠的最大经度偏移 Δλ = asin(sin(r/R) / cos φ)
+    所有 haversine 距离 ≤ r 的点都一定落在框内
+    """
+    ang = radius_m / EARTH_RADIUS_M
+    dlat = math.degrees(ang)
+
+    cos_lat = math.cos(math.radians(lat))
+    if math.sin(ang) >= cos_lat:
+        # 球冠包含极点：经度不受限
+        dlon = 180.0
+    else:
+        dlon = math.degrees(math.asin(math.sin(ang) / cos_lat))
+
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+# ============================================================
+# ✅ 数据集统一使用的平面投影（以数据重心为中心的等距圆柱投影）
+# ============================================================
+class Projection:
+    """
+    x = R · Δλ · cos φ0,  y = R · Δφ   （单位：米，(φ0, λ0) 为数据重心）
+    - 对整个数据集只用一个 cos φ0，经纬度与平面坐标是线性关系，
+      因此经纬度矩形 ↔ 平面矩形可以精确互换
+    - 在重心附近平面距离 ≈ 真实距离；离重心越远，东西方向的比例
+      cos φ0 / cos φ 偏离 1 越多（见 scale_bound）
+    """
+
+    def __init__(self, lat0, lon0):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.ky = math.radians(1) * EARTH_RADIUS_M   # 每度纬度的米数
+        self.kx = self.ky * math.cos(math.radians(lat0))
+
+    # 以一组点的重心为中心；没有点时以 (0, 0) 为中心（空树也能正常查询）
+    @classmethod
+    def fit(cls, lats, lons):
+        lats = list(lats)
+        lons = list(lons)
+        if not lats:
+            return cls(0.0, 0.0)
+        return cls(sum(lats) / len(lats), sum(lons) / len(lons))
+
+    def to_xy(self, lat, lon):
+        return (lon - self.lon0) * self.kx, (lat - self.lat0) * self.ky
+
+    def to_latlon(self, x, y):
+        return self.lat0 + y / self.ky, self.lon0 + x / self.kx
+
+    # 经纬度范围 → 平面矩形的 (xmin, ymin, xmax, ymax)
+    def box_xy(self, lat_min, lon_min, lat_max, lon_max):
+        x1, y1 = self.to_xy(lat_min, lon_min)
+        x2, y2 = self.to_xy(lat_max, lon_max)
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
+    # 半径查询的平面粗筛框：球冠经纬度外接框的精确映射
+    def radius_box_xy(self, lat, lon, radius_m):
+        return self.box_xy(*radius_bbox(lat, lon, radius_m))
+
+    def scale_bound(self, lat_min, lat_max):
+        """
+        纬度在 [lat_min, lat_max] 内时，平面距离 / 真实距离 的上界
+        （东西方向比例 cos φ0 / cos φ 在 |φ| 最大处取最大；另留少量余量
+          覆盖球面与平面的二阶差）
+        """
+        cos_min = min(math.cos(math.radians(lat_min)), math.cos(math.radians(lat_max)))
+        ratio = math.cos(math.radians(self.lat0)) / cos_min
+        return max(ratio, 1.0) * (1 + 1e-6)
+
+    def __eq__(self, other):
+        return (isinstance(other, Projection) and
+                self.lat0 == other.lat0 and self.lon0 == other.lon0)
+
+    def __repr__(self):
+        return f"Projection(lat0={self.lat0}, lon0={self.lon0})"
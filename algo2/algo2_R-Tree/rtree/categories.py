@@ -0,0 +1,31 @@
+class CategoryIndex:
+    """
+    类别驻留表（品牌 / @type 等）
+    -------------------------------------
+    每个类别字符串分配一个比特位，节点摘要用一个 int 位图表示：
+        bit(name)   → 1 << 序号（首次出现时分配；只在插入时调用）
+        mask(names) → 若干类别的位图；未出现过的类别不占位，也不登记（查询用）
+    """
+
+    def __init__(self):
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def bit(self, name):
+        idx = self.ids.get(name)
+        if idx is None:
+            idx = len(self.ids)
+            self.ids[name] = idx
+        return 1 << idx
+
+    def mask(self, names):
+        if isinstance(names, str):
+            names = [names]
+        m = 0
+        for name in names:
+            idx = self.ids.get(name)
+            if idx is not None:
+                m |= 1 << idx
+        return m
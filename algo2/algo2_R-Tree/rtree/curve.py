@@ -0,0 +1,30 @@
+# =====================================
+# 空间填充曲线（Z-order / Morton）
+# 批量插入时按曲线排序，使相邻条目在空间上也相邻
+# =====================================
+
+BITS = 16   # 每一维量化到 2^16 个格子
+
+
+class ZOrder:
+    """
+    输入：一个覆盖所有数据的范围（Rect）
+    key(rect): 把矩形中心逐维量化后按位交错，得到 Z-order 键（任意维数）
+    """
+
+    def __init__(self, frame):
+        self.lows = tuple(frame.mins)
+        self.spans = tuple(hi - lo for lo, hi in zip(frame.mins, frame.maxs))
+        self.scale = (1 << BITS) - 1
+
+    def key(self, rect):
+        cells = []
+        for c, lo, span in zip(rect.center(), self.lows, self.spans):
+            v = int((c - lo) / span * self.scale) if span > 0 else 0
+            cells.append(min(max(v, 0), self.scale))
+
+        key = 0
+        for b in range(BITS - 1, -1, -1):
+            for v in cells:
+                key = (key << 1) | ((v >> b) & 1)
+        return key
@@ -2,6 +2,10 @@ class Node:
     def __init__(self, max_entries=8, leaf=False):
         self.children = []       # child Node 或 POI 数据
         self.rects = []          # 每个 child 对应的 MBR
+        self.bits = []           # 叶子：每个条目的类别位，与 children 一一对应（插入时计算一次）
         self.leaf = leaf
         self.max_entries = max_entries
         self.parent = None
+        self.cats = 0            # 子树中出现过的类别位图（RTree 启用 category_key 时维护）
+        self.count = 0           # 子树中的数据条目数
+        self.cat_counts = None   # 子树中各类别的条目数 {类别序号: 数量}（可选）
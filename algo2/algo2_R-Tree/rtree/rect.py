@@ -1,34 +1,103 @@
 class Rect:
-    def __init__(self, xmin, ymin, xmax, ymax):
-        self.xmin = xmin
-        self.ymin = ymin
-        self.xmax = xmax
-        self.ymax = ymax
+    """
+    N 维轴对齐矩形（盒子）
+    -------------------------------------
+    2 维：Rect(xmin, ymin, xmax, ymax)          —— 与原来的用法相同
+    N 维：Rect(min_0, ..., min_N-1, max_0, ..., max_N-1)
+          例：时空盒子 Rect(xmin, ymin, tmin, xmax, ymax, tmax)
+    """
+
+    def __init__(self, *bounds):
+        n = len(bounds) // 2
+        if n == 0 or len(bounds) != 2 * n:
+            raise ValueError("Rect needs 2*N bounds: N minimums followed by N maximums")
+        self.mins = list(bounds[:n])
+        self.maxs = list(bounds[n:])
+
+    # 由最小 / 最大角点构造
+    @classmethod
+    def from_bounds(cls, mins, maxs):
+        return cls(*mins, *maxs)
+
+    # 退化为一个点的矩形
+    @classmethod
+    def from_point(cls, point):
+        return cls(*point, *point)
+
+    # 维数
+    @property
+    def dims(self):
+        return len(self.mins)
+
+    # 前两维的别名（2 维代码沿用 xmin / ymin / xmax / ymax）
+    @property
+    def xmin(self):
+        return self.mins[0]
+
+    @property
+    def ymin(self):
+        return self.mins[1]
+
+    @property
+    def xmax(self):
+        return self.maxs[0]
+
+    @property
+    def ymax(self):
+        return self.maxs[1]
 
     # 拷贝（用于 choose_leaf 时不修改原矩形）
     def copy(self):
-        return Rect(self.xmin, self.ymin, self.xmax, self.ymax)
+        return Rect(*self.mins, *self.maxs)
 
     # 扩张到能包含另一个矩形
     def enlarge(self, other):
-        self.xmin = min(self.xmin, other.xmin)
-        self.ymin = min(self.ymin, other.ymin)
-        self.xmax = max(self.xmax, other.xmax)
-        self.ymax = max(self.ymax, other.ymax)
+        self.mins = [min(a, b) for a, b in zip(self.mins, other.mins)]
+        self.maxs = [max(a, b) for a, b in zip(self.maxs, other.maxs)]
 
-    # 面积
+    # 面积（N 维时为体积）
     def area(self):
-        return (self.xmax - self.xmin) * (self.ymax - self.ymin)
+        v = 1
+        for lo, hi in zip(self.mins, self.maxs):
+            v *= hi - lo
+        return v
 
     # 相交测试（范围查询用）
     def intersect(self, other):
-        return not (
-            self.xmax < other.xmin or
-            self.xmin > other.xmax or
-            self.ymax < other.ymin or
-            self.ymin > other.ymax
-        )
+        for lo, hi, olo, ohi in zip(self.mins, self.maxs, other.mins, other.maxs):
+            if hi < olo or lo > ohi:
+                return False
+        return True
+
+    # 包含测试：other 完全落在本矩形内
+    def contains(self, other):
+        for lo, hi, olo, ohi in zip(self.mins, self.maxs, other.mins, other.maxs):
+            if olo < lo or ohi > hi:
+                return False
+        return True
+
+    # 中心点
+    def center(self):
+        return tuple((lo + hi) / 2 for lo, hi in zip(self.mins, self.maxs))
+
+    # 相交部分的面积（统计节点重叠用）
+    def overlap(self, other):
+        v = 1.0
+        for lo, hi, olo, ohi in zip(self.mins, self.maxs, other.mins, other.maxs):
+            w = min(hi, ohi) - max(lo, olo)
+            if w <= 0:
+                return 0.0
+            v *= w
+        return v
+
+    # 两个矩形之间的最短欧氏距离（相交时为 0，空间连接剪枝用）
+    def min_dist(self, other):
+        s = 0.0
+        for lo, hi, olo, ohi in zip(self.mins, self.maxs, other.mins, other.maxs):
+            d = max(olo - hi, lo - ohi, 0.0)
+            s += d * d
+        return s ** 0.5
 
     # 打印
     def __repr__(self):
-        return f"Rect({self.xmin}, {self.ymin}, {self.xmax}, {self.ymax})"
+        return f"Rect({', '.join(map(str, self.mins + self.maxs))})"
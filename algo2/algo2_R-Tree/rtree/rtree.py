@@ -1,11 +1,35 @@
+import heapq
+
 from .node import Node
 from .rect import Rect
+from .curve import ZOrder
+from .categories import CategoryIndex
+
+# 区域查询中节点 MBR 与查询区域的关系（见 RTree.search_region）
+OUTSIDE = 0   # 完全在区域外 → 剪枝
+PARTIAL = 1   # 部分相交 → 继续下钻 / 叶子条目交给调用方精确判断
+INSIDE = 2    # 完全在区域内 → 整棵子树直接命中
 
 
 class RTree:
-    def __init__(self, max_entries=32):
+    def __init__(self, max_entries=32, category_key=None, count_categories=False,
+                 projection=None):
+        """
+        category_key: 可选，data → 类别名（例如品牌、@type）
+                      给定时每个节点维护子树类别位图 node.cats，
+                      带 categories 参数的查询可跳过不含目标类别的子树
+        count_categories: 同时维护每个子树的分类别计数 node.cat_counts，
+                      使带类别的 count() / density() 也不必下钻
+        projection  : 可选，建树时所用的经纬度 → 平面投影（需提供 box_xy）；
+                      给定时 range_query / iter_range 直接换算成平面矩形查询
+        """
         self.M = max_entries
         self.root = Node(max_entries, leaf=True)
+        self._curve = None   # insert_many 期间使用的 Z-order
+        self.category_key = category_key
+        self.count_categories = count_categories and category_key is not None
+        self.categories = CategoryIndex()
+        self.projection = projection
 
     # =====================================
     # 插入
@@ -13,12 +37,121 @@ class RTree:
     def insert(self, rect, data):
         leaf = self._choose_leaf(self.root, rect)
         leaf.children.append((data, rect))
+        leaf.bits.append(self._data_bit(data))
 
         if len(leaf.children) > self.M:
             self._split(leaf)
 
         self._adjust_tree(leaf)
 
+    # =====================================
+    # 批量插入（按 Z-order 排序 + 逐层缓冲下推）
+    # =====================================
+    def insert_many(self, items):
+        """
+        items: [(rect, data), ...]，与 insert(rect, data) 的参数顺序一致
+        1) 按 Z-order 排序，让同一批里空间相邻的条目挨在一起
+        2) 从根开始，把整批条目分到各子节点的缓冲区，再逐层下推
+        3) 每个被触及的节点只在最后重新计算一次 MBR / 分裂一次
+        """
+        entries = [(data, rect) for rect, data in items]
+        if not entries:
+            return
+
+        frame = entries[0][1].copy()
+        for _, rect in entries:
+            frame.enlarge(rect)
+        if self.root.children:
+            frame.enlarge(self._calc_rect(self.root))
+        self._curve = ZOrder(frame)
+
+        entries.sort(key=lambda e: self._curve.key(e[1]))
+        self._push_down(self.root, entries)
+
+        # 根节点溢出 → 向上长出新的根，直到放得下
+        parts = self._split_sorted(self.root)
+        while len(parts) > 1:
+            root = Node(self.M, leaf=False)
+            root.children = [self._entry(part) for part in parts]
+            for part in parts:
+                part.parent = root
+            self.root = root
+            parts = self._split_sorted(root)
+
+        self._refresh(self.root)
+        self._curve = None
+
+    def _push_down(self, node, entries):
+        if node.leaf:
+            node.children.extend(entries)
+            node.bits.extend(self._data_bit(data) for data, _ in entries)
+            return
+
+        # 为每个子节点准备缓冲区；用 MBR 副本模拟逐条插入时的扩张
+        rects = [rect.copy() for _, rect in node.children]
+        buffers = {}
+        last = None
+
+        for entry in entries:
+            rect = entry[1]
+            # 曲线顺序下相邻条目多半落在同一个子节点：能直接装下就不再比较
+            if last is not None and rects[last].contains(rect):
+                best = last
+            else:
+                best = None
+                best_inc = float('inf')
+                for i, child_rect in enumerate(rects):
+                    before = child_rect.area()
+                    new_rect = child_rect.copy()
+                    new_rect.enlarge(rect)
+                    inc = new_rect.area() - before
+                    if inc < best_inc:
+                        best_inc = inc
+                        best = i
+            rects[best].enlarge(rect)
+            buffers.setdefault(best, []).append(entry)
+            last = best
+
+        # 逐个下推，并把溢出的子节点按曲线顺序切块
+        children = []
+        for i, (child, rect) in enumerate(node.children):
+            if i not in buffers:
+                children.append((child, rect))
+                continue
+            self._push_down(child, buffers[i])
+            for part in self._split_sorted(child):
+                part.parent = node
+                children.append(self._entry(part))
+        node.children = children
+
+    def _split_sorted(self, node):
+        """
+        未溢出 → [node]
+        溢出   → 按 Z-order 排序后切成 ceil(n / M) 个大小均匀的节点
+                 （第一块留在 node 中，其余放到新节点）
+        """
+        n = len(node.children)
+        if n <= self.M:
+            return [node]
+
+        key = self._curve.key
+        order = sorted(range(n), key=lambda i: key(node.children[i][1]))
+        children = [node.children[i] for i in order]
+        bits = [node.bits[i] for i in order] if node.leaf else []
+        k = -(-n // self.M)
+        bounds = [n * i // k for i in range(k + 1)]
+
+        parts = []
+        for i in range(k):
+            part = node if i == 0 else Node(node.max_entries, leaf=node.leaf)
+            part.children = children[bounds[i]:bounds[i + 1]]
+            part.bits = bits[bounds[i]:bounds[i + 1]]
+            if i > 0 and not part.leaf:
+                for child, _ in part.children:
+                    child.parent = part
+            parts.append(part)
+        return parts
+
     # =====================================
     # 选叶子
     # =====================================
@@ -52,17 +185,20 @@ class RTree:
         # 原 node 保留 g1
         node.children = g1
 
-        # 新节点保存 g2
+        # 新节点保存 g2（叶子的类别位随条目一起分开）
         new = Node(node.max_entries, leaf=node.leaf)
         new.children = g2
+        new.bits = node.bits[half:]
+        node.bits = node.bits[:half]
+        # 内部节点：移到新节点的子节点要改指向新的父节点
+        if not new.leaf:
+            for child, _ in g2:
+                child.parent = new
 
         # 父节点处理
         if node.parent is None:
             root = Node(node.max_entries, leaf=False)
-            root.children = [
-                (node, self._calc_rect(node)),
-                (new, self._calc_rect(new))
-            ]
+            root.children = [self._entry(node), self._entry(new)]
             node.parent = root
             new.parent = root
             self.root = root
@@ -71,10 +207,10 @@ class RTree:
             # 更新旧的 node
             for i,(child,_) in enumerate(p.children):
                 if child is node:
-                    p.children[i] = (node, self._calc_rect(node))
+                    p.children[i] = self._entry(node)
                     break
             # 插入新的节点
-            p.children.append((new, self._calc_rect(new)))
+            p.children.append(self._entry(new))
             new.parent = p
 
             if len(p.children) > self.M:
@@ -88,24 +224,85 @@ class RTree:
             p = node.parent
             for i,(child,_) in enumerate(p.children):
                 if child is node:
-                    p.children[i] = (node, self._calc_rect(node))
+                    p.children[i] = self._entry(node)
             node = p
+        self._refresh(node)
+
+    # 父节点中指向 node 的条目：(node, MBR)，同时刷新 node 的摘要
+    def _entry(self, node):
+        self._refresh(node)
+        return (node, self._calc_rect(node))
+
+    # =====================================
+    # 节点摘要（子树计数 / 类别位图 / 分类别计数）
+    # =====================================
+    def _refresh(self, node):
+        if node.leaf:
+            node.count = len(node.children)
+        else:
+            node.count = sum(child.count for child, _ in node.children)
+
+        if self.category_key is None:
+            return
+        cats = 0
+        counts = {} if self.count_categories else None
+        if node.leaf:
+            for bit in node.bits:
+                cats |= bit
+                if counts is not None:
+                    idx = bit.bit_length() - 1
+                    counts[idx] = counts.get(idx, 0) + 1
+        else:
+            for child, _ in node.children:
+                cats |= child.cats
+                if counts is not None:
+                    for idx, c in child.cat_counts.items():
+                        counts[idx] = counts.get(idx, 0) + c
+        node.cats = cats
+        node.cat_counts = counts
+
+    # 条目的类别位：只在插入时计算（会登记新类别），查询直接读 node.bits
+    def _data_bit(self, data):
+        if self.category_key is None:
+            return 0
+        return self.categories.bit(self.category_key(data))
+
+    # 查询参数 categories → 位图；None 表示不过滤（只查表，不登记新类别）
+    def _category_mask(self, categories):
+        if categories is None:
+            return None
+        if self.category_key is None:
+            raise ValueError("category filtering requires RTree(category_key=...)")
+        return self.categories.mask(categories)
 
     # =====================================
     # 计算节点 MBR
     # =====================================
     def _calc_rect(self, node):
-        xs, ys = [], []
-        for data, rect in node.children:
-            xs.extend([rect.xmin, rect.xmax])
-            ys.extend([rect.ymin, rect.ymax])
-        return Rect(min(xs), min(ys), max(xs), max(ys))
+        rects = [rect for _, rect in node.children]
+        mins = [min(vs) for vs in zip(*(r.mins for r in rects))]
+        maxs = [max(vs) for vs in zip(*(r.maxs for r in rects))]
+        return Rect.from_bounds(mins, maxs)
 
     # =====================================
     # 范围查询
     # =====================================
-    def search(self, rect):
-        return self._search(self.root, rect)
+    def search(self, rect, stats=None, categories=None):
+        """
+        categories: 可选，类别名或类别名列表；只返回这些类别的数据，
+                    并跳过摘要中不含这些类别的子树
+        """
+        # stats / categories 都为 None 时走原来的路径，不产生任何额外开销
+        if stats is None and categories is None:
+            return self._search(self.root, rect)
+        mask = self._category_mask(categories)
+        if mask == 0:
+            result = []
+        else:
+            result = self._search_ex(self.root, rect, stats, mask)
+        if stats is not None:
+            stats.returned += len(result)
+        return result
 
     def _search(self, node, rect):
         result = []
@@ -117,60 +314,373 @@ class RTree:
             else:
                 result.extend(self._search(child_or_data, rect))
         return result
+
+    # =====================================
+    # 惰性查询：生成器 + 显式栈，可提前结束
+    # =====================================
+    def iter_search(self, rect, limit=None, predicate=None, categories=None, stats=None):
+        """
+        逐个 yield 与 rect 相交的数据，不构造中间列表
+        limit    : 最多返回多少个，够了立刻停止遍历
+        predicate: 可选，data → bool，只返回满足条件的数据
+        内存只与栈深 × M 有关，与结果多少无关
+        """
+        mask = self._category_mask(categories)
+        if mask == 0 or limit == 0:
+            return
+
+        found = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if stats is not None:
+                stats.nodes_visited += 1
+
+            if node.leaf:
+                for (data, child_rect), bit in zip(node.children, node.bits):
+                    if stats is not None:
+                        stats.entries_tested += 1
+                    if not child_rect.intersect(rect):
+                        continue
+                    if mask is not None and not bit & mask:
+                        continue
+                    if predicate is not None and not predicate(data):
+                        continue
+                    if stats is not None:
+                        stats.returned += 1
+                    yield data
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+                continue
+
+            for child, child_rect in reversed(node.children):
+                if not child_rect.intersect(rect):
+                    continue
+                if mask is not None and not child.cats & mask:
+                    continue
+                stack.append(child)
+
+    # 存在性检查：找到第一个就停
+    def exists(self, rect, predicate=None, categories=None):
+        for _ in self.iter_search(rect, limit=1, predicate=predicate, categories=categories):
+            return True
+        return False
+
+    # 带计数 / 类别过滤的版本（mask 为 None 表示不过滤）
+    def _search_ex(self, node, rect, stats, mask):
+        if stats is not None:
+            stats.nodes_visited += 1
+            if node.leaf:
+                stats.entries_tested += len(node.children)
+
+        result = []
+        for i, (child_or_data, child_rect) in enumerate(node.children):
+            if not child_rect.intersect(rect):
+                continue
+            if node.leaf:
+                if mask is None or node.bits[i] & mask:
+                    result.append(child_or_data)
+            elif mask is None or child_or_data.cats & mask:
+                result.extend(self._search_ex(child_or_data, rect, stats, mask))
+        return result
+
+    # =====================================
+    # 聚合查询：计数 / 网格密度
+    # =====================================
+    def count(self, rect, categories=None):
+        """
+        与 len(search(rect, categories=...)) 结果相同，
+        但完全落在 rect 内的子树直接用节点计数，不再下钻
+        """
+        mask = self._category_mask(categories)
+        if mask == 0:
+            return 0
+
+        total = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            for i, (child_or_data, child_rect) in enumerate(node.children):
+                if not child_rect.intersect(rect):
+                    continue
+                if node.leaf:
+                    if mask is None or node.bits[i] & mask:
+                        total += 1
+                    continue
+                n = self._subtree_count(child_or_data, mask)
+                if n == 0:
+                    continue
+                if n is not None and rect.contains(child_rect):
+                    total += n
+                else:
+                    stack.append(child_or_data)
+        return total
+
+    def density(self, rect, nx, ny, categories=None):
+        """
+        把 rect 划成 nx × ny 的网格，统计每格内的条目数（按条目中心归格；
+        N 维树只按前两维分格）
+        输出：grid[iy][ix]
+        整个子树落在同一格内时直接累加节点计数，不再下钻
+        """
+        mask = self._category_mask(categories)
+        grid = [[0] * nx for _ in range(ny)]
+        if mask == 0:
+            return grid
+
+        w = (rect.xmax - rect.xmin) / nx
+        h = (rect.ymax - rect.ymin) / ny
+
+        def cell(x, y):
+            # 半开区间 [lo, hi)，最后一格包含右 / 上边界；范围外返回 None
+            if not (rect.xmin <= x <= rect.xmax and rect.ymin <= y <= rect.ymax):
+                return None
+            ix = min(int((x - rect.xmin) / w), nx - 1) if w > 0 else 0
+            iy = min(int((y - rect.ymin) / h), ny - 1) if h > 0 else 0
+            return ix, iy
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            for i, (child_or_data, child_rect) in enumerate(node.children):
+                if not child_rect.intersect(rect):
+                    continue
+                if node.leaf:
+                    if mask is not None and not node.bits[i] & mask:
+                        continue
+                    c = cell(*child_rect.center()[:2])
+                    if c is not None:
+                        grid[c[1]][c[0]] += 1
+                    continue
+                n = self._subtree_count(child_or_data, mask)
+                if n == 0:
+                    continue
+                lo = cell(child_rect.xmin, child_rect.ymin)
+                if n is not None and lo is not None and lo == cell(child_rect.xmax, child_rect.ymax):
+                    grid[lo[1]][lo[0]] += n
+                else:
+                    stack.append(child_or_data)
+        return grid
+
+    # 子树中满足类别条件的条目数；无法直接得出时返回 None（需要下钻）
+    def _subtree_count(self, node, mask):
+        if mask is None:
+            return node.count
+        if not node.cats & mask:
+            return 0
+        if node.cat_counts is None:
+            return None
+        return sum(c for idx, c in node.cat_counts.items() if mask >> idx & 1)
+
+    # =====================================
+    # k 近邻（best-first，按平面欧氏距离）
+    # =====================================
+    def nearest(self, point, k=1, categories=None, stats=None):
+        """
+        point: (x, y) 平面坐标（N 维树则为 N 个坐标）
+        输出：[(data, 距离), ...]，按距离升序，最多 k 个
+        categories: 可选，只找这些类别的数据（跳过不含该类别的子树）
+        """
+        mask = self._category_mask(categories)
+        if mask == 0 or not self.root.children:
+            return []
+
+        target = Rect.from_point(point)
+        heap = [(0.0, 0, False, self.root)]
+        counter = 1
+        result = []
+
+        while heap and len(result) < k:
+            dist, _, is_data, item = heapq.heappop(heap)
+            if is_data:
+                result.append((item, dist))
+                continue
+
+            if stats is not None:
+                stats.nodes_visited += 1
+                if item.leaf:
+                    stats.entries_tested += len(item.children)
+
+            for i, (child_or_data, child_rect) in enumerate(item.children):
+                if item.leaf:
+                    if mask is not None and not item.bits[i] & mask:
+                        continue
+                elif mask is not None and not child_or_data.cats & mask:
+                    continue
+                heapq.heappush(heap, (child_rect.min_dist(target), counter,
+                                      item.leaf, child_or_data))
+                counter += 1
+
+        if stats is not None:
+            stats.returned += len(result)
+        return result
     
+    # =====================================
+    # 任意区域查询（多边形 / 走廊等）
+    # =====================================
+    def search_region(self, region, stats=None):
+        """
+        region 需要提供 classify(rect) → OUTSIDE / PARTIAL / INSIDE
+        输出：
+            inside : 一定落在区域内的叶子条目 [(data, rect), ...]
+                     （来自 INSIDE 子树，不再逐点测试）
+            partial: 需要精确判断的叶子条目 [(data, rect), ...]
+        """
+        inside = []
+        partial = []
+        stack = [self.root]
+
+        while stack:
+            node = stack.pop()
+            if stats is not None:
+                stats.nodes_visited += 1
+
+            for child_or_data, child_rect in node.children:
+                if node.leaf:
+                    partial.append((child_or_data, child_rect))
+                    continue
+                relation = region.classify(child_rect)
+                if relation == OUTSIDE:
+                    continue
+                if relation == INSIDE:
+                    self._collect_all(child_or_data, inside)
+                else:
+                    stack.append(child_or_data)
+
+        return inside, partial
+
+    # 收集子树中的全部叶子条目 (data, rect)
+    def _collect_all(self, node, out):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.leaf:
+                out.extend(node.children)
+            else:
+                stack.extend(child for child, _ in node.children)
+
     # =====================================
     # 采集所有 MBR（用于可视化）
     # =====================================
-    def collect_mbrs(self, node=None):
+    def collect_mbrs(self, node=None, levels=None, depth=0):
+        """
+        levels 不为 None 时，额外按层记录 (node, mbr)：
+            levels[depth] = [(node, rect), ...]   # depth=0 为根
+        """
         if node is None:
             node = self.root
 
-        rects = [self._calc_rect(node)]
+        rect = self._calc_rect(node)
+        rects = [rect]
+
+        if levels is not None:
+            levels.setdefault(depth, []).append((node, rect))
 
         if not node.leaf:
             for child_node, rect in node.children:
-                rects.extend(self.collect_mbrs(child_node))
+                rects.extend(self.collect_mbrs(child_node, levels, depth + 1))
 
         return rects
+
+    # =====================================
+    # 树质量统计
+    # =====================================
+    def stats(self):
+        """
+        输出：
+        {
+            "height": 树高（根到叶的层数）,
+            "entries": 数据条目总数,
+            "levels": [
+                {"level", "nodes", "fill_factor", "area", "overlap"}, ...
+            ]   # level=0 为根
+        }
+        fill_factor = 该层平均子项数 / M
+        area        = 该层所有节点 MBR 面积之和
+        overlap     = 该层节点 MBR 两两相交面积之和
+        """
+        if not self.root.children:
+            return {"height": 1, "entries": 0, "levels": []}
+
+        levels = {}
+        self.collect_mbrs(levels=levels)
+
+        result = []
+        entries = 0
+        for depth in sorted(levels):
+            items = levels[depth]
+            n_children = sum(len(node.children) for node, _ in items)
+            if items[0][0].leaf:
+                entries += n_children
+            result.append({
+                "level": depth,
+                "nodes": len(items),
+                "fill_factor": n_children / (len(items) * self.M),
+                "area": sum(rect.area() for _, rect in items),
+                "overlap": self._level_overlap([rect for _, rect in items]),
+            })
+
+        return {"height": len(result), "entries": entries, "levels": result}
+
+    # 同一层 MBR 的两两重叠面积（按 xmin 排序后扫描，跳过 x 方向不相交的对）
+    def _level_overlap(self, rects):
+        rects = sorted(rects, key=lambda r: r.xmin)
+        total = 0.0
+        for i, a in enumerate(rects):
+            for b in rects[i + 1:]:
+                if b.xmin >= a.xmax:
+                    break
+                total += a.overlap(b)
+        return total
     
      # ============================================================
     # ✅ R-Tree 范围查询（给 search_nearby 使用）
     #    输入：lat_min, lon_min, lat_max, lon_max
     #    输出：所有落在范围内的 POI（data 字典）
     # ============================================================
-    def range_query(self, lat_min, lon_min, lat_max, lon_max):
-        result = []
+    def range_query(self, lat_min, lon_min, lat_max, lon_max, stats=None, categories=None):
+        return list(self.iter_range(lat_min, lon_min, lat_max, lon_max,
+                                    stats=stats, categories=categories))
+
+    # ============================================================
+    # ✅ 惰性版本：逐个 yield 落在经纬度范围内的 POI
+    # ============================================================
+    def iter_range(self, lat_min, lon_min, lat_max, lon_max,
+                   limit=None, predicate=None, categories=None, stats=None):
+        if self.projection is not None:
+            # 投影是线性的：经纬度矩形 ↔ 平面矩形，直接走平面查询
+            # （平面框向外留一点浮点余量，边界上的点再用经纬度精确判断）
+            xmin, ymin, xmax, ymax = self.projection.box_xy(lat_min, lon_min, lat_max, lon_max)
+            pad = 1e-6
+            rect = Rect(xmin - pad, ymin - pad, xmax + pad, ymax + pad)
+
+            def inside(data):
+                return (lat_min <= data["lat"] <= lat_max and lon_min <= data["lon"] <= lon_max
+                        and (predicate is None or predicate(data)))
+
+            yield from self.iter_search(rect, limit=limit, predicate=inside,
+                                        categories=categories, stats=stats)
+            return
+
+        # ---------- 没有投影信息：逐节点从 POI 计算经纬度 MBR ----------
+        mask = self._category_mask(categories)
+        if mask == 0 or limit == 0:
+            return
+
+        found = 0
         stack = [self.root]
 
         while stack:
             node = stack.pop()
+            if stats is not None:
+                stats.nodes_visited += 1
 
-            # ==============================================
-            # ✅ 动态计算当前节点的经纬度 MBR
-            #    不依赖 node.bounds_latlon，安全稳定
-            # ==============================================
-            if node.leaf:
-                lats = [data["lat"] for (data, _) in node.children]
-                lons = [data["lon"] for (data, _) in node.children]
-            else:
-                lats = []
-                lons = []
-                for (child, _) in node.children:
-                    # 叶子节点：直接从 POI 提取
-                    if child.leaf:
-                        lats.extend([d["lat"] for (d, _) in child.children])
-                        lons.extend([d["lon"] for (d, _) in child.children])
-                    else:
-                        # 非叶：继续往下收集
-                        for (cc, _) in child.children:
-                            if cc.leaf:
-                                lats.extend([d["lat"] for (d, _) in cc.children])
-                                lons.extend([d["lon"] for (d, _) in cc.children])
-
-            if not lats:  # 空节点
+            bounds = self._latlon_bounds(node)
+            if bounds is None:  # 空节点
                 continue
 
-            ns, nw, nn, ne = min(lats), min(lons), max(lats), max(lons)
+            ns, nw, nn, ne = bounds
 
             # ==============================================
             # ✅ 若当前节点 MBR 与查询区域不相交 → 跳过
@@ -182,15 +692,53 @@ class RTree:
             # ✅ 叶节点：检查每个 POI
             # ==============================================
             if node.leaf:
-                for (data, _) in node.children:
-                    if lat_min <= data["lat"] <= lat_max and lon_min <= data["lon"] <= lon_max:
-                        result.append(data)
+                for (data, _), bit in zip(node.children, node.bits):
+                    if stats is not None:
+                        stats.entries_tested += 1
+                    if mask is not None and not bit & mask:
+                        continue
+                    if not (lat_min <= data["lat"] <= lat_max and lon_min <= data["lon"] <= lon_max):
+                        continue
+                    if predicate is not None and not predicate(data):
+                        continue
+                    if stats is not None:
+                        stats.returned += 1
+                    yield data
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
                 continue
 
             # ==============================================
-            # ✅ 非叶节点：继续下钻
+            # ✅ 非叶节点：继续下钻（跳过不含目标类别的子树）
             # ==============================================
             for (child, _) in node.children:
-                stack.append(child)
+                if mask is None or child.cats & mask:
+                    stack.append(child)
 
-        return result
+    # ==============================================
+    # ✅ 动态计算节点的经纬度 MBR（南、西、北、东）
+    #    不依赖 node.bounds_latlon，安全稳定
+    # ==============================================
+    def _latlon_bounds(self, node):
+        if node.leaf:
+            lats = [data["lat"] for (data, _) in node.children]
+            lons = [data["lon"] for (data, _) in node.children]
+        else:
+            lats = []
+            lons = []
+            for (child, _) in node.children:
+                # 叶子节点：直接从 POI 提取
+                if child.leaf:
+                    lats.extend([d["lat"] for (d, _) in child.children])
+                    lons.extend([d["lon"] for (d, _) in child.children])
+                else:
+                    # 非叶：继续往下收集
+                    for (cc, _) in child.children:
+                        if cc.leaf:
+                            lats.extend([d["lat"] for (d, _) in cc.children])
+                            lons.extend([d["lon"] for (d, _) in cc.children])
+
+        if not lats:
+            return None
+        return min(lats), min(lons), max(lats), max(lons)
@@ -0,0 +1,35 @@
+class QueryStats:
+    """
+    查询统计钩子（可选）
+    -------------------------------------
+    把它传给 RTree.search / RTree.range_query 的 stats 参数即可计数；
+    同一个对象可以跨多次查询累加。
+
+    nodes_visited  : 访问过的节点数
+    entries_tested : 在叶子节点中逐个测试过的条目数
+    returned       : 最终返回的条目数
+    """
+
+    def __init__(self):
+        self.nodes_visited = 0
+        self.entries_tested = 0
+        self.returned = 0
+
+    # 清零
+    def reset(self):
+        self.nodes_visited = 0
+        self.entries_tested = 0
+        self.returned = 0
+
+    # 转成字典（便于打印 / 写 JSON）
+    def as_dict(self):
+        return {
+            "nodes_visited": self.nodes_visited,
+            "entries_tested": self.entries_tested,
+            "returned": self.returned,
+        }
+
+    # 打印
+    def __repr__(self):
+        return (f"QueryStats(nodes_visited={self.nodes_visited}, "
+                f"entries_tested={self.entries_tested}, returned={self.returned})")
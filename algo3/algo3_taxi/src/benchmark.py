@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark.py
+DBSCAN 各引擎的耗时与正确性基准
+-------------------------------------
+数据集：
+    blobs     高斯团簇（每团约 1000 点，σ=400 m）+ 10% 均匀噪声
+    uniform   均匀分布
+    nyc       出租车样本（point_store，存在时）
+    合成数据的区域面积随 N 等比放大（密度不变），每个点的邻居数与 N 无关，
+    N = 10^3 ... 10^7 的耗时曲线只反映算法本身的伸缩性
+
+引擎：dbscan() 的 grid / naive / block / parallel / approx，以及 reachability.Reachability
+    O(N^2) 或纯 Python 的引擎只在 ENGINES 给出的规模上限内运行
+
+正确性：
+    与参照（block 引擎）的标签逐点比较（各精确引擎应完全相同）
+    近似引擎（approx）报告与参照的差异：ARI、落在被合并的簇里的点数、簇数变化
+    与 sklearn.cluster.DBSCAN 比较（已安装时）：
+        核心点集合必须完全相同；核心点上的划分 ARI 必须为 1
+        全体点的 ARI（边界点可能被分到相邻的另一个簇，sklearn 的归属规则不同）
+
+输出：
+    ../output/benchmark/benchmark.json      每次运行一条记录
+    ../output/benchmark/scaling.png         log-log 耗时曲线（每个数据集一张子图）
+
+例：python benchmark.py --max-n 1000000
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from dbscan import dbscan
+from dbscan_block import _neighbor_counts
+from grid_index import GridIndex
+from reachability import Reachability
+from utils import timer, report_at_exit
+
+
+OUT_DIR = Path("../output/benchmark")
+
+SIZES = [10 ** k for k in range(3, 8)]
+EPS = 300.0
+MIN_PTS = 20
+
+# sklearn 参照的规模上限（内存 ~ 全部邻居表）
+SKLEARN_MAX_N = 1_000_000
+
+
+# ============================================================
+# ✅ 引擎：名称 → (运行函数, 规模上限)
+# ============================================================
+def _reachability(X, eps, min_pts):
+    return Reachability(X, eps, min_pts).labels(eps)
+
+
+ENGINES = {
+    "naive": (lambda X, eps, m: dbscan(X, eps, m, engine="naive"), 20_000),
+    "grid": (lambda X, eps, m: dbscan(X, eps, m, engine="grid"), 200_000),
+    "block": (lambda X, eps, m: dbscan(X, eps, m, engine="block"), None),
+    "parallel": (lambda X, eps, m: dbscan(X, eps, m, engine="parallel"), None),
+    "reachability": (_reachability, 2_000_000),
+    "approx": (lambda X, eps, m, rho: dbscan(X, eps, m, engine="approx", rho=rho), None),
+}
+
+# 精确引擎的参照
+REFERENCE = "block"
+
+# 近似引擎（多一个 rho 参数；不要求与参照相同，只报告差异）及默认精度
+APPROXIMATE = {"approx"}
+RHO = 0.1
+
+
+# ============================================================
+# ✅ 数据集
+# ============================================================
+def blobs(n, rng):
+    # 区域边长按 sqrt(N) 放大：1e5 点约 40 km × 40 km
+    side = 40_000.0 * np.sqrt(n / 1e5)
+    n_noise = n // 10
+    n_blob = n - n_noise
+    k = max(1, n_blob // 1000)
+    centers = rng.uniform(0, side, (k, 2))
+    X = centers[rng.integers(0, k, n_blob)] + rng.normal(0, 400.0, (n_blob, 2))
+    return np.vstack([X, rng.uniform(0, side, (n_noise, 2))])
+
+
+def uniform(n, rng):
+    side = 40_000.0 * np.sqrt(n / 1e5)
+    return rng.uniform(0, side, (n, 2))
+
+
+def nyc():
+    try:
+        from point_store import load_points
+        return np.asarray(load_points("x", "y"), dtype=float)
+    except (FileNotFoundError, OSError):
+        return None
+
+
+def datasets(sizes, seed=0):
+    rng = np.random.default_rng(seed)
+    for n in sizes:
+        yield "blobs", n, blobs(n, rng)
+        yield "uniform", n, uniform(n, rng)
+    X = nyc()
+    if X is not None:
+        yield "nyc", len(X), X
+
+
+# ============================================================
+# ✅ 正确性
+# ============================================================
+def adjusted_rand(a, b):
+    """
+    调整兰德指数（与 sklearn.metrics.adjusted_rand_score 相同，噪声 -1 视为一个类）
+    """
+    _, ia = np.unique(a, return_inverse=True)
+    _, ib = np.unique(b, return_inverse=True)
+    _, nij = np.unique(np.stack([ia.ravel(), ib.ravel()]), axis=1, return_counts=True)
+    comb = lambda x: (x * (x - 1) / 2).sum()
+    sum_ij = comb(nij.astype(float))
+    sum_a = comb(np.bincount(ia.ravel()).astype(float))
+    sum_b = comb(np.bincount(ib.ravel()).astype(float))
+    expected = sum_a * sum_b / comb(np.array([float(len(a))]))
+    top = (sum_a + sum_b) / 2
+    if top == expected:
+        return 1.0
+    return float((sum_ij - expected) / (top - expected))
+
+
+def approx_diff(labels, ref):
+    """
+    近似结果与精确结果的差异
+    """
+    # 近似结果只会合并精确的簇：统计落在“含多个精确簇的近似簇”里的点
+    m = (labels >= 0) & (ref >= 0)
+    pairs = np.unique(np.stack([labels[m], ref[m]]), axis=1)
+    parts = np.bincount(pairs[0], minlength=labels.max() + 1)
+    return {
+        "same_labels": bool(np.array_equal(labels, ref)),
+        "ari_reference": adjusted_rand(ref, labels),
+        "points_in_merged": int((parts[labels[labels >= 0]] > 1).sum()),
+        "noise_equal": bool(np.array_equal(labels == -1, ref == -1)),
+        "cluster_delta": int(labels.max() - ref.max()) if len(ref) else 0,
+    }
+
+
+def core_mask(X, eps, min_pts):
+    index = GridIndex(X, eps)
+    mask = np.zeros(len(X), dtype=bool)
+    mask[index.order[_neighbor_counts(index) >= min_pts]] = True
+    return mask
+
+
+def sklearn_check(X, labels, core, eps, min_pts):
+    """
+    与 sklearn.cluster.DBSCAN 比较；未安装时返回 None
+    """
+    try:
+        from sklearn.cluster import DBSCAN
+        from sklearn.metrics import adjusted_rand_score
+    except ImportError:
+        return None
+
+    t0 = time.perf_counter()
+    ref = DBSCAN(eps=eps, min_samples=min_pts).fit(X)
+    seconds = time.perf_counter() - t0
+
+    sk_core = np.zeros(len(X), dtype=bool)
+    sk_core[ref.core_sample_indices_] = True
+    return {
+        "seconds": round(seconds, 4),
+        "core_equal": bool(np.array_equal(core, sk_core)),
+        "ari_core": float(adjusted_rand_score(ref.labels_[core], labels[core])) if core.any() else 1.0,
+        "ari_all": float(adjusted_rand_score(ref.labels_, labels)),
+    }
+
+
+# ============================================================
+# ✅ 运行
+# ============================================================
+def run(sizes, engines, eps=EPS, min_pts=MIN_PTS, rho=RHO, use_sklearn=True):
+    results = []
+    for name, n, X in datasets(sizes):
+        print(f"\n📦 {name}  N={n:,}")
+        row = {"dataset": name, "n": n, "eps": eps, "min_pts": min_pts, "rho": rho, "engines": {}}
+        ref = None
+
+        for engine in [REFERENCE] + [e for e in engines if e != REFERENCE]:
+            fn, limit = ENGINES[engine]
+            if limit is not None and n > limit:
+                continue
+            with timer(f"{name} {engine}") as phase:
+                before = phase.seconds
+                labels = fn(X, eps, min_pts, rho) if engine in APPROXIMATE else fn(X, eps, min_pts)
+            rec = {"seconds": round(phase.seconds - before, 4),
+                   "clusters": int(labels.max() + 1) if len(labels) else 0,
+                   "noise": int((labels == -1).sum())}
+            if ref is None:
+                ref = labels
+            elif engine in APPROXIMATE:
+                rec.update(approx_diff(labels, ref))
+            else:
+                rec["matches_reference"] = bool(np.array_equal(labels, ref))
+            row["engines"][engine] = rec
+
+            if "ari_reference" in rec:
+                note = (f"  ≈ ARI={rec['ari_reference']:.4f}，{rec['points_in_merged']} 点在合并的簇里，"
+                        f"簇数 {rec['cluster_delta']:+d}")
+            elif "matches_reference" in rec:
+                note = "  ✅" if rec["matches_reference"] else "  ❌ 与参照不一致"
+            else:
+                note = ""
+            print(f"   {engine:>13}: {rec['seconds']:.3f}s{note}")
+
+        if use_sklearn and n <= SKLEARN_MAX_N:
+            check = sklearn_check(X, ref, core_mask(X, eps, min_pts), eps, min_pts)
+            if check is None:
+                print("   ⚠️ 未安装 scikit-learn，跳过与 sklearn 的比较")
+                use_sklearn = False
+            else:
+                row["sklearn"] = check
+                ok = check["core_equal"] and check["ari_core"] == 1.0
+                print(f"   sklearn: {check['seconds']:.3f}s  核心点{'一致' if check['core_equal'] else '不一致'}"
+                      f"  ARI(核心)={check['ari_core']:.4f}  ARI(全部)={check['ari_all']:.4f}"
+                      f"  {'✅' if ok else '❌'}")
+        results.append(row)
+    return results
+
+
+def plot_scaling(results, path):
+    import matplotlib.pyplot as plt
+
+    names = [d for d in ("blobs", "uniform") if any(r["dataset"] == d for r in results)]
+    if not names:
+        return
+    fig, axes = plt.subplots(1, len(names), figsize=(6 * len(names), 5), squeeze=False)
+    for ax, name in zip(axes[0], names):
+        rows = [r for r in results if r["dataset"] == name]
+        engines = sorted({e for r in rows for e in r["engines"]})
+        for engine in engines:
+            pts = [(r["n"], r["engines"][engine]["seconds"]) for r in rows if engine in r["engines"]]
+            ax.loglog(*zip(*pts), marker="o", label=engine)
+        sk = [(r["n"], r["sklearn"]["seconds"]) for r in rows if "sklearn" in r]
+        if sk:
+            ax.loglog(*zip(*sk), marker="x", linestyle="--", color="k", label="sklearn")
+        ax.set_title(name)
+        ax.set_xlabel("N")
+        ax.set_ylabel("seconds")
+        ax.grid(True, which="both", alpha=0.3)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=150)
+    print(f"📈 耗时曲线 → {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DBSCAN 引擎基准")
+    parser.add_argument("--max-n", type=float, default=SIZES[-1], help="合成数据的最大点数")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--eps", type=float, default=EPS)
+    parser.add_argument("--min-pts", type=int, default=MIN_PTS)
+    parser.add_argument("--rho", type=float, default=RHO, help="approx 引擎的近似精度")
+    parser.add_argument("--no-sklearn", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [n for n in SIZES if n <= args.max_n]
+    results = run(sizes, args.engines, args.eps, args.min_pts, args.rho, not args.no_sklearn)
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    out = OUT_DIR / "benchmark.json"
+    out.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n🎯 结果 → {out}")
+
+    try:
+        plot_scaling(results, OUT_DIR / "scaling.png")
+    except ImportError:
+        print("⚠️ 未安装 matplotlib，跳过耗时曲线")
+
+
+if __name__ == "__main__":
+    report_at_exit()
+    main()
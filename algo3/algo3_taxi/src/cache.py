@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+cache.py
+run_* 脚本共享的 DBSCAN 结果缓存（按内容寻址）
+-------------------------------------
+labels 缓存：
+    键 = sha256(数据文件内容的 sha256, eps, min_pts, ALGO_VERSION)
+    ../data/cache/labels/<键>.npy
+邻居图缓存（同一数据、同一 eps，min_pts 换了也不必重算距离）：
+    键 = sha256(数据文件内容的 sha256, eps, ALGO_VERSION)
+    ../data/cache/graph/<键>/indptr.npy, indices.npy
+    CSR 结构，只存 i < j 的点对（第 i 行为 i 的较大下标邻居）
+
+按数组内容的 labels 缓存（时间窗等由内存中的子集聚类时）：
+    键 = sha256(数组字节的 sha256, eps, min_pts, 引擎[, rho], ALGO_VERSION)
+    （approx 的结果与精确引擎不同，各引擎的条目互不复用）
+    不分组时与上面共用 labels 目录，条目不会自动清理（缓存随不同的输入无限增长，
+    需要时手动删除 ../data/cache）
+    分组时（group=名称）写入 ../data/cache/groups/<名称>/<键>.npy，
+    调用方跑完一轮后用 prune_group(名称, 本轮用到的键) 删掉其余条目，
+    组内只保留最近一轮的结果（time_slices 每种 by 一组）
+
+用法：
+    labels = cached_dbscan(STORE_PATH, eps, min_pts, X=X)
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from dbscan import dbscan
+from grid_index import GridIndex
+from dbscan_block import _neighbor_pairs, _find, _union_edges, _assign_labels
+from utils import timer
+
+
+CACHE_DIR = Path("../data/cache")
+
+# 聚类结果的语义一旦变化（标签编号规则等）就加 1，让旧缓存全部失效
+ALGO_VERSION = 1
+
+# 进程内记住已算过的文件摘要：(路径, 大小, 修改时间) → sha256
+_digests = {}
+
+
+# ============================================================
+# ✅ 键
+# ============================================================
+def file_digest(path):
+    path = Path(path)
+    st = path.stat()
+    memo = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    if memo not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _digests[memo] = h.hexdigest()
+    return _digests[memo]
+
+
+def _key(*parts):
+    return hashlib.sha256("|".join(map(repr, parts)).encode()).hexdigest()
+
+
+def labels_key(data_path, eps, min_pts):
+    return _key(file_digest(data_path), float(eps), int(min_pts), ALGO_VERSION)
+
+
+def graph_key(data_path, eps):
+    return _key(file_digest(data_path), float(eps), ALGO_VERSION)
+
+
+def array_key(X, eps, min_pts, engine="block", rho=0.1):
+    X = np.ascontiguousarray(X)
+    digest = hashlib.sha256(str((X.dtype.str, X.shape)).encode() + X.tobytes()).hexdigest()
+    # rho 只影响近似引擎
+    variant = (engine, float(rho)) if engine == "approx" else (engine,)
+    return _key(digest, float(eps), int(min_pts), *variant, ALGO_VERSION)
+
+
+def _load_xy(data_path):
+    # 前两列为平面坐标（pickups_sample.npy 或 point_store 的 x, y, lon, lat）
+    return np.asarray(np.load(data_path, mmap_mode="r")[:, :2], dtype=float)
+
+
+def _save(path, arr):
+    # 先写临时文件再改名：中断时不会留下半个缓存文件
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.stem + f".{os.getpid()}.tmp.npy")
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+# ============================================================
+# ✅ 邻居图
+# ============================================================
+def build_graph(X, eps):
+    """
+    输出：indptr (N+1,), indices (M,)：所有 i < j 且距离 <= eps 的点对
+    """
+    X = np.asarray(X, dtype=float)
+    n = len(X)
+    index = GridIndex(X, eps)
+    order = index.order
+
+    rows, cols = [], []
+    for pi, pj, same in _neighbor_pairs(index):
+        i, j = order[pi], order[pj]
+        keep = i < j
+        rows.append(i[keep])
+        cols.append(j[keep])
+        if not same:
+            keep = j < i
+            rows.append(j[keep])
+            cols.append(i[keep])
+
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+    s = np.lexsort((cols, rows))
+    dtype = np.int32 if n < 2 ** 31 else np.int64
+    indptr = np.searchsorted(rows[s], np.arange(n + 1)).astype(np.int64)
+    return indptr, cols[s].astype(dtype)
+
+
+def labels_from_graph(indptr, indices, min_pts):
+    """
+    由缓存的邻居图得到 DBSCAN 标签（与 dbscan.dbscan 相同，无需再算距离）
+    """
+    n = len(indptr) - 1
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    cols = np.asarray(indices, dtype=np.int64)
+
+    # 邻居数含自身
+    counts = 1 + np.bincount(rows, minlength=n) + np.bincount(cols, minlength=n)
+    core = counts >= min_pts
+
+    parent = np.arange(n)
+    both = core[rows] & core[cols]
+    _union_edges(parent, rows[both], cols[both])
+
+    m1 = ~core[rows] & core[cols]
+    m2 = core[rows] & ~core[cols]
+    border_pts = np.concatenate([rows[m1], cols[m2]])
+    border_cores = np.concatenate([cols[m1], rows[m2]])
+
+    core_idx = np.flatnonzero(core)
+    return _assign_labels(n, core_idx, _find(parent, core_idx),
+                          border_pts, _find(parent, border_cores))
+
+
+def cached_graph(data_path, eps, X=None):
+    """
+    读取（或计算并写入）邻居图缓存，数组以 memory-map 方式打开
+    """
+    d = CACHE_DIR / "graph" / graph_key(data_path, eps)
+    if not (d / "indices.npy").exists():
+        if X is None:
+            X = _load_xy(data_path)
+        with timer("构建邻居图"):
+            indptr, indices = build_graph(X, eps)
+        _save(d / "indptr.npy", indptr)
+        _save(d / "indices.npy", indices)
+    return np.load(d / "indptr.npy", mmap_mode="r"), np.load(d / "indices.npy", mmap_mode="r")
+
+
+# ============================================================
+# ✅ 带缓存的 DBSCAN
+# ============================================================
+def cached_dbscan(data_path, eps, min_pts, X=None, graph=True):
+    """
+    data_path: 点集 .npy 文件（缓存键取其内容摘要）
+    X: 已加载的点集（可选，省去再读一次）
+    graph: True 时经由邻居图计算并缓存（以后换 min_pts 不必重算距离）
+           False 时直接用 block 引擎计算，只缓存标签
+    返回：labels (N,)
+    """
+    path = CACHE_DIR / "labels" / f"{labels_key(data_path, eps, min_pts)}.npy"
+    if path.exists():
+        print(f"♻️  使用缓存标签: {path.name[:12]}…")
+        return np.load(path)
+
+    if graph:
+        indptr, indices = cached_graph(data_path, eps, X)
+        with timer("由邻居图求标签"):
+            labels = labels_from_graph(indptr, indices, min_pts)
+    else:
+        labels = dbscan(_load_xy(data_path) if X is None else X, eps, min_pts, engine="block")
+
+    _save(path, labels)
+    return labels
+
+
+def cached_array_dbscan(X, eps, min_pts, engine="block", rho=0.1, group=None, key=None):
+    """
+    按数组内容缓存的 DBSCAN；返回 (labels, 是否命中缓存)
+    engine / rho: 同 dbscan.dbscan（都计入缓存键）
+    group: 可选，缓存分组名（见 prune_group）
+    key  : 可选，已算好的 array_key(X, eps, min_pts, engine, rho)
+    """
+    key = key or array_key(X, eps, min_pts, engine, rho)
+    folder = CACHE_DIR / "labels" if group is None else CACHE_DIR / "groups" / group
+    path = folder / f"{key}.npy"
+    if path.exists():
+        return np.load(path), True
+    labels = dbscan(X, eps, min_pts, engine=engine, rho=rho)
+    _save(path, labels)
+    return labels, False
+
+
+def prune_group(group, keep):
+    """
+    删除分组中键不在 keep 里的缓存条目；返回删除的个数
+    """
+    folder = CACHE_DIR / "groups" / group
+    if not folder.is_dir():
+        return 0
+    keep = set(keep)
+    removed = 0
+    for path in folder.glob("*.npy"):
+        if path.stem not in keep:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
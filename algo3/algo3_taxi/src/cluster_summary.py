@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+cluster_summary.py
+按簇汇总（质心、点数、凸包）与噪声分箱，供地图按簇绘制
+-------------------------------------
+全部按簇向量化计算，输出大小只与簇数 / 分箱数有关，与点数无关：
+    centroids / counts   np.bincount 一次求出
+    凸包                 Akl–Toussaint 预过滤：每个簇取 8 个方向的极值点组成八边形，
+                         严格落在八边形内部的点不可能在凸包上，整体一次性丢掉；
+                         剩下的少量点按 (簇, x, y) 排序后逐簇做 Andrew 单调链
+    噪声                 落到固定大小的经纬度格子里计数（np.unique）
+
+例：
+    s = summarize(LL, labels)
+    s.hulls[k]          第 k 个簇的凸包顶点（逆时针，(m,2)）
+    bin_noise(LL[labels == -1], 0.002)
+"""
+
+import numpy as np
+
+
+# Akl–Toussaint 的 8 个方向（按角度逆时针排列，极值点也就按凸包顺序排列）
+_DIRECTIONS = np.array([[1, 0], [1, 1], [0, 1], [-1, 1],
+                        [-1, 0], [-1, -1], [0, -1], [1, -1]], dtype=float)
+
+
+# ============================================================
+# ✅ Akl–Toussaint 预过滤
+# ============================================================
+def _extremes(P, lab, k):
+    """
+    每个簇在各方向上投影最大的点（同值取下标最小者）
+    返回：(k, 8) 点下标
+    """
+    n = len(P)
+    ext = np.empty((k, len(_DIRECTIONS)), dtype=np.int64)
+    for j, d in enumerate(_DIRECTIONS):
+        proj = P @ d
+        best = np.full(k, -np.inf)
+        np.maximum.at(best, lab, proj)
+        idx = np.full(k, n)
+        hit = proj == best[lab]
+        np.minimum.at(idx, lab[hit], np.flatnonzero(hit))
+        ext[:, j] = idx
+    return ext
+
+
+def _hull_candidates(P, lab, k):
+    """
+    丢掉严格位于所在簇极值八边形内部的点，返回可能在凸包上的点的掩码
+    """
+    ext = _extremes(P, lab, k)
+    inside = np.ones(len(P), dtype=bool)
+    proper = np.zeros(len(P), dtype=bool)     # 至少有一条非退化边
+    for j in range(len(_DIRECTIONS)):
+        a = P[ext[lab, j]]
+        b = P[ext[lab, (j + 1) % len(_DIRECTIONS)]]
+        e = b - a
+        cross = e[:, 0] * (P[:, 1] - a[:, 1]) - e[:, 1] * (P[:, 0] - a[:, 0])
+        degenerate = (e == 0).all(axis=1)
+        inside &= degenerate | (cross > 0)
+        proper |= ~degenerate
+    return ~(inside & proper)
+
+
+# ============================================================
+# ✅ Andrew 单调链
+# ============================================================
+def _cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def monotone_chain(pts):
+    """
+    输入：pts (m,2)，已按 (x, y) 升序
+    输出：凸包顶点（逆时针，不含共线点）
+    """
+    if len(pts) < 3:
+        return pts
+
+    def half(seq):
+        chain = []
+        for p in seq:
+            while len(chain) >= 2 and _cross(chain[-2], chain[-1], p) <= 0:
+                chain.pop()
+            chain.append(p)
+        return chain
+
+    pts = [tuple(p) for p in pts]
+    lower = half(pts)
+    upper = half(reversed(pts))
+    return np.array(lower[:-1] + upper[:-1])
+
+
+# ============================================================
+# ✅ 按簇汇总
+# ============================================================
+class ClusterSummary:
+    """
+    输入：P (N,2) 坐标（如 lon, lat），labels (N,) DBSCAN 标签（-1=噪声）
+    提供：
+        clusters     (K,) 簇编号（升序）
+        counts       (K,) 点数
+        centroids    (K,2) 质心
+        hulls        长度 K 的列表，每项为凸包顶点 (m,2)（逆时针；不足 3 点或共线时 m < 3）
+    """
+
+    def __init__(self, P, labels):
+        P = np.asarray(P, dtype=float)
+        labels = np.asarray(labels)
+
+        m = labels >= 0
+        P, lab = P[m], labels[m]
+        self.clusters, lab = np.unique(lab, return_inverse=True)
+        k = len(self.clusters)
+
+        self.counts = np.bincount(lab, minlength=k)
+        self.centroids = np.stack([np.bincount(lab, P[:, 0], minlength=k),
+                                   np.bincount(lab, P[:, 1], minlength=k)], axis=1)
+        self.centroids /= np.maximum(self.counts, 1)[:, None]
+
+        self.hulls = [np.empty((0, 2))] * k
+        if not k:
+            return
+
+        # 预过滤后按 (簇, x, y) 排序：每个簇的候选点连续且已按 x, y 有序
+        cand = np.flatnonzero(_hull_candidates(P, lab, k))
+        cand = cand[np.lexsort((P[cand, 1], P[cand, 0], lab[cand]))]
+        bounds = np.searchsorted(lab[cand], np.arange(k + 1))
+        for c in range(k):
+            pts = P[cand[bounds[c]:bounds[c + 1]]]
+            # 去掉重复点（单调链要求严格有序）
+            if len(pts) > 1:
+                pts = pts[np.r_[True, (np.diff(pts, axis=0) != 0).any(axis=1)]]
+            self.hulls[c] = monotone_chain(pts)
+
+    def __len__(self):
+        return len(self.clusters)
+
+
+def summarize(P, labels):
+    return ClusterSummary(P, labels)
+
+
+# ============================================================
+# ✅ 噪声分箱
+# ============================================================
+def bin_noise(P, size):
+    """
+    输入：P (M,2) 噪声点坐标，size 格子边长（与坐标同单位）
+    输出：centers (B,2) 非空格子的中心，counts (B,) 各格子的点数
+    """
+    P = np.asarray(P, dtype=float)
+    if not len(P):
+        return np.empty((0, 2)), np.empty(0, dtype=np.int64)
+    cells = np.floor(P / size).astype(np.int64)
+    keys, counts = np.unique(cells, axis=0, return_counts=True)
+    return (keys + 0.5) * size, counts
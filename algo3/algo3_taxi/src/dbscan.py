@@ -6,68 +6,123 @@ dbscan.py
 输入：二维点集 X（平面坐标，单位：米）
 输出：每个点的簇标签 labels（-1 表示噪声）
 
-注意：为便于理解，本版为 O(N^2) 的朴素实现
+engine：
+    "grid"   均匀网格索引（grid_index.GridIndex），每次只查 3×3 个格子（默认）
+    "naive"  朴素实现，每次查询扫描全部 N 个点，O(N^2)
+    "block"  分块向量化核心点检测 + 并查集（dbscan_block.dbscan_block）
+    "parallel" 按空间切条 + eps halo 的多进程版本（dbscan_parallel.dbscan_parallel）
+    "approx" ρ-近似网格算法（dbscan_approx.dbscan_approx），O(N) 期望时间
+以上精确引擎的输出标签完全相同；"approx" 的核心点相同，
+簇介于 eps 与 eps(1+rho) 下的精确结果之间
+
+串行引擎（grid / naive）向 utils 计数器报告：
+    region_queries     邻域查询次数
+    neighbors_scanned  查询返回的邻居总数
+    queue_pushes       入队的点数
 """
 
 import numpy as np
 from collections import deque
 
+from grid_index import GridIndex
+from dbscan_block import dbscan_block
+from dbscan_parallel import dbscan_parallel
+from dbscan_approx import dbscan_approx
+from utils import count
+
+
+# 可选引擎（命令行 --engine 的 choices）
+ENGINES = ("grid", "naive", "block", "parallel", "approx")
 
-def region_query(X, point_idx, eps):
+
+def region_query(X, point_idx, eps, index=None):
     """
     查找 eps 半径内的邻居
     X: (N,2) 点集
     point_idx: 当前点索引
     eps: 距离阈值（米）
+    index: 可选的 GridIndex（给出时只查 3×3 个格子）
     """
+    if index is not None:
+        return index.region_query(point_idx)
+
     diff = X - X[point_idx]  # shape: (N,2)
     dist_sq = np.einsum('ij,ij->i', diff, diff)  # L2 距离的平方
     return np.where(dist_sq <= eps * eps)[0]     # 返回索引列表
 
 
-def dbscan(X, eps, min_pts):
+def dbscan(X, eps, min_pts, engine="grid", rho=0.1):
     """
     执行 DBSCAN 聚类
     X: 数据点集 (N,2)
     eps: 邻域半径（米）
     min_pts: 最少核心点数量
+    engine: "grid" / "naive" / "block" / "parallel" / "approx"
+    rho: engine="approx" 时的近似精度
     返回：
         labels: (N,) 每个点所在簇的编号 (-1=噪声)
     """
+    if engine == "block":
+        return dbscan_block(X, eps, min_pts)
+    if engine == "parallel":
+        return dbscan_parallel(X, eps, min_pts)
+    if engine == "approx":
+        return dbscan_approx(X, eps, min_pts, rho)
+
     n = X.shape[0]
     labels = np.full(n, -1)  # 初始化全部为噪声
     visited = np.zeros(n, dtype=bool)
     cluster_id = 0
 
+    if engine == "grid":
+        index = GridIndex(X, eps)
+    elif engine == "naive":
+        index = None
+    else:
+        raise ValueError(f"unknown engine: {engine!r}")
+
+    # 计数器先在局部累加，结束时一次性报告
+    n_queries = n_scanned = n_pushes = 0
+
     for i in range(n):
         if visited[i]:
             continue
         
         visited[i] = True
-        neighbors = region_query(X, i, eps)
+        neighbors = region_query(X, i, eps, index)
+        n_queries += 1
+        n_scanned += neighbors.size
 
         # 小于 min_pts，暂定噪声
         if neighbors.size < min_pts:
             continue
 
         # 否则创建新簇
+        # 入队时即分配簇：已在本簇（或已属于更早的簇）的点不再重复入队
         labels[i] = cluster_id
+        neighbors = neighbors[labels[neighbors] == -1]
+        labels[neighbors] = cluster_id
         queue = deque(neighbors.tolist())
+        n_pushes += neighbors.size
 
         while queue:
             j = queue.popleft()
 
             if not visited[j]:
                 visited[j] = True
-                neighbors_j = region_query(X, j, eps)
+                neighbors_j = region_query(X, j, eps, index)
+                n_queries += 1
+                n_scanned += neighbors_j.size
                 if neighbors_j.size >= min_pts:
-                    # 核心点扩展
+                    # 核心点扩展：只加入尚未分配簇的点
+                    neighbors_j = neighbors_j[labels[neighbors_j] == -1]
+                    labels[neighbors_j] = cluster_id
                     queue.extend(neighbors_j.tolist())
-
-            # 未分配簇的点加入当前簇
-            if labels[j] == -1:
-                labels[j] = cluster_id
+                    n_pushes += neighbors_j.size
 
         cluster_id += 1
 
+    count("region_queries", n_queries)
+    count("neighbors_scanned", int(n_scanned))
+    count("queue_pushes", int(n_pushes))
     return labels
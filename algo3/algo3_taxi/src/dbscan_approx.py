@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+dbscan_approx.py
+ρ-近似 DBSCAN（Gan & Tao, SIGMOD 2015；engine="approx"）
+-------------------------------------
+网格边长 eps/√2：同一格子内任意两点距离 <= eps，
+一个点的 eps 邻居只可能在周围 5×5 个格子里
+1. 核心点（精确）：点数 >= min_pts 的格子里全部是核心点；
+   其余“稀疏格子”的点（每格 < min_pts 个）逐个与 5×5 邻域计数
+2. 核心格子之间的连边（近似）：每个格子再细分为 m×m 个子格（m = ceil(2/ρ)，
+   子格对角线 <= ρ·eps/2），只看含核心点的子格；
+   两个格子中存在中心距离 <= eps(1 + ρ/2) 的一对子格 → 连边
+       距离 <= eps 的核心点对一定会被连上（ρ-近似的下界）
+       连上的格子一定含有距离 <= eps(1 + ρ) 的核心点对（上界）
+   同一格子的核心点天然相连；格子并查集 → 簇
+3. 边界点（精确）：非核心点只在稀疏格子里，取 eps 内核心点所在簇中编号最小者
+
+结果夹在 DBSCAN(eps) 与 DBSCAN(eps(1+ρ)) 之间：核心点与 eps 下完全相同，
+只有本来相距 eps ~ eps(1+ρ) 的两个簇可能被合并。
+簇编号规则与 dbscan.dbscan 相同（簇内最小核心点下标升序）。
+
+每个格子的子格数 <= m²，每个稀疏格子的点数 < min_pts：
+固定 ρ、min_pts 时除排序外每一步都是 O(N)
+"""
+
+import math
+
+import numpy as np
+
+from dbscan_block import _find, _union_edges, _assign_labels
+
+
+# 每块最多处理的点对数量（控制内存）
+_BLOCK = 2_000_000
+
+# 5×5 邻域的格子偏移；_HALF 为其中一半（不含自身，每对格子只出现一次）
+_OFFSETS = [(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3)]
+_HALF = [(dx, dy) for dx, dy in _OFFSETS if dx > 0 or (dx == 0 and dy > 0)]
+
+
+# ============================================================
+# ✅ 区间对展开
+# ============================================================
+def _range_pairs(s1, l1, s2, l2):
+    """
+    第 k 对区间 [s1, s1+l1) × [s2, s2+l2) 的全部下标对，分块产出
+    产出：(k, ia, ib)
+    """
+    total = l1 * l2
+    cum = np.cumsum(total)
+    start = 0
+    while start < len(total):
+        base = cum[start - 1] if start else 0
+        stop = max(int(np.searchsorted(cum, base + _BLOCK, side="right")), start + 1)
+        t = total[start:stop]
+        k = np.repeat(np.arange(start, stop), t)
+        local = np.arange(int(t.sum())) - np.repeat(np.cumsum(t) - t, t)
+        yield k, s1[k] + local // l2[k], s2[k] + local % l2[k]
+        start = stop
+
+
+class _Cells:
+    """
+    按格子键排序的一组对象（点或子格）的 CSR 结构
+    keys (C,) 升序非空格子键，offsets (C+1,)
+    """
+
+    def __init__(self, keys_sorted):
+        self.keys, starts = np.unique(keys_sorted, return_index=True)
+        self.offsets = np.append(starts, len(keys_sorted)).astype(np.int64)
+
+    def ranges(self, query_keys):
+        # 每个查询键对应的 [start, len)；格子不存在时 len = 0
+        j = np.searchsorted(self.keys, query_keys)
+        jc = np.minimum(j, len(self.keys) - 1)
+        hit = (j < len(self.keys)) & (self.keys[jc] == query_keys)
+        start = self.offsets[jc]
+        return start, np.where(hit, self.offsets[jc + 1] - start, 0)
+
+
+def _neighbor_points(q, qkeys, cells, deltas):
+    """
+    查询对象 q（带格子键 qkeys）× 各偏移格子中的对象，分块产出 (q 的下标, 对象位置)
+    """
+    for d in deltas:
+        start, length = cells.ranges(qkeys + d)
+        m = length > 0
+        if not m.any():
+            continue
+        qs, st, ln = q[m], start[m], length[m]
+        for k, _, ib in _range_pairs(np.zeros(len(qs), dtype=np.int64),
+                                     np.ones(len(qs), dtype=np.int64), st, ln):
+            yield qs[k], ib
+
+
+# ============================================================
+# ✅ 主函数
+# ============================================================
+def dbscan_approx(X, eps, min_pts, rho=0.1):
+    """
+    X: 数据点集 (N,2)
+    eps: 邻域半径（米）
+    min_pts: 最少核心点数量
+    rho: 近似精度（> 0），越小越接近精确 DBSCAN，连边阶段越慢（约 1/ρ² 个子格 / 格子）
+    返回：labels (N,)（-1=噪声）
+    """
+    if eps <= 0:
+        raise ValueError("eps must be positive")
+    if rho <= 0:
+        raise ValueError("rho must be positive")
+    X = np.asarray(X, dtype=float)
+    n = len(X)
+    if n == 0:
+        return np.full(0, -1)
+
+    # 格子边长略小于 eps/√2：对角线不会因舍入超过 eps
+    side = eps / math.sqrt(2) * (1 - 1e-9)
+    origin = X.min(axis=0)
+    cells = np.floor((X - origin) / side).astype(np.int64) + 2
+    width = int(cells[:, 1].max()) + 3
+    keys = cells[:, 0] * width + cells[:, 1]
+    deltas = np.array([dx * width + dy for dx, dy in _OFFSETS])
+    half = np.array([dx * width + dy for dx, dy in _HALF])
+
+    order = np.argsort(keys, kind="stable")
+    skeys = keys[order]
+    Xs = X[order]
+    grid = _Cells(skeys)
+    eps_sq = eps * eps
+
+    # ------------------------------------------------------------
+    # 1) 核心点：稠密格子整体为核心；稀疏格子的点逐个计数（排序后的位置）
+    # ------------------------------------------------------------
+    size = np.diff(grid.offsets)
+    dense = np.repeat(size >= min_pts, size)
+    core = dense.copy()
+
+    sparse = np.flatnonzero(~dense)
+    counts = np.zeros(n, dtype=np.int64)
+    for pi, pj in _neighbor_points(sparse, skeys[sparse], grid, deltas):
+        d = Xs[pi] - Xs[pj]
+        near = np.einsum('ij,ij->i', d, d) <= eps_sq
+        counts += np.bincount(pi[near], minlength=n)
+    core[sparse] = counts[sparse] >= min_pts
+
+    core_pos = np.flatnonzero(core)
+    if not core_pos.size:
+        return np.full(n, -1)
+
+    # ------------------------------------------------------------
+    # 2) 核心格子的连边：含核心点的子格，中心距离 <= eps(1 + ρ/2)
+    # ------------------------------------------------------------
+    m = math.ceil(2 / rho)
+    sub = side / m
+    ccell = cells[order[core_pos]]
+    local = np.clip(np.floor((Xs[core_pos] - origin - (ccell - 2) * side) / sub), 0, m - 1)
+    sub_keys = (skeys[core_pos] * m + local[:, 0].astype(np.int64)) * m + local[:, 1].astype(np.int64)
+    sub_keys, first = np.unique(sub_keys, return_index=True)
+    sub_cell = skeys[core_pos][first]
+    centers = origin + (ccell[first] - 2) * side + (local[first] + 0.5) * sub
+
+    subs = _Cells(sub_cell)               # 核心格子 → 子格区间
+    ncell = len(subs.keys)
+    parent = np.arange(ncell)
+    thr_sq = (eps * (1 + rho / 2)) ** 2
+    s1, l1 = subs.offsets[:-1], np.diff(subs.offsets)
+
+    for d in half:
+        s2, l2 = subs.ranges(subs.keys + d)
+        a = np.flatnonzero(l2 > 0)
+        if not a.size:
+            continue
+        b = np.searchsorted(subs.keys, subs.keys[a] + d)
+        linked = np.zeros(len(a), dtype=bool)
+        for k, ia, ib in _range_pairs(s1[a], l1[a], s2[a], l2[a]):
+            diff = centers[ia] - centers[ib]
+            hit = np.einsum('ij,ij->i', diff, diff) <= thr_sq
+            linked[k[hit]] = True
+        _union_edges(parent, a[linked], b[linked])
+
+    # 簇的根 → 簇内最小核心点下标（与精确实现的编号规则一致）
+    core_orig = order[core_pos]
+    comp = _find(parent, np.searchsorted(subs.keys, skeys[core_pos]))
+    smallest = np.full(ncell, n)
+    np.minimum.at(smallest, comp, core_orig)
+    root_of = np.full(n, -1)
+    root_of[core_orig] = smallest[comp]
+
+    # ------------------------------------------------------------
+    # 3) 边界点：稀疏格子中的非核心点 × eps 内的核心点
+    # ------------------------------------------------------------
+    cores = _Cells(skeys[core_pos])
+    noncore = sparse[~core[sparse]]
+    border_pts, border_roots = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    for pi, cj in _neighbor_points(noncore, skeys[noncore], cores, deltas):
+        pj = core_pos[cj]
+        d = Xs[pi] - Xs[pj]
+        near = np.einsum('ij,ij->i', d, d) <= eps_sq
+        border_pts.append(order[pi[near]])
+        border_roots.append(root_of[order[pj[near]]])
+
+    core_idx = np.sort(core_orig)
+    return _assign_labels(n, core_idx, root_of[core_idx],
+                          np.concatenate(border_pts), np.concatenate(border_roots))
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+dbscan_block.py
+分块向量化的 DBSCAN（engine="block"）
+-------------------------------------
+不再逐点 region_query + 队列扩展，而是：
+1. 在 GridIndex 上枚举相邻格子对，把点对按块（每块至多 _BLOCK 对）用 NumPy 计算距离
+2. 第一遍：统计每个点的邻居数 → 一次性标出核心点
+3. 第二遍：核心点—核心点的边 → 向量化并查集合并成簇
+           非核心点—核心点的边 → 记录下来，最后一次性给边界点分配簇
+4. 簇编号按“簇内最小核心点下标”排序，边界点取相邻簇中编号最小者
+   —— 与 dbscan.dbscan 的串行实现输出完全相同的标签
+
+内存：每块的点对数受 _BLOCK 限制；边界边的数量不超过 边界点数 × min_pts
+"""
+
+import numpy as np
+
+from grid_index import GridIndex
+
+
+# 每块最多计算的点对数量（控制内存）
+_BLOCK = 2_000_000
+
+# 点对数不少于此值的格子对直接广播计算（省去扁平展开的下标运算）
+_DENSE = 4096
+
+# 半邻域：本格 + 右、左上、上、右上（另一半由对称性覆盖）
+_OFFSETS = ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+# ============================================================
+# ✅ 枚举相邻格子对
+# ============================================================
+def _cell_pairs(index):
+    """
+    对每个偏移量产出 (a_start, a_len, b_start, b_len, same)
+    start / len 为格子在排序后点数组中的区间，same 表示格子与自身配对
+    """
+    keys = index.cell_keys
+    starts = index.offsets[:-1]
+    sizes = np.diff(index.offsets)
+
+    for dx, dy in _OFFSETS:
+        target = keys + dy * index.width + dx
+        pos = np.minimum(np.searchsorted(keys, target), len(keys) - 1)
+        ok = keys[pos] == target
+        yield starts[ok], sizes[ok], starts[pos[ok]], sizes[pos[ok]], (dx, dy) == (0, 0)
+
+
+# ============================================================
+# ✅ 分块产出 eps 内的点对（排序后的位置）
+# ============================================================
+def _pair_blocks(index, a_start, a_len, b_start, b_len):
+    if len(a_start) == 0:
+        return
+
+    # 大格子按行切开，保证每片 ≤ _BLOCK 对
+    rows = np.maximum(1, _BLOCK // b_len)
+    pieces = -(-a_len // rows)
+    rep = np.repeat(np.arange(len(a_len)), pieces)
+    piece_no = np.arange(len(rep)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    a0 = a_start[rep] + piece_no * rows[rep]
+    al = np.minimum(rows[rep], a_start[rep] + a_len[rep] - a0)
+    b0 = b_start[rep]
+    bl = b_len[rep]
+
+    X = index.X_sorted
+    eps_sq = index.eps * index.eps
+    work = al * bl
+
+    # 大片：直接广播成 al × bl 的距离矩阵
+    for k in np.flatnonzero(work >= _DENSE):
+        xa = X[a0[k]:a0[k] + al[k]]
+        xb = X[b0[k]:b0[k] + bl[k]]
+        d = xa[:, None, :] - xb[None, :, :]
+        r, c = np.nonzero(np.einsum('ijk,ijk->ij', d, d) <= eps_sq)
+        yield a0[k] + r, b0[k] + c
+
+    # 小片：相邻的若干片展开成扁平点对，合成一块
+    small = work < _DENSE
+    a0, al, b0, bl, work = a0[small], al[small], b0[small], bl[small], work[small]
+    if len(work) == 0:
+        return
+    group = (np.cumsum(work) - 1) // _BLOCK
+    cuts = np.concatenate([[0], np.flatnonzero(np.diff(group)) + 1, [len(work)]])
+
+    for s, e in zip(cuts[:-1], cuts[1:]):
+        w = work[s:e]
+        pid = np.repeat(np.arange(e - s), w)
+        local = np.arange(w.sum()) - np.repeat(np.cumsum(w) - w, w)
+        pi = a0[s:e][pid] + local // bl[s:e][pid]
+        pj = b0[s:e][pid] + local % bl[s:e][pid]
+
+        diff = X[pi] - X[pj]
+        hit = np.einsum('ij,ij->i', diff, diff) <= eps_sq
+        yield pi[hit], pj[hit]
+
+
+def _neighbor_pairs(index):
+    """
+    产出 (pi, pj, same)：所有距离 ≤ eps 的点对（排序后的位置）
+    same=True 时为同格点对（有序对，两个方向各出现一次，含自身）
+    same=False 时为跨格点对（每个无序对只出现一次）
+    """
+    for a_start, a_len, b_start, b_len, same in _cell_pairs(index):
+        for pi, pj in _pair_blocks(index, a_start, a_len, b_start, b_len):
+            yield pi, pj, same
+
+
+# ============================================================
+# ✅ 向量化并查集
+# ============================================================
+def _find(parent, x):
+    # 指针跳跃直到到达根
+    r = parent[x]
+    while True:
+        rr = parent[r]
+        if np.array_equal(rr, r):
+            return r
+        r = rr
+
+
+def _compress(parent):
+    # 路径完全压缩：每个顶点直接指向根
+    while True:
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            return parent
+        parent = grand
+
+
+def _union_edges(parent, a, b):
+    # 总是把较大的根挂到较小的根下 → 根 = 连通分量中的最小下标
+    while a.size:
+        if a.size > len(parent):
+            # 边比顶点多：先整体压缩，一次查表即得根
+            parent[:] = _compress(parent)
+            ra, rb = parent[a], parent[b]
+        else:
+            ra, rb = _find(parent, a), _find(parent, b)
+        diff = ra != rb
+        if not diff.any():
+            return
+        a, b, ra, rb = a[diff], b[diff], ra[diff], rb[diff]
+        # 同一个根可能收到多个写入（冲突）：取最小者，其余的边下一轮再处理
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+
+
+# ============================================================
+# ✅ 两个阶段（并行版 dbscan_parallel 也复用）
+# ============================================================
+def _neighbor_counts(index):
+    """
+    每个点 eps 内的邻居数（含自身），按排序后的位置
+    """
+    n = len(index.order)
+    counts = np.zeros(n, dtype=np.int64)
+    for pi, pj, same in _neighbor_pairs(index):
+        counts += np.bincount(pi, minlength=n)
+        if not same:
+            counts += np.bincount(pj, minlength=n)
+    return counts
+
+
+def _link(index, core):
+    """
+    core: 排序后位置上的核心点标记
+    返回：
+        parent       并查集（原始下标），核心点连成的分量以最小下标为根
+        border_pts   非核心点（原始下标）
+        border_cores 与之相邻的核心点（原始下标），与 border_pts 一一对应
+    """
+    order = index.order
+    parent = np.arange(len(order))
+    border_pts, border_cores = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    for pi, pj, same in _neighbor_pairs(index):
+        ci, cj = core[pi], core[pj]
+        both = ci & cj & (pi != pj)
+        _union_edges(parent, order[pi[both]], order[pj[both]])
+
+        m = ~ci & cj
+        border_pts.append(order[pi[m]])
+        border_cores.append(order[pj[m]])
+        if not same:
+            m = ci & ~cj
+            border_pts.append(order[pj[m]])
+            border_cores.append(order[pi[m]])
+
+    return parent, np.concatenate(border_pts), np.concatenate(border_cores)
+
+
+def _assign_labels(n, core_idx, roots, border_pts, border_roots):
+    """
+    core_idx: 核心点（原始下标，升序）及其根 roots
+    border_pts / border_roots: 边界点及其相邻核心点的根
+    簇编号按根（= 簇内最小核心点下标）升序；边界点取相邻簇中编号最小者
+    """
+    labels = np.full(n, -1)
+    uniq, cluster = np.unique(roots, return_inverse=True)
+    labels[core_idx] = cluster
+
+    if border_pts.size:
+        border_label = np.full(n, n)
+        np.minimum.at(border_label, border_pts, np.searchsorted(uniq, border_roots))
+        has = border_label < n
+        labels[has] = border_label[has]
+
+    return labels
+
+
+# ============================================================
+# ✅ 主函数
+# ============================================================
+def dbscan_block(X, eps, min_pts):
+    """
+    X: 数据点集 (N,2)
+    eps: 邻域半径（米）
+    min_pts: 最少核心点数量
+    返回：labels (N,)（-1=噪声），与 dbscan.dbscan 相同
+    """
+    X = np.asarray(X, dtype=float)
+    n = X.shape[0]
+    if n == 0:
+        return np.full(0, -1)
+
+    index = GridIndex(X, eps)
+
+    # 1) 邻居数（含自身）→ 核心点（排序后的位置）
+    core = _neighbor_counts(index) >= min_pts
+
+    # 2) 核心点连边 + 收集边界边
+    parent, border_pts, border_cores = _link(index, core)
+
+    # 3) 核心点簇编号 + 4) 边界点
+    core_idx = np.sort(index.order[core])
+    return _assign_labels(n, core_idx, _find(parent, core_idx),
+                          border_pts, _find(parent, border_cores))
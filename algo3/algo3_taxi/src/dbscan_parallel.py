@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+dbscan_parallel.py
+分区并行 DBSCAN（engine="parallel"）
+-------------------------------------
+1. 按 x 坐标分位数把平面切成若干竖条（tile），每个 tile 向两侧各扩 eps 的 halo
+   —— 一个点的全部 eps 邻居一定落在它所属 tile 的 halo 范围内
+2. 第一阶段（进程池）：每个 tile 在 halo 范围内计数，得到本 tile 点的核心标记
+3. 第二阶段（进程池）：读全局核心标记，每个 tile 在 halo 范围内
+       核心点连边 → 局部并查集 → 返回 (核心点, 局部根) 作为全局的边
+       本 tile 的非核心点 → 返回 (边界点, 相邻核心点的局部根)
+4. 主进程：全局并查集合并跨 tile 共享核心点的簇，编号规则与串行实现相同
+   —— 输出标签与 dbscan.dbscan 完全相同
+
+点集以 .npy 文件 memory-map 的方式在进程间共享（不经 pickle 传输）
+
+例：python dbscan_parallel.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from grid_index import GridIndex
+from dbscan_block import _neighbor_counts, _link, _find, _union_edges, _assign_labels
+from utils import report_at_exit
+
+
+DATA_PATH = Path("../data/processed/pickups_sample.npy")
+
+
+# ============================================================
+# ✅ 进程内共享数据（memory-map）
+# ============================================================
+_X = None
+
+
+def _init_worker(path):
+    global _X
+    _X = np.load(path, mmap_mode="r")
+
+
+def _tile_points(lo, hi, eps):
+    # tile 的 halo 范围（两侧各扩 eps，再留一点浮点余量）
+    pad = eps * (1 + 1e-9)
+    x = _X[:, 0]
+    idx = np.flatnonzero((x >= lo - pad) & (x <= hi + pad))
+    return idx, np.asarray(_X[idx], dtype=float)
+
+
+def _owned(idx, bounds, k):
+    # 本 tile 拥有的点：bounds[k] <= x < bounds[k+1]（最后一个 tile 含右端）
+    owner = np.searchsorted(bounds[1:-1], _X[idx, 0], side="right")
+    return owner == k
+
+
+# ============================================================
+# ✅ 第一阶段：核心点标记
+# ============================================================
+def _core_task(k, bounds, eps, min_pts):
+    idx, Y = _tile_points(bounds[k], bounds[k + 1], eps)
+    if len(idx) == 0:
+        return idx, np.zeros(0, dtype=bool)
+
+    index = GridIndex(Y, eps)
+    counts = np.empty(len(idx), dtype=np.int64)
+    counts[index.order] = _neighbor_counts(index)
+
+    own = _owned(idx, bounds, k)
+    return idx[own], counts[own] >= min_pts
+
+
+# ============================================================
+# ✅ 第二阶段：局部连通分量 + 边界点
+# ============================================================
+def _link_task(k, bounds, eps, core_path):
+    idx, Y = _tile_points(bounds[k], bounds[k + 1], eps)
+    empty = np.empty(0, dtype=np.int64)
+    if len(idx) == 0:
+        return empty, empty, empty, empty
+
+    core = np.load(core_path, mmap_mode="r")[idx]
+    index = GridIndex(Y, eps)
+    parent, border_pts, border_cores = _link(index, core[index.order])
+
+    # 核心点 → 局部根（局部下标与原始下标同序，局部最小 = 全局最小）
+    local_core = np.flatnonzero(core)
+    roots = _find(parent, local_core)
+    keep = roots != local_core
+
+    # 只返回本 tile 拥有的边界点，(边界点, 局部根) 去重
+    own = _owned(idx, bounds, k)
+    m = own[border_pts]
+    pairs = np.stack([border_pts[m], _find(parent, border_cores[m])], axis=1)
+    if len(pairs):
+        pairs = np.unique(pairs, axis=0)
+
+    return idx[local_core[keep]], idx[roots[keep]], idx[pairs[:, 0]], idx[pairs[:, 1]]
+
+
+# ============================================================
+# ✅ 主函数
+# ============================================================
+def dbscan_parallel(X, eps, min_pts, workers=None, tiles=None):
+    """
+    X: 数据点集 (N,2)，或 .npy 文件路径（直接 memory-map，不再复制）
+    eps: 邻域半径（米）
+    min_pts: 最少核心点数量
+    workers: 进程数（默认 CPU 核数）
+    tiles: 竖条数量（默认 workers × 4，便于负载均衡）
+    返回：labels (N,)（-1=噪声），与 dbscan.dbscan 相同
+    """
+    global _X
+    workers = workers or os.cpu_count() or 1
+    tiles = tiles or workers * 4
+
+    tmp = Path(tempfile.mkdtemp(prefix="dbscan_"))
+    try:
+        if isinstance(X, (str, Path)):
+            path = Path(X)
+        else:
+            path = tmp / "X.npy"
+            np.save(path, np.asarray(X, dtype=float))
+        _init_worker(path)
+        n = len(_X)
+        if n == 0:
+            return np.full(0, -1)
+
+        # 按 x 分位数切条，每条点数大致相同
+        bounds = np.quantile(_X[:, 0], np.linspace(0, 1, tiles + 1))
+        ks = range(tiles)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(path,)) as pool:
+            # 1) 核心点
+            core = np.zeros(n, dtype=bool)
+            for own_idx, own_core in pool.map(_core_task, ks, [bounds] * tiles,
+                                              [eps] * tiles, [min_pts] * tiles):
+                core[own_idx] = own_core
+            core_path = tmp / "core.npy"
+            np.save(core_path, core)
+
+            # 2) 局部分量 + 边界点
+            parent = np.arange(n)
+            border_pts, border_roots = [], []
+            for a, b, bp, br in pool.map(_link_task, ks, [bounds] * tiles,
+                                         [eps] * tiles, [core_path] * tiles):
+                _union_edges(parent, a, b)
+                border_pts.append(bp)
+                border_roots.append(br)
+
+        # 3) 全局编号
+        core_idx = np.flatnonzero(core)
+        return _assign_labels(n, core_idx, _find(parent, core_idx),
+                              np.concatenate(border_pts),
+                              _find(parent, np.concatenate(border_roots)))
+    finally:
+        _X = None
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    from dbscan import dbscan
+
+    report_at_exit()
+
+    eps, min_pts = 100, 20
+    X = np.load(DATA_PATH)
+
+    t0 = time.time()
+    serial = dbscan(X, eps, min_pts, engine="block")
+    t1 = time.time()
+    parallel = dbscan_parallel(DATA_PATH, eps, min_pts)
+    t2 = time.time()
+
+    print(f"serial(block): {t1 - t0:.2f}s   parallel: {t2 - t1:.2f}s   "
+          f"workers={os.cpu_count()}")
+    print("✅ 标签一致" if np.array_equal(serial, parallel) else "❌ 标签不一致")
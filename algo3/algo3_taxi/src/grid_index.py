@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+grid_index.py
+DBSCAN 用的均匀网格邻居索引
+-------------------------------------
+网格边长 = eps，点按所在格子排序后存成 CSR 结构：
+    order       (N,)   排序后第 k 个点在原数组中的下标
+    cell_keys   (C,)   非空格子的编号（升序）
+    offsets     (C+1,) 第 c 个格子的点为 order[offsets[c]:offsets[c+1]]
+
+任意 eps 邻居一定落在所在格子周围的 3×3 个格子里。
+格子编号按行展开（key = 行 * 宽 + 列），同一行相邻的 3 个格子编号连续，
+排序后它们的点也连续，所以一次查询只需切 3 段（上 / 中 / 下 三行）。
+"""
+
+import numpy as np
+
+
+class GridIndex:
+    """
+    输入：X (N,2) 平面坐标（米），eps 邻域半径（米）
+    提供：
+        region_query(i)      与 dbscan.region_query 相同的结果（升序下标）
+        candidates(i)        3×3 格子内的全部候选点下标（未做距离判断）
+        cell_neighborhood(c) 第 c 个非空格子的 3×3 邻域（排序后的位置）
+    """
+
+    def __init__(self, X, eps):
+        if eps <= 0:
+            raise ValueError("eps must be positive")
+        self.X = np.asarray(X, dtype=float)
+        self.eps = float(eps)
+        # 格子边长略大于 eps：避免浮点舍入让距离恰为 eps 的两点相隔 2 格
+        self.cell = self.eps * (1 + 1e-9)
+
+        # 格子坐标（外圈各留 1 格，邻居格子编号不会越界或跨行）
+        origin = self.X.min(axis=0) if len(self.X) else np.zeros(2)
+        cells = np.floor((self.X - origin) / self.cell).astype(np.int64) + 1
+        self.width = int(cells[:, 0].max()) + 2 if len(cells) else 3
+        keys = cells[:, 1] * self.width + cells[:, 0]
+
+        # 稳定排序：同一格子内保持原下标升序
+        self.order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self.order]
+        self.cell_keys, starts = np.unique(sorted_keys, return_index=True)
+        self.offsets = np.append(starts, len(sorted_keys)).astype(np.int64)
+
+        self.point_keys = keys
+        self.X_sorted = self.X[self.order]
+
+    def _row_slices(self, key):
+        # 上 / 中 / 下三行，每行 [key-1, key+1] 三个连续格子
+        rows = key + np.array([-self.width, 0, self.width])
+        lo = np.searchsorted(self.cell_keys, rows - 1, side="left")
+        hi = np.searchsorted(self.cell_keys, rows + 1, side="right")
+        return self.offsets[lo], self.offsets[hi]
+
+    def cell_neighborhood(self, c):
+        starts, ends = self._row_slices(self.cell_keys[c])
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+
+    def candidates(self, point_idx):
+        starts, ends = self._row_slices(self.point_keys[point_idx])
+        return np.concatenate([self.order[s:e] for s, e in zip(starts, ends)])
+
+    def region_query(self, point_idx):
+        starts, ends = self._row_slices(self.point_keys[point_idx])
+        p = self.X[point_idx]
+        eps_sq = self.eps * self.eps
+
+        found = []
+        for s, e in zip(starts, ends):
+            if s == e:
+                continue
+            diff = self.X_sorted[s:e] - p
+            dist_sq = np.einsum('ij,ij->i', diff, diff)
+            found.append(self.order[s:e][dist_sq <= eps_sq])
+
+        # 排序后与朴素实现的返回顺序一致
+        neighbors = np.concatenate(found)
+        neighbors.sort()
+        return neighbors
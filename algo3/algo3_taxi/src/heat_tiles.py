@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+heat_tiles.py
+预先分箱的热力图瓦片金字塔（Web Mercator，{z}/{x}/{y}.png）
+-------------------------------------
+与 run_validation_plot.py 的 np.histogram2d 相同的思路（按格子计数），但：
+1. 格子对齐到 Web Mercator 瓦片：每张 256px 瓦片分成 TILE_BINS × TILE_BINS 个格子
+   （每格 256 / TILE_BINS 像素）
+2. 只在最大缩放级别 zmax 上对点计数；只存非空格子（稀疏：格子键 + 计数），
+   按块读入点集、逐块合并，内存与点数无关
+3. 逐级向上聚合：格子坐标右移 1 位再合并计数，得到 zmax-1, ..., zmin 各级
+4. 每级用同一个上限（非空格子计数的 99.5 百分位）上色，瓦片之间没有接缝；
+   只写出有数据的瓦片
+
+地图只按需加载视野内的瓦片，HTML 里不再包含任何原始点。
+
+数据：默认用全量 store（open_store(full=True)，需要先运行 prepare_data.py --full），
+    没有全量数据时退回 5 万点样本；--sample 强制使用样本
+
+输出：../output/heat_tiles/{z}/{x}/{y}.png 与 meta.json（所用 store 及其数据摘要 + 参数，
+    未变化时跳过重建；换了 store 也会重建）
+重建时先写到临时目录再整体替换，旧数据集留下的瓦片不会残留
+例：python heat_tiles.py [--sample]
+"""
+
+import argparse
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import matplotlib.cm as cm
+import matplotlib.pyplot as plt
+
+from cache import file_digest
+from point_store import open_store
+from utils import report_at_exit
+
+
+TILE_DIR = Path("../output/heat_tiles")
+
+ZOOM_MIN = 9
+ZOOM_MAX = 15
+
+# 每张瓦片每边的格子数（256 / TILE_BINS 像素一格）
+TILE_BINS = 64
+TILE_PX = 256
+
+# 分块读取的点数
+_CHUNK = 2_000_000
+
+
+# ============================================================
+# ✅ Web Mercator
+# ============================================================
+def mercator_bins(lon, lat, z):
+    """
+    输入：经纬度（度），缩放级别 z
+    输出：bx, by 全球格子坐标（每边 TILE_BINS * 2^z 个格子，y 向南增大）
+    """
+    side = TILE_BINS * (1 << z)
+    lat = np.clip(np.radians(lat), -1.4844, 1.4844)       # ±85.05°
+    fx = (np.asarray(lon, dtype=float) + 180.0) / 360.0
+    fy = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0
+    bx = np.clip((fx * side).astype(np.int64), 0, side - 1)
+    by = np.clip((fy * side).astype(np.int64), 0, side - 1)
+    return bx, by
+
+
+def _merge(keys, counts):
+    # 相同格子键的计数相加
+    keys, inv = np.unique(keys, return_inverse=True)
+    return keys, np.bincount(inv.ravel(), weights=counts).astype(np.int64)
+
+
+# ============================================================
+# ✅ 金字塔
+# ============================================================
+def build_pyramid(LL, zmin=ZOOM_MIN, zmax=ZOOM_MAX):
+    """
+    输入：LL (N,2) 经纬度（可以是 memory-map，按块读取）
+    输出：{z: (bx, by, counts)}，只含非空格子
+    """
+    keys, counts = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    for s in range(0, len(LL), _CHUNK):
+        part = np.asarray(LL[s:s + _CHUNK], dtype=float)
+        bx, by = mercator_bins(part[:, 0], part[:, 1], zmax)
+        k, c = np.unique((bx << 32) | by, return_counts=True)
+        keys, counts = _merge(np.concatenate([keys, k]), np.concatenate([counts, c]))
+
+    pyramid = {}
+    for z in range(zmax, zmin - 1, -1):
+        bx, by = keys >> 32, keys & 0xFFFFFFFF
+        pyramid[z] = (bx, by, counts)
+        keys, counts = _merge(((bx >> 1) << 32) | (by >> 1), counts)
+    return pyramid
+
+
+# ============================================================
+# ✅ 瓦片
+# ============================================================
+def _colorize(grid, vmax, cmap):
+    # 对数刻度；0 计数完全透明
+    v = np.clip(np.log1p(grid) / np.log1p(vmax), 0.0, 1.0)
+    rgba = cmap(v)
+    rgba[..., 3] = np.where(grid > 0, 0.35 + 0.6 * v, 0.0)
+    scale = TILE_PX // TILE_BINS
+    return np.repeat(np.repeat(rgba, scale, axis=0), scale, axis=1)
+
+
+def write_tiles(pyramid, out_dir=TILE_DIR, cmap_name="hot_r"):
+    """
+    每级每张有数据的瓦片写出一个 PNG，返回瓦片总数
+    """
+    cmap = cm.get_cmap(cmap_name)
+    total = 0
+    for z, (bx, by, counts) in sorted(pyramid.items()):
+        vmax = max(float(np.percentile(counts, 99.5)), 1.0)
+        tx, ty = bx // TILE_BINS, by // TILE_BINS
+        order = np.lexsort((ty, tx))
+        tx, ty, bx, by, counts = tx[order], ty[order], bx[order], by[order], counts[order]
+        brk = np.flatnonzero((np.diff(tx) != 0) | (np.diff(ty) != 0)) + 1
+        starts, ends = np.r_[0, brk], np.r_[brk, len(tx)]
+
+        for s, e in zip(starts, ends):
+            grid = np.zeros((TILE_BINS, TILE_BINS))
+            grid[by[s:e] % TILE_BINS, bx[s:e] % TILE_BINS] = counts[s:e]
+            path = out_dir / str(z) / str(tx[s]) / f"{ty[s]}.png"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            plt.imsave(path, _colorize(grid, vmax, cmap))
+        total += len(starts)
+        print(f"   z={z}: {len(starts)} 张瓦片，{len(counts)} 个非空格子")
+    return total
+
+
+def _open(full):
+    # full=True 且没有全量数据时退回样本
+    if full:
+        try:
+            return open_store(full=True)
+        except FileNotFoundError as e:
+            print(f"⚠️ {e}；改用样本 store")
+    return open_store()
+
+
+def ensure_tiles(out_dir=TILE_DIR, zmin=ZOOM_MIN, zmax=ZOOM_MAX, full=True):
+    """
+    瓦片不存在或数据 / 参数变化时重建；返回 meta（含 store, zmin, zmax, bounds）
+    full: True 时用全量 store（不存在时退回样本），False 时用样本 store
+    """
+    store = _open(full)
+    # store 索引里记录了来源文件的内容摘要；没有时（旧 store）对 store 本身求摘要
+    meta = {"store": store.path.name, "data": store.source or file_digest(store.path),
+            "zmin": zmin, "zmax": zmax, "tile_bins": TILE_BINS}
+    meta_path = out_dir / "meta.json"
+    if meta_path.exists():
+        old = json.loads(meta_path.read_text(encoding="utf-8"))
+        if all(old.get(k) == v for k, v in meta.items()):
+            print("♻️  热力图瓦片已是最新")
+            return old
+
+    print("🧱 正在生成热力图瓦片金字塔...")
+    LL = store.data[:, 2:]
+    pyramid = build_pyramid(LL, zmin, zmax)
+
+    # 写到临时目录，完成后替换整个 out_dir（旧的瓦片与缩放级别一并删除）
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    total = write_tiles(pyramid, tmp_dir)
+
+    lo = np.asarray(LL.min(axis=0), dtype=float)
+    hi = np.asarray(LL.max(axis=0), dtype=float)
+    meta["bounds"] = [[float(lo[1]), float(lo[0])], [float(hi[1]), float(hi[0])]]
+    meta["tiles"] = total
+    (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    shutil.rmtree(out_dir, ignore_errors=True)
+    tmp_dir.rename(out_dir)
+    print(f"🎯 共 {total} 张瓦片 → {out_dir}")
+    return meta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="热力图瓦片金字塔")
+    parser.add_argument("--sample", action="store_true", help="只用 5 万点样本（默认用全量数据）")
+    args = parser.parse_args()
+
+    report_at_exit()
+    ensure_tiles(full=not args.sample)
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+hotspots.py
+单遍、有界内存的上车热点检测（网格 + Misra-Gries / Space-Saving）
+-------------------------------------
+1. 按块读取原始 CSV（与 prepare_data 的流式模式相同的列与经纬度过滤）
+2. lonlat_to_xy 投影后映射到固定的 CELL 米网格，得到格子编号
+3. 每块先 np.unique 计数，再以“误差为 0 的摘要”合并进 algo1 的
+   MisraGries(k) / SpaceSaving(k)（algo1/summaries.py）
+   —— 内存只与块大小和 k 有关，整月 1200 万行一遍读完
+4. 输出计数最多的格子及其真实计数的保证上下限：
+       MisraGries   下限 = 估计值，上限 = 估计值 + (n - Σ估计值) / k
+       SpaceSaving  下限 = 估计值 - 误差，上限 = 估计值
+   下限大于第 top+1 名的上限时，标记为“确定在前 top 名”
+
+热点格子还可以作为 DBSCAN 的种子：只取热点周围 3×3 个格子内的点运行 dbscan，
+而不必对全体点聚类。热点是在整月全部数据上找的，所以邻域内的点也取自全量数据：
+point_store.open_store(full=True)（由 prepare_data.py --full 的输出生成，按范围读取）。
+全量数据下热点邻域极为稠密（每点 eps 内上万个邻居），精确引擎要枚举全部近邻点对，
+默认使用 ρ-近似引擎（dbscan_approx，稠密格子整体判为核心，不逐对计算）。
+
+输出：../output/hotspots.json
+例：python hotspots.py --summary ss -k 2000 --top 20 --cluster
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prepare_data import (RAW_CSV_PATH, CHUNK_SIZE, _in_nyc,
+                          lonlat_to_xy, xy_to_lonlat)
+
+# algo1 的流式摘要（algo1/summaries.py）
+ALGO1_ROOT = Path(__file__).resolve().parents[3] / "algo1"
+if str(ALGO1_ROOT) not in sys.path:
+    sys.path.insert(0, str(ALGO1_ROOT))
+
+from summaries import MisraGries, SpaceSaving  # noqa: E402
+from utils import timer, report_at_exit  # noqa: E402
+
+
+OUT_PATH = Path("../output/hotspots.json")
+
+# 格子边长（米）
+CELL = 300.0
+
+# 网格覆盖 _in_nyc 的经纬度范围（-75 < lon < -72, 40 < lat < 42）
+_X0, _Y0 = lonlat_to_xy(np.array([-75.0]), np.array([40.0]))[0]
+_X1, _Y1 = lonlat_to_xy(np.array([-72.0]), np.array([42.0]))[0]
+
+SUMMARIES = {"mg": MisraGries, "ss": SpaceSaving}
+
+
+# ============================================================
+# ✅ 格子编号
+# ============================================================
+def _rows(cell):
+    return int(np.ceil((_Y1 - _Y0) / cell)) + 1
+
+
+def cell_ids(X, cell=CELL):
+    """
+    平面坐标 (N,2) → 格子编号 (N,)（列 * 行数 + 行）
+    """
+    cx = np.floor((X[:, 0] - _X0) / cell).astype(np.int64)
+    cy = np.floor((X[:, 1] - _Y0) / cell).astype(np.int64)
+    return cx * _rows(cell) + cy
+
+
+def cell_bounds(cid, cell=CELL, margin=0):
+    """
+    格子编号 → 平面坐标范围 (xmin, ymin, xmax, ymax)，margin 为向外扩的格子数
+    """
+    cx, cy = divmod(int(cid), _rows(cell))
+    x0, y0 = _X0 + (cx - margin) * cell, _Y0 + (cy - margin) * cell
+    size = (2 * margin + 1) * cell
+    return x0, y0, x0 + size, y0 + size
+
+
+def cell_center_lonlat(cid, cell=CELL):
+    x0, y0, x1, y1 = cell_bounds(cid, cell)
+    return xy_to_lonlat((x0 + x1) / 2, (y0 + y1) / 2)[0]
+
+
+# ============================================================
+# ✅ 单遍计数
+# ============================================================
+def stream_hotspots(summary="ss", k=1000, chunksize=CHUNK_SIZE, cell=CELL, path=RAW_CSV_PATH):
+    """
+    按块读取 CSV，把格子编号喂给 MisraGries / SpaceSaving，返回摘要
+    """
+    s = SUMMARIES[summary](k)
+    cols = ["pickup_longitude", "pickup_latitude"]
+    total = 0
+    for chunk in pd.read_csv(path, usecols=cols, chunksize=chunksize):
+        lon = chunk["pickup_longitude"].to_numpy()
+        lat = chunk["pickup_latitude"].to_numpy()
+        m = _in_nyc(lon, lat)
+        ids, counts = np.unique(cell_ids(lonlat_to_xy(lon[m], lat[m]), cell), return_counts=True)
+        s.update_counts(dict(zip(ids.tolist(), counts.tolist())))
+        total += len(chunk)
+        print(f"  已读取 {total} 行，计入 {s.n} 个上车点，候选格子 {len(s)} 个")
+    return s
+
+
+def report(s, top=20, cell=CELL):
+    """
+    前 top 名格子：编号、中心经纬度、估计值与保证上下限
+    """
+    ranked = s.top()
+    # 第 top+1 名及摘要之外的格子的真实计数上限
+    next_upper = max([r[3] for r in ranked[top:top + 1]] + [s.outside_bound()])
+
+    rows = []
+    for rank, (cid, est, lo, hi) in enumerate(ranked[:top], start=1):
+        lon, lat = cell_center_lonlat(cid, cell)
+        rows.append({
+            "rank": rank, "cell": int(cid), "lon": float(lon), "lat": float(lat),
+            "estimate": float(est), "lower": float(lo), "upper": float(hi),
+            "guaranteed_top": bool(lo > next_upper),
+        })
+    return rows
+
+
+# ============================================================
+# ✅ 以热点为种子的 DBSCAN
+# ============================================================
+def cluster_hotspots(cells, eps=300, min_pts=20, cell=CELL, margin=1, engine="approx", full=True):
+    """
+    只取热点格子周围 (2*margin+1)² 个格子内的点运行 dbscan
+    full: True 时从全量 store 读取（与热点计数同一份数据）；False 为 50k 样本 store
+    返回：rows（所用 store 的行号）、labels
+    """
+    from dbscan import dbscan
+    from point_store import open_store
+
+    store = open_store(full=full)
+    rows = np.unique(np.concatenate(
+        [store.rows(cell_bounds(c, cell, margin)) for c in cells] or [np.empty(0, dtype=np.int64)]))
+    X = np.asarray(store.data[rows, :2], dtype=float)
+    labels = dbscan(X, eps, min_pts, engine=engine) if len(X) else np.empty(0, dtype=int)
+    return rows, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单遍热点检测（Misra-Gries / Space-Saving）")
+    parser.add_argument("--summary", choices=list(SUMMARIES), default="ss")
+    parser.add_argument("-k", type=int, default=1000, help="摘要的候选数")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--cell", type=float, default=CELL, help="格子边长（米）")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--cluster", action="store_true",
+                        help="在热点周围的全量点上运行 DBSCAN（需要先运行 prepare_data.py --full）")
+    parser.add_argument("--engine", default="approx", help="--cluster 使用的 dbscan 引擎")
+    args = parser.parse_args()
+
+    if args.cluster:
+        from point_store import FULL_STORE_PATH, source_digest
+        if source_digest(full=True) is None and not FULL_STORE_PATH.exists():
+            parser.error("--cluster 需要全量数据：请先运行 python prepare_data.py --full")
+
+    print(f"📥 单遍读取 {RAW_CSV_PATH}（{args.summary}, k={args.k}）...")
+    s = stream_hotspots(args.summary, args.k, args.chunksize, args.cell)
+    rows = report(s, args.top, args.cell)
+
+    print(f"\n🔥 前 {args.top} 个热点格子（{args.cell:.0f} m）：")
+    for r in rows:
+        mark = "✅" if r["guaranteed_top"] else "  "
+        print(f"{mark} #{r['rank']:>2}  ({r['lon']:.4f}, {r['lat']:.4f})  "
+              f"≈{r['estimate']:.0f}  ∈ [{r['lower']:.0f}, {r['upper']:.0f}]")
+
+    result = {"summary": args.summary, "k": args.k, "cell": args.cell, "n": s.n, "hotspots": rows}
+
+    if args.cluster:
+        print("\n🚀 在热点周围运行 DBSCAN...")
+        with timer("热点邻域 DBSCAN"):
+            pts, labels = cluster_hotspots([r["cell"] for r in rows], cell=args.cell,
+                                           engine=args.engine)
+        n_clusters = int(labels.max() + 1) if len(labels) else 0
+        print(f"热点邻域内 {len(pts)} 点，簇数 {n_clusters}")
+        result["dbscan"] = {"engine": args.engine, "points": int(len(pts)), "clusters": n_clusters,
+                            "noise": int((labels == -1).sum())}
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"🎯 结果 → {OUT_PATH}")
+
+
+if __name__ == "__main__":
+    report_at_exit()
+    main()
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+incremental_dbscan.py
+流式上车点的增量 DBSCAN（插入 / 过期）
+-------------------------------------
+状态：
+    cells      网格（边长 eps）：格子 → 点 id 集合，邻居查询只看 3×3 个格子
+    counts     每个点 eps 内的邻居数（含自身）
+    core       核心点集合
+    comp       核心点 → 连通分量编号；members 分量编号 → 核心点集合
+    border     非核心点 → eps 内的核心点集合（空集为噪声；非核心点邻居数 < min_pts，集合很小）
+
+insert(x, y)：
+    邻居计数 +1 → 新出现的核心点与相邻核心点所在分量合并（只会合并，不会分裂），
+    并加入其邻域内非核心点的 border 集合
+expire(pid)：
+    邻居计数 -1 → 失去核心地位的点移出分量，从邻域内非核心点的 border 集合中去掉，
+    自己改为记下剩余的核心邻居；
+    从它们剩余的核心邻居出发 BFS：全部种子互相可达即停止（未分裂），
+    否则已走完的部分各自成为新分量
+每次更新只触及受影响点的邻域（可能分裂时再加上 BFS 走过的核心点），与 N 无关
+
+labels()：按 id 升序给出与 dbscan.dbscan(当前点集) 完全相同的标签
+    （簇编号按簇内最小核心点 id 排序，边界点取相邻簇中编号最小者）
+    只读上述状态，不做邻居查询；簇编号随分量的合并 / 分裂全局变化，在读取时排一次序
+
+例：python incremental_dbscan.py
+"""
+
+import math
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+
+DATA_PATH = Path("../data/processed/pickups_sample.npy")
+
+
+class IncrementalDBSCAN:
+    """
+    输入：eps 邻域半径（米），min_pts 最少核心点数量
+    提供：
+        insert(x, y)     插入一个点，返回点 id（递增）
+        expire(pid)      删除一个点
+        ids()            当前点 id（升序）
+        labels()         与 ids() 对应的标签（-1=噪声）
+    """
+
+    def __init__(self, eps, min_pts):
+        self.eps = float(eps)
+        self.eps_sq = self.eps * self.eps
+        # 格子边长略大于 eps（同 GridIndex）：距离恰为 eps 的两点不会相隔 2 格
+        self.cell = self.eps * (1 + 1e-9)
+        self.min_pts = int(min_pts)
+
+        self.points = {}      # id → (x, y)
+        self.cells = {}       # (cx, cy) → set(id)
+        self.counts = {}      # id → 邻居数（含自身）
+        self.core = set()
+        self.comp = {}        # 核心点 id → 分量编号
+        self.members = {}     # 分量编号 → set(核心点 id)
+        self.border = {}      # 非核心点 id → set(eps 内的核心点 id)
+
+        self._next_id = 0
+        self._next_comp = 0
+
+    def __len__(self):
+        return len(self.points)
+
+    # ============================================================
+    # ✅ 网格邻居查询
+    # ============================================================
+    def _cell(self, x, y):
+        return math.floor(x / self.cell), math.floor(y / self.cell)
+
+    def _neighbors(self, x, y):
+        cx, cy = self._cell(x, y)
+        found = []
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for q in self.cells.get((gx, gy), ()):
+                    qx, qy = self.points[q]
+                    dx, dy = qx - x, qy - y
+                    if dx * dx + dy * dy <= self.eps_sq:
+                        found.append(q)
+        return found
+
+    def _core_neighbors(self, p):
+        return [q for q in self._neighbors(*self.points[p]) if q in self.core and q != p]
+
+    # ============================================================
+    # ✅ 分量维护
+    # ============================================================
+    def _new_comp(self, cores):
+        cid = self._next_comp
+        self._next_comp += 1
+        self.members[cid] = set(cores)
+        for c in cores:
+            self.comp[c] = cid
+        return cid
+
+    def _merge(self, cids):
+        # 小分量并入大分量
+        cids = sorted(set(cids), key=lambda c: len(self.members[c]), reverse=True)
+        keep = cids[0]
+        for cid in cids[1:]:
+            moved = self.members.pop(cid)
+            for c in moved:
+                self.comp[c] = keep
+            self.members[keep] |= moved
+        return keep
+
+    # ============================================================
+    # ✅ 插入
+    # ============================================================
+    def insert(self, x, y):
+        pid = self._next_id
+        self._next_id += 1
+        x, y = float(x), float(y)
+        self.points[pid] = (x, y)
+        self.cells.setdefault(self._cell(x, y), set()).add(pid)
+
+        nbrs = self._neighbors(x, y)
+        self.counts[pid] = len(nbrs)
+        for q in nbrs:
+            if q != pid:
+                self.counts[q] += 1
+
+        # 新的核心点：新点自己，或邻居数刚好达到 min_pts 的邻居
+        promoted = [q for q in nbrs if q not in self.core and self.counts[q] >= self.min_pts]
+        self.core.update(promoted)
+        if pid not in self.core:
+            self.border[pid] = {q for q in nbrs if q in self.core}
+
+        for c in promoted:
+            # c 不再是非核心点；它成为邻域内其余非核心点的核心邻居
+            self.border.pop(c, None)
+            nb = nbrs if c == pid else self._neighbors(*self.points[c])
+            for r in nb:
+                if r not in self.core:
+                    self.border[r].add(c)
+            # 已有分量的核心邻居（本轮新核心点还没有分量，c 自己也不在其中）
+            cids = {self.comp[q] for q in nb if q in self.comp}
+            if cids:
+                cid = self._merge(cids)
+                self.members[cid].add(c)
+                self.comp[c] = cid
+            else:
+                self._new_comp([c])
+
+        return pid
+
+    # ============================================================
+    # ✅ 过期
+    # ============================================================
+    def expire(self, pid):
+        x, y = self.points[pid]
+        nbrs = [q for q in self._neighbors(x, y) if q != pid]
+
+        cell = self._cell(x, y)
+        self.cells[cell].discard(pid)
+        if not self.cells[cell]:
+            del self.cells[cell]
+        del self.points[pid]
+        del self.counts[pid]
+        self.border.pop(pid, None)
+
+        for q in nbrs:
+            self.counts[q] -= 1
+
+        # 失去核心地位的点（含被删除的点本身）
+        demoted = [q for q in nbrs if q in self.core and self.counts[q] < self.min_pts]
+        if pid in self.core:
+            demoted.append(pid)
+        if not demoted:
+            return
+
+        # 种子：被降级点的剩余核心邻居（各分量分别处理）
+        # 同时维护 border：被降级点从邻域内非核心点的集合中去掉，仍在的被降级点记下核心邻居
+        affected = {}
+        for q in demoted:
+            cid = self.comp.pop(q)
+            self.core.discard(q)
+            self.members[cid].discard(q)
+            affected.setdefault(cid, set())
+            if q != pid:
+                self.border[q] = set()
+        for q in demoted:
+            nb = nbrs if q == pid else self._neighbors(*self.points[q])
+            for r in nb:
+                if r in self.core:
+                    affected.setdefault(self.comp[r], set()).add(r)
+                    if q != pid:
+                        self.border[q].add(r)
+                elif r != q:
+                    self.border[r].discard(q)
+
+        for cid, seeds in affected.items():
+            if not self.members[cid]:
+                del self.members[cid]
+            elif len(seeds) > 1:
+                self._split(cid, seeds)
+
+    def _split(self, cid, seeds):
+        # 逐个种子 BFS：所有种子都已连通即停止；走完的部分成为新分量
+        pending = set(seeds)
+        while len(pending) > 1:
+            start = pending.pop()
+            seen = {start}
+            queue = deque([start])
+            while queue and pending:
+                p = queue.popleft()
+                for q in self._core_neighbors(p):
+                    if q not in seen:
+                        seen.add(q)
+                        pending.discard(q)
+                        queue.append(q)
+            if not pending:
+                return
+            # start 所在部分已走完且与其余种子不连通 → 切出去
+            self.members[cid] -= seen
+            self._new_comp(seen)
+
+    # ============================================================
+    # ✅ 标签（与从头运行 dbscan 相同）
+    # ============================================================
+    def ids(self):
+        return np.array(sorted(self.points), dtype=np.int64)
+
+    def labels(self):
+        ids = sorted(self.points)
+        pos = {p: i for i, p in enumerate(ids)}
+        labels = np.full(len(ids), -1)
+
+        # 簇编号：按分量内最小核心点 id 排序
+        firsts = sorted((min(m), cid) for cid, m in self.members.items())
+        cluster = {cid: k for k, (_, cid) in enumerate(firsts)}
+        for c in self.core:
+            labels[pos[c]] = cluster[self.comp[c]]
+
+        # 边界点：border 中核心邻居所在簇中编号最小者（空集为噪声）
+        for p, adj in self.border.items():
+            if adj:
+                labels[pos[p]] = min(cluster[self.comp[q]] for q in adj)
+
+        return labels
+
+
+if __name__ == "__main__":
+    from dbscan import dbscan
+    from utils import report_at_exit
+
+    report_at_exit()
+
+    eps, min_pts, window = 300, 20, 5000
+    X = np.load(DATA_PATH)[:20000]
+
+    # 滑动窗口：每来一个新点就让最老的点过期
+    inc = IncrementalDBSCAN(eps, min_pts)
+    for k, (x, y) in enumerate(X):
+        inc.insert(x, y)
+        if k >= window:
+            inc.expire(k - window)
+        if (k + 1) % 5000 == 0:
+            ids = inc.ids()
+            same = np.array_equal(inc.labels(), dbscan(X[ids], eps, min_pts))
+            print(f"{k + 1} 个点后：窗口 {len(ids)} 点，"
+                  f"{len(inc.members)} 个簇，{'✅ 与重算一致' if same else '❌ 不一致'}")
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+npy_store.py
+可追加写入的 .npy 文件
+-------------------------------------
+按块追加行，关闭时回填文件头里的 shape；写完即可 np.load(path, mmap_mode="r")。
+内存只占当前写入的一块。
+
+文件头固定为 _HEADER_BYTES 字节（标准 .npy 1.0 格式，多余部分用空格填充），
+shape 变长后仍能原地改写；用同一格式写出的文件可以再次打开继续追加。
+
+例：
+    with NpyAppender("full.npy", np.float64, (2,)) as out:
+        for chunk in chunks:
+            out.append(chunk)          # chunk: (k, 2)
+"""
+
+import ast
+from pathlib import Path
+
+import numpy as np
+
+
+_MAGIC = b"\x93NUMPY\x01\x00"
+_HEADER_BYTES = 128
+
+
+def _header(dtype, shape):
+    d = {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+         "fortran_order": False, "shape": tuple(shape)}
+    text = repr(d).encode("latin1")
+    room = _HEADER_BYTES - len(_MAGIC) - 2
+    if len(text) + 1 > room:
+        raise ValueError(f"npy header too long for shape {shape}")
+    text = text.ljust(room - 1) + b"\n"
+    return _MAGIC + len(text).to_bytes(2, "little") + text
+
+
+class NpyAppender:
+    """
+    输入：path 输出路径，dtype 元素类型，row_shape 每行的形状（如 (2,)；一维数组为 ()）
+         append=True 时若文件已存在则在末尾继续追加（须为本格式写出的文件）
+    提供：
+        append(rows)    追加若干行
+        rows            已写入的行数
+        close()         回填 shape（with 语句退出时自动调用）
+    """
+
+    def __init__(self, path, dtype, row_shape=(), append=False):
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.rows = 0
+
+        if append and self.path.exists():
+            self.f = open(self.path, "r+b")
+            self.rows = self._read_rows()
+            self.f.seek(0, 2)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.f = open(self.path, "wb")
+            self.f.write(_header(self.dtype, (0,) + self.row_shape))
+
+    def _read_rows(self):
+        head = self.f.read(_HEADER_BYTES)
+        if head[:len(_MAGIC)] != _MAGIC or int.from_bytes(head[8:10], "little") + 10 != _HEADER_BYTES:
+            raise ValueError(f"{self.path} was not written by NpyAppender")
+        d = ast.literal_eval(head[10:].decode("latin1"))
+        if np.dtype(d["descr"]) != self.dtype or tuple(d["shape"][1:]) != self.row_shape:
+            raise ValueError(f"{self.path}: dtype/shape mismatch {d['descr']} {d['shape']}")
+        return d["shape"][0]
+
+    def append(self, rows):
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        if rows.shape[1:] != self.row_shape:
+            raise ValueError(f"row shape {rows.shape[1:]} != {self.row_shape}")
+        self.f.write(rows.tobytes())
+        self.rows += len(rows)
+
+    def close(self):
+        if self.f.closed:
+            return
+        self.f.seek(0)
+        self.f.write(_header(self.dtype, (self.rows,) + self.row_shape))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
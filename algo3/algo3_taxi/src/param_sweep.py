@@ -3,16 +3,17 @@
 param_sweep.py
 参数敏感性分析：
 测试多组 eps、minPts 并输出簇数量与噪声比例
+
+min_pts 固定时只在最大的 eps 上计算一次互达结构（reachability.Reachability），
+每个 eps 的标签都从中 O(N) 提取，结果与逐个运行 dbscan 相同
 """
 
 import numpy as np
 import matplotlib.pyplot as plt
-from pathlib import Path
-
-from dbscan import dbscan
-from utils import timer
 
-DATA_PATH = Path("../data/processed/pickups_sample.npy")
+from point_store import load_points
+from reachability import Reachability
+from utils import timer, report_at_exit
 
 eps_list = [200, 300, 400, 500]   # 可自由扩展
 min_pts = 20                      # 固定一个即可对比 eps
@@ -20,14 +21,20 @@ min_pts = 20                      # 固定一个即可对比 eps
 
 @timer
 def run():
-    X = np.load(DATA_PATH)
+    with timer("读取数据"):
+        X = load_points("x", "y")
 
     cluster_counts = []
     noise_ratios = []
 
+    print(f"🚀 计算互达结构 max_eps={max(eps_list)}, min_pts={min_pts}")
+    with timer("互达结构"):
+        reach = Reachability(X, max_eps=max(eps_list), min_pts=min_pts)
+
     for eps in eps_list:
-        print(f"\n🚀 运行 eps={eps}")
-        labels = dbscan(X, eps=eps, min_pts=min_pts)
+        print(f"\n🚀 提取 eps={eps}")
+        with timer(f"提取标签 eps={eps}"):
+            labels = reach.labels(eps)
 
         n_noise = np.sum(labels == -1)
         n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
@@ -38,6 +45,12 @@ def run():
         print(f"簇数: {n_clusters}, 噪声比例: {noise_ratios[-1]:.2%}")
 
     # 可视化
+    with timer("绘图"):
+        plot(cluster_counts, noise_ratios)
+    plt.show()
+
+
+def plot(cluster_counts, noise_ratios):
     fig, ax1 = plt.subplots()
     ax2 = ax1.twinx()
 
@@ -50,8 +63,8 @@ def run():
 
     plt.title("DBSCAN 参数敏感性分析")
     fig.tight_layout()
-    plt.show()
 
 
 if __name__ == "__main__":
+    report_at_exit()
     run()
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+point_store.py
+按空间顺序存放的 float32 点集（memory-map）
+-------------------------------------
+data/processed/pickups_store.npy         (N,4) float32：x, y（米）, lon, lat
+data/processed/pickups_store_index.npz   格子索引：
+    cell      格子边长（米）
+    origin    (2,) 格子坐标原点（x, y 的最小值）
+    keys      非空格子的 Z-order（Morton）编码，升序
+    offsets   第 k 个格子的点为 store[offsets[k]:offsets[k+1]]
+    perm      store 第 i 行对应原样本中的第 perm[i] 个点
+    source    由哪两个样本文件生成（source_digest()），open_store 据此判断是否过期
+
+全量版（prepare_data.py --full 的 pickups_full*.npy → pickups_store_full*）结构相同，
+open_store(full=True) 打开，供需要全部上车点的场合（hotspots 的种子 DBSCAN、heat_tiles 的瓦片）使用。
+
+点按所在格子的 Z-order 排序：同一格子的点连续，相邻格子大多也相邻，
+按范围读取时只需 memory-map 对应的几段行；float32 比原来的两个 float64 文件省一半内存。
+
+注意：load_points / columns 返回的是 store 的行顺序（不是 pickups_sample 的顺序），坐标为 float32。
+    - run_* 脚本的 labels 按 store 行排列；簇编号（按簇内最小核心点的行号）也与
+      改用 store 之前（float64、样本顺序）的输出不同，簇本身不变
+    - float32 在此范围内为毫米级精度，距离恰在 eps 上的点对可能与 float64 的判定不同
+    - 需要与样本顺序对齐时：store.to_sample_order(labels)
+
+用法：
+    X = load_points("x", "y")                       # 全部点
+    LL = load_points("lon", "lat", bbox=(x0, y0, x1, y1))   # 只读范围内的格子
+    T = load_times()                                 # 与 store 行对应的上车时间（epoch 秒）
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from cache import file_digest
+from npy_store import NpyAppender
+
+
+STORE_PATH = Path("../data/processed/pickups_store.npy")
+INDEX_PATH = Path("../data/processed/pickups_store_index.npz")
+
+# 旧的样本文件（store 不存在或过期时据此重建）
+SAMPLE_XY = Path("../data/processed/pickups_sample.npy")
+SAMPLE_LL = Path("../data/processed/pickups_lonlat.npy")
+SAMPLE_T = Path("../data/processed/pickups_time.npy")
+
+# 全量版：由 prepare_data.py --full 写出的过滤后全部数据生成
+FULL_STORE_PATH = Path("../data/processed/pickups_store_full.npy")
+FULL_INDEX_PATH = Path("../data/processed/pickups_store_full_index.npz")
+FULL_XY = Path("../data/processed/pickups_full.npy")
+FULL_LL = Path("../data/processed/pickups_full_lonlat.npy")
+
+# full → (store, 索引, 平面坐标来源, 经纬度来源)
+_FILES = {
+    False: (STORE_PATH, INDEX_PATH, SAMPLE_XY, SAMPLE_LL),
+    True: (FULL_STORE_PATH, FULL_INDEX_PATH, FULL_XY, FULL_LL),
+}
+
+COLUMNS = {"x": 0, "y": 1, "lon": 2, "lat": 3}
+
+# 格子边长（米）
+CELL = 500.0
+
+# 分块处理的行数
+_CHUNK = 1_000_000
+
+
+# ============================================================
+# ✅ Z-order（Morton）编码
+# ============================================================
+def _spread(v):
+    # 把 32 位整数的各位隔开：b31..b0 → 0 b31 0 b30 ... 0 b0
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF),
+                        (4, 0x0F0F0F0F0F0F0F0F), (2, 0x3333333333333333),
+                        (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def morton(cx, cy):
+    return _spread(np.asarray(cx)) | (_spread(np.asarray(cy)) << np.uint64(1))
+
+
+def _cells(xy, origin, cell):
+    return np.floor((np.asarray(xy, dtype=float) - origin) / cell).astype(np.int64)
+
+
+# ============================================================
+# ✅ 写入
+# ============================================================
+def source_digest(full=False):
+    """
+    pickups_sample.npy 与 pickups_lonlat.npy（full=True 时为 pickups_full*.npy）的内容摘要
+    （任一不存在时为 None）
+    """
+    _, _, xy, ll = _FILES[full]
+    if not (xy.exists() and ll.exists()):
+        return None
+    return file_digest(xy) + ":" + file_digest(ll)
+
+
+def build_store(X, LL, path=STORE_PATH, index_path=INDEX_PATH, cell=CELL, source=None):
+    """
+    输入：X (N,2) 平面坐标，LL (N,2) 经纬度（可以是 memory-map，按块读取）
+          source：X / LL 来自样本文件时传入 source_digest()，用于判断过期
+    输出：写出 store 与格子索引，返回 PointStore
+    """
+    n = len(X)
+    origin = np.asarray(X.min(axis=0), dtype=float) if n else np.zeros(2)
+
+    keys = np.empty(n, dtype=np.uint64)
+    for s in range(0, n, _CHUNK):
+        c = _cells(X[s:s + _CHUNK], origin, cell)
+        keys[s:s + _CHUNK] = morton(c[:, 0], c[:, 1])
+
+    perm = np.argsort(keys, kind="stable")
+    keys = keys[perm]
+
+    with NpyAppender(path, np.float32, (4,)) as out:
+        for s in range(0, n, _CHUNK):
+            q = perm[s:s + _CHUNK]
+            # 按升序读取（memory-map 时顺序访问），再按 perm 的顺序放回
+            p = np.sort(q)
+            rows = np.empty((len(p), 4), dtype=np.float32)
+            rows[:, :2] = X[p]
+            rows[:, 2:] = LL[p]
+            out.append(rows[np.searchsorted(p, q)])
+
+    cell_keys, starts = np.unique(keys, return_index=True)
+    np.savez(index_path, cell=cell, origin=origin, keys=cell_keys,
+             offsets=np.append(starts, n).astype(np.int64),
+             perm=perm.astype(np.int32 if n < 2 ** 31 else np.int64),
+             source=np.array(source or ""))
+    return PointStore(path, index_path)
+
+
+# ============================================================
+# ✅ 读取
+# ============================================================
+class PointStore:
+    """
+    提供：
+        columns(*names, bbox=None)    读取若干列；bbox=(xmin, ymin, xmax, ymax) 时只读相交的格子
+        rows(bbox)                    bbox 内点的行号
+        perm                          行 → 原样本下标
+        to_sample_order(values)       store 行顺序的数组 → pickups_sample 的顺序
+    """
+
+    def __init__(self, path=STORE_PATH, index_path=INDEX_PATH):
+        self.path = Path(path)
+        self.data = np.load(path, mmap_mode="r")
+        with np.load(index_path) as idx:
+            self.cell = float(idx["cell"])
+            self.origin = idx["origin"]
+            self.keys = idx["keys"]
+            self.offsets = idx["offsets"]
+            self.perm = idx["perm"]
+            self.source = str(idx["source"]) if "source" in idx.files else ""
+
+    def __len__(self):
+        return len(self.data)
+
+    def _tile_ranges(self, bbox):
+        # bbox 覆盖的格子 → 在 store 中的 [start, end) 段（相邻段合并）
+        lo = _cells([bbox[:2]], self.origin, self.cell)[0]
+        hi = _cells([bbox[2:]], self.origin, self.cell)[0]
+        lo = np.maximum(lo, 0)
+        if (hi < lo).any():
+            return np.empty((0, 2), dtype=np.int64)
+        gx, gy = np.meshgrid(np.arange(lo[0], hi[0] + 1), np.arange(lo[1], hi[1] + 1))
+        want = np.sort(morton(gx.ravel(), gy.ravel()))
+        k = np.searchsorted(self.keys, want)
+        k = k[(k < len(self.keys)) & (self.keys[np.minimum(k, len(self.keys) - 1)] == want)]
+        if not len(k):
+            return np.empty((0, 2), dtype=np.int64)
+        starts, ends = self.offsets[k], self.offsets[k + 1]
+        brk = np.flatnonzero(starts[1:] != ends[:-1]) + 1
+        return np.stack([starts[np.r_[0, brk]], ends[np.r_[brk - 1, len(k) - 1]]], axis=1)
+
+    def rows(self, bbox):
+        ranges = self._tile_ranges(bbox)
+        if not len(ranges):
+            return np.empty(0, dtype=np.int64)
+        idx = np.concatenate([np.arange(s, e) for s, e in ranges])
+        xy = self.data[idx, :2]
+        inside = ((xy[:, 0] >= bbox[0]) & (xy[:, 0] <= bbox[2]) &
+                  (xy[:, 1] >= bbox[1]) & (xy[:, 1] <= bbox[3]))
+        return idx[inside]
+
+    def to_sample_order(self, values):
+        """
+        按 store 行排列的数组（例如 labels）→ 按 pickups_sample 的顺序排列
+        """
+        values = np.asarray(values)
+        out = np.empty_like(values)
+        out[self.perm] = values
+        return out
+
+    def columns(self, *names, bbox=None):
+        cols = [COLUMNS[c] for c in names]
+        if bbox is None:
+            out = np.empty((len(self.data), len(cols)), dtype=np.float32)
+            for s in range(0, len(self.data), _CHUNK):
+                out[s:s + _CHUNK] = self.data[s:s + _CHUNK][:, cols]
+            return out
+        return np.asarray(self.data[self.rows(bbox)][:, cols])
+
+
+def open_store(full=False):
+    """
+    打开 store；不存在，或与 pickups_sample / pickups_lonlat 的内容摘要不一致时重建
+    （两个文件任一被重新生成都会触发，与修改时间无关；样本文件不存在时直接使用 store）
+    full=True：打开由 pickups_full*.npy 生成的全量 store
+    """
+    path, index_path, xy, ll = _FILES[full]
+    source = source_digest(full)
+    if path.exists() and index_path.exists():
+        # 只读索引判断（先不 memory-map store：Windows 上被映射的文件无法重写）
+        with np.load(index_path) as idx:
+            built_from = str(idx["source"]) if "source" in idx.files else ""
+        if source is None or built_from == source:
+            return PointStore(path, index_path)
+    if source is None:
+        hint = "python prepare_data.py --full" if full else "python prepare_data.py"
+        raise FileNotFoundError(f"{xy} / {ll} 不存在：请先运行 {hint}")
+    print(f"🗂️  正在生成空间有序的点集文件 {path.name} ...")
+    return build_store(np.load(xy, mmap_mode="r"), np.load(ll, mmap_mode="r"),
+                       path=path, index_path=index_path, source=source)
+
+
+def load_points(*names, bbox=None):
+    return open_store().columns(*names, bbox=bbox)
+
+
+def load_times():
+    """
+    上车时间 (N,) int64，按 store 的行顺序（由样本顺序的 pickups_time.npy 经 perm 重排）
+    """
+    store = open_store()
+    if not SAMPLE_T.exists():
+        raise FileNotFoundError(f"{SAMPLE_T} 不存在：请重新运行 prepare_data.py 以保留上车时间")
+    T = np.load(SAMPLE_T, mmap_mode="r")
+    if len(T) != len(store):
+        raise ValueError(f"时间与点集长度不一致: {len(T)} vs {len(store)}")
+    return np.asarray(T[store.perm])
@@ -4,62 +4,115 @@ prepare_data.py
 NYC Taxi DBSCAN 项目 - 数据预处理模块
 -------------------------------------
 功能：
-1. 读取原始 NYC Taxi CSV 数据（只读上车经纬度列）
+1. 读取原始 NYC Taxi CSV 数据（只读上车经纬度列 + 上车时间）
 2. 经纬度过滤（保留纽约市合理范围内数据）
 3. 随机抽样 50,000 点
 4. 经纬度转换为近似米单位的平面坐标
 5. 保存为 .npy 格式，便于后续聚类快速加载
 
+流式模式（--stream）：按 chunksize 分块读取，逐块过滤 / 转换坐标，
+单遍 bottom-k 蓄水池抽样（每行一个随机键，保留键最小的 N_SAMPLES 行），
+内存只与块大小和样本数有关；--full 时把过滤后的全量数据追加写入
+data/processed/pickups_full*.npy（npy_store.NpyAppender，可 memory-map 读取）
+
 输出文件：
 data/processed/pickups_sample.npy    # ndarray, shape (N,2)
+data/processed/pickups_lonlat.npy    # ndarray, shape (N,2) → (lon, lat)
+data/processed/pickups_time.npy      # ndarray, shape (N,)  → 上车时间（本地时间的 epoch 秒）
+data/processed/pickups_store.npy     # float32 (N,4) → x, y, lon, lat，按 Z-order 排序（point_store）
+data/processed/pickups_store_index.npz
 """
 
+import argparse
+from contextlib import ExitStack
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from npy_store import NpyAppender
+from point_store import build_store, source_digest
+from utils import report_at_exit
+
 
 # ==============================
 # 配置
 # ==============================
 RAW_CSV_PATH = Path("../data/raw/yellow_tripdata_2015-01.csv")
 OUTPUT_PATH = Path("../data/processed/pickups_sample.npy")
+TIME_PATH = OUTPUT_PATH.parent / "pickups_time.npy"
+LONLAT_PATH = OUTPUT_PATH.parent / "pickups_lonlat.npy"
 
-# 抽样数量
+# 全量（过滤后）输出：平面坐标 / 经纬度 / 上车时间
+FULL_PATHS = (
+    OUTPUT_PATH.parent / "pickups_full.npy",
+    OUTPUT_PATH.parent / "pickups_full_lonlat.npy",
+    OUTPUT_PATH.parent / "pickups_full_time.npy",
+)
+
+# 上车时间列名（2015 年的 yellow 数据为 tpep_pickup_datetime，更早的为 pickup_datetime）
+TIME_COLUMNS = ("tpep_pickup_datetime", "pickup_datetime")
+
+# 抽样数量（None = 使用全部数据；dbscan 的 grid 引擎可以处理整月数据）
 N_SAMPLES = 50000
 
+# 流式模式每块读取的行数
+CHUNK_SIZE = 500_000
+
+# 需要读取的列
+LONLAT_COLUMNS = ["pickup_longitude", "pickup_latitude"]
+
+
+def _usecols(c):
+    return c in LONLAT_COLUMNS or c in TIME_COLUMNS
+
+
+def _in_nyc(lon, lat):
+    # 经纬度过滤：只保留纽约市附近范围
+    return (lon > -75) & (lon < -72) & (lat > 40) & (lat < 42)
+
 
 def load_and_process():
     print("📥 正在加载原始数据...")
 
-    # 只读取经纬度列，加快速度、减少内存
-    usecols = ["pickup_longitude", "pickup_latitude"]
-    df = pd.read_csv(RAW_CSV_PATH, usecols=usecols)
+    # 只读取经纬度列 + 上车时间列，加快速度、减少内存
+    df = pd.read_csv(RAW_CSV_PATH, usecols=_usecols)
+    time_col = next(c for c in TIME_COLUMNS if c in df.columns)
 
     print(f"原始数据总行数: {len(df)}")
 
     # 经纬度过滤：只保留纽约市附近范围
-    df = df[
-        (df["pickup_longitude"] > -75) & (df["pickup_longitude"] < -72) &
-        (df["pickup_latitude"]  >  40) & (df["pickup_latitude"]  <  42)
-    ]
+    df = df[_in_nyc(df["pickup_longitude"], df["pickup_latitude"])]
 
     print(f"经纬度清洗后剩余: {len(df)} 行")
 
     # 抽样
-    df_sample = df.sample(
-        n=min(N_SAMPLES, len(df)),
-        random_state=42
-    )
+    if N_SAMPLES is None:
+        df_sample = df
+    else:
+        df_sample = df.sample(
+            n=min(N_SAMPLES, len(df)),
+            random_state=42
+        )
 
     # 经纬度 numpy
-    lonlat = df_sample.to_numpy()  # shape: (N, 2)
+    lonlat = df_sample[LONLAT_COLUMNS].to_numpy()  # shape: (N, 2)
+
+    # 上车时间 → epoch 秒（按本地时间的“墙上时钟”存，便于直接取小时 / 星期）
+    t = datetime_to_epoch(df_sample[time_col])
+
+    return _save_outputs(lonlat, t)
+
+
+def _save_outputs(lonlat, t):
+    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    np.save(TIME_PATH, t)
+    print(f"🕒 已保存上车时间文件： {TIME_PATH}")
 
     # 保存原始经纬度数据
-    lonlat_path = OUTPUT_PATH.parent / "pickups_lonlat.npy"
-    np.save(lonlat_path, lonlat)
+    np.save(LONLAT_PATH, lonlat)
 
-    print(f"📌 已保存经纬度文件： {lonlat_path}")
+    print(f"📌 已保存经纬度文件： {LONLAT_PATH}")
 
     # 提取经纬度
     lon = lonlat[:, 0]
@@ -75,9 +128,92 @@ def load_and_process():
     print(f"🎯 已保存平面坐标文件： {OUTPUT_PATH}")
     print(f"最终点数: {len(X)}，shape: {X.shape}")
 
+    # 空间有序的 float32 点集（脚本通过 point_store.load_points 读取）
+    build_store(X, lonlat, source=source_digest())
+    print("🗂️  已保存空间有序的点集文件")
+
     return X, lonlat
 
 
+def load_and_process_streaming(chunksize=CHUNK_SIZE, write_full=False):
+    """
+    分块读取 + 单遍蓄水池抽样（内存与文件大小无关）
+    write_full: 同时把过滤后的全量数据追加写入 FULL_PATHS
+    N_SAMPLES 为 None 时不抽样，输出文件本身按块追加写入
+    """
+    print(f"📥 正在分块读取原始数据（每块 {chunksize} 行）...")
+
+    rng = np.random.default_rng(42)
+    res_key = np.empty(0)
+    res_ll = np.empty((0, 2))
+    res_t = np.empty(0, dtype=np.int64)
+    total = kept = 0
+
+    with ExitStack() as stack:
+        full = None
+        if write_full:
+            full = [stack.enter_context(NpyAppender(FULL_PATHS[0], np.float64, (2,))),
+                    stack.enter_context(NpyAppender(FULL_PATHS[1], np.float64, (2,))),
+                    stack.enter_context(NpyAppender(FULL_PATHS[2], np.int64))]
+        everything = None
+        if N_SAMPLES is None:
+            everything = [stack.enter_context(NpyAppender(OUTPUT_PATH, np.float64, (2,))),
+                          stack.enter_context(NpyAppender(LONLAT_PATH, np.float64, (2,))),
+                          stack.enter_context(NpyAppender(TIME_PATH, np.int64))]
+
+        for chunk in pd.read_csv(RAW_CSV_PATH, usecols=_usecols, chunksize=chunksize):
+            time_col = next(c for c in TIME_COLUMNS if c in chunk.columns)
+            lon = chunk["pickup_longitude"].to_numpy()
+            lat = chunk["pickup_latitude"].to_numpy()
+            m = _in_nyc(lon, lat)
+            total += len(chunk)
+            kept += int(m.sum())
+
+            ll = np.column_stack([lon[m], lat[m]])
+            t = datetime_to_epoch(chunk[time_col].to_numpy()[m])
+
+            for out in (full, everything):
+                if out is not None:
+                    out[0].append(lonlat_to_xy(ll[:, 0], ll[:, 1]))
+                    out[1].append(ll)
+                    out[2].append(t)
+
+            if everything is None:
+                # bottom-k：保留随机键最小的 N_SAMPLES 行 ≡ 均匀无放回抽样
+                res_key = np.concatenate([res_key, rng.random(len(ll))])
+                res_ll = np.concatenate([res_ll, ll])
+                res_t = np.concatenate([res_t, t])
+                if len(res_key) > N_SAMPLES:
+                    keep = np.argpartition(res_key, N_SAMPLES - 1)[:N_SAMPLES]
+                    res_key, res_ll, res_t = res_key[keep], res_ll[keep], res_t[keep]
+
+            print(f"  已读取 {total} 行，过滤后 {kept} 行")
+
+    print(f"原始数据总行数: {total}")
+    print(f"经纬度清洗后剩余: {kept} 行")
+    if write_full:
+        print(f"🗂️  已保存全量文件： {', '.join(str(p) for p in FULL_PATHS)}")
+
+    if everything is not None:
+        print(f"🎯 已保存全量数据： {OUTPUT_PATH}（{kept} 点）")
+        X = np.load(OUTPUT_PATH, mmap_mode="r")
+        lonlat = np.load(LONLAT_PATH, mmap_mode="r")
+        build_store(X, lonlat, source=source_digest())
+        print("🗂️  已保存空间有序的点集文件")
+        return X, lonlat
+
+    # 按随机键排序：与 df.sample 一样是随机顺序
+    order = np.argsort(res_key)
+    return _save_outputs(res_ll[order], res_t[order])
+
+
+def datetime_to_epoch(values):
+    """
+    日期时间字符串 / Series → int64 epoch 秒（不做时区换算）
+    """
+    ts = pd.to_datetime(values)
+    return np.asarray((ts - pd.Timestamp(0)) // pd.Timedelta(seconds=1), dtype=np.int64)
+
 
 def lonlat_to_xy(lon, lat):
     """
@@ -100,5 +236,29 @@ def lonlat_to_xy(lon, lat):
     return np.vstack([x, y]).T  # shape: (N,2)
 
 
+def xy_to_lonlat(x, y):
+    """
+    lonlat_to_xy 的逆变换（同一基准点与换算系数）
+    """
+    lon0 = -74.0
+    lat0 = 40.75
+    meter_per_deg_lat = 110574
+    meter_per_deg_lon = 111320 * np.cos(np.deg2rad(lat0))
+
+    lon = np.asarray(x) / meter_per_deg_lon + lon0
+    lat = np.asarray(y) / meter_per_deg_lat + lat0
+    return np.vstack([lon, lat]).T  # shape: (N,2)
+
+
 if __name__ == "__main__":
-    load_and_process()
+    parser = argparse.ArgumentParser(description="NYC Taxi 数据预处理")
+    parser.add_argument("--stream", action="store_true", help="分块读取 + 蓄水池抽样")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE, help="流式模式每块行数")
+    parser.add_argument("--full", action="store_true", help="流式模式下同时写出全量数据")
+    args = parser.parse_args()
+
+    report_at_exit()
+    if args.stream or args.full:
+        load_and_process_streaming(args.chunksize, write_full=args.full)
+    else:
+        load_and_process()
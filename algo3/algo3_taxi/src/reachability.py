@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+reachability.py
+一次计算、多组 eps 复用的 DBSCAN（互达距离 + 最小生成森林）
+-------------------------------------
+固定 min_pts，在最大的 max_eps 上只做一次：
+1. 核心距离 cd(p)：p 的第 min_pts 近邻（含自身）的距离
+   —— 在 eps 下 p 是核心点 ⇔ cd(p) <= eps
+2. 互达距离 mr(p, q) = max(cd(p), cd(q), d(p, q))
+   —— 核心点 p、q 在 eps 下直接相连 ⇔ mr(p, q) <= eps
+3. 对 d(p, q) <= max_eps 的全部点对求 mr 的最小生成森林（MSF）：
+   先由最近邻表的边建初始森林；其余点对分块流入，
+   端点已被更轻的森林路径连通的边直接丢弃（环性质，按 _LEVELS 个权重档位判断），
+   剩下的每攒满一块就与已有森林合并，用向量化 Borůvka 求 MSF
+   （一条边若不在某个子图的 MSF 中，也不会在全图的 MSF 中）
+4. 每个点保留 min_pts 个最近邻（border_reach）：
+   eps 下的非核心点邻居数 < min_pts，它的全部 eps 邻居一定都在这张表里
+
+之后任意 eps <= max_eps 的标签只需：
+    MSF 中权重 <= eps 的边做并查集 + 查最近邻表给边界点分配簇
+输出与 dbscan.dbscan(X, eps, min_pts) 完全相同（全部在距离平方上比较）
+
+内存：保留的最近邻表为 N × min_pts 个 (int32 下标, float32 距离平方下界)，
+    每项 8 字节（12M 点、min_pts=20 约 1.9 GB）；float32 只用来筛候选，
+    边界点的判定再用 float64 坐标复核，结果不受精度影响。
+    构建期间另有同样形状的 float64 距离表与 MSF 初始边，峰值约为其 3 倍
+"""
+
+import numpy as np
+
+from grid_index import GridIndex
+from dbscan_block import _neighbor_pairs, _find, _compress, _union_edges, _assign_labels
+
+
+# 每块最多处理的点对 / 边数量（控制内存）
+_BLOCK = 2_000_000
+
+# 预过滤用的权重档位数：第 j 档为 max_eps² × 2^-(LEVELS-1-j)
+_LEVELS = 8
+
+
+# ============================================================
+# ✅ 向量化 Borůvka：边集 (a, b, w) 的最小生成森林
+# ============================================================
+def _msf(n, a, b, w):
+    """
+    n: 顶点数（顶点编号 < n）
+    返回：森林中的边 (a, b, w)
+    权重相同时取编号较小的边（全序），保证结果无环
+    """
+    parent = np.arange(n)
+    chosen = np.zeros(len(w), dtype=bool)
+    alive = np.arange(len(w))
+    while alive.size:
+        # parent 已完全压缩：一次查表即得根
+        ra = parent[a[alive]]
+        rb = parent[b[alive]]
+        m = ra != rb
+        alive, ra, rb = alive[m], ra[m], rb[m]
+        if not alive.size:
+            break
+
+        # 每个分量选出 (权重, 编号) 最小的外连边
+        wa = w[alive]
+        best_w = np.full(n, np.inf)
+        np.minimum.at(best_w, ra, wa)
+        np.minimum.at(best_w, rb, wa)
+        best = np.full(n, len(w))
+        hit = wa == best_w[ra]
+        np.minimum.at(best, ra[hit], alive[hit])
+        hit = wa == best_w[rb]
+        np.minimum.at(best, rb[hit], alive[hit])
+        picked = np.unique(best[best < len(w)])
+
+        chosen[picked] = True
+        _union_edges(parent, a[picked], b[picked])
+        parent = _compress(parent)
+
+    return a[chosen], b[chosen], w[chosen]
+
+
+def _level_components(n, fa, fb, fw, levels):
+    """
+    森林在各权重档位下的连通分量：comp[j][v] = 只用权重 <= levels[j] 的边时 v 的根
+    """
+    dtype = np.int32 if n < 2 ** 31 else np.int64
+    comp = np.empty((len(levels), n), dtype=dtype)
+    parent = np.arange(n)
+    for j, t in enumerate(levels):
+        m = fw <= t
+        _union_edges(parent, fa[m], fb[m])
+        parent = _compress(parent)
+        comp[j] = parent
+    return comp
+
+
+def _redundant(comp, levels, a, b, w):
+    """
+    环性质预过滤：端点已被权重 <= levels[j] <= w 的森林路径连通的边可以丢弃
+    （它是所在环上的最大边，去掉后任意阈值下的连通分量都不变）
+    """
+    j = np.searchsorted(levels, w, side="right") - 1
+    out = np.zeros(len(w), dtype=bool)
+    m = j >= 0
+    out[m] = comp[j[m], a[m]] == comp[j[m], b[m]]
+    return out
+
+
+# ============================================================
+# ✅ 可复用的聚类结构
+# ============================================================
+class Reachability:
+    """
+    输入：X (N,2) 平面坐标（米），max_eps 最大邻域半径，min_pts
+    提供：
+        labels(eps)          eps <= max_eps 时的 DBSCAN 标签
+        core_dist2           (N,) 核心距离的平方（max_eps 内不足 min_pts 个邻居时为 inf）
+        knn / knn_dist2      (N, min_pts) 每个点的最近邻（含自身，原始下标，不存在为 -1）
+                             及距离平方的 float32 下界（不存在为 inf）
+        edges                (a, b, w) 按 w 升序的 MSF 边（w 为互达距离的平方）
+    """
+
+    def __init__(self, X, max_eps, min_pts):
+        self.X = np.asarray(X, dtype=float)
+        self.max_eps = float(max_eps)
+        self.min_pts = int(min_pts)
+        n = len(self.X)
+
+        index = GridIndex(self.X, self.max_eps)
+        knn_d2 = self._core_distances(index)
+
+        # 排序后位置上的核心距离平方
+        cd2 = self.core_dist2[index.order]
+        limit = self.max_eps * self.max_eps
+        Xs = index.X_sorted
+        order = index.order
+
+        # 先用最近邻表中的边建初始森林（互达距离的大部分小边都在这里）
+        levels = limit * 0.5 ** np.arange(_LEVELS - 1, -1, -1)
+        ka = np.repeat(np.arange(n), self.min_pts)
+        kb = self.knn.ravel()
+        kw = np.maximum(knn_d2.ravel(),
+                        np.maximum(self.core_dist2[ka], self.core_dist2[np.maximum(kb, 0)]))
+        m = (kb >= 0) & (kb != ka) & (kw <= limit)
+        fa, fb, fw = _msf(n, ka[m], kb[m], kw[m])
+        comp = _level_components(n, fa, fb, fw, levels)
+        del ka, kb, kw, m
+
+        # 精确的距离表用完即弃，只保留 float32 下界（向下取整：<= 判定不会漏掉候选）
+        d32 = knn_d2.astype(np.float32)
+        low = d32 > knn_d2
+        d32[low] = np.nextafter(d32[low], np.float32(-np.inf))
+        self.knn_dist2 = d32
+        del knn_d2
+
+        # 分块流入点对：先按环性质预过滤，攒满一块再与森林合并
+        buf_a, buf_b, buf_w, buffered = [], [], [], 0
+        for pi, pj, same in _neighbor_pairs(index):
+            if same:
+                keep = pi < pj
+                pi, pj = pi[keep], pj[keep]
+            diff = Xs[pi] - Xs[pj]
+            w = np.maximum(np.einsum('ij,ij->i', diff, diff), np.maximum(cd2[pi], cd2[pj]))
+            keep = w <= limit
+            a, b, w = order[pi[keep]], order[pj[keep]], w[keep]
+            keep = ~_redundant(comp, levels, a, b, w)
+            buf_a.append(a[keep])
+            buf_b.append(b[keep])
+            buf_w.append(w[keep])
+            buffered += int(keep.sum())
+
+            if buffered >= _BLOCK:
+                fa, fb, fw = _msf(n, np.concatenate([fa] + buf_a),
+                                  np.concatenate([fb] + buf_b), np.concatenate([fw] + buf_w))
+                comp = _level_components(n, fa, fb, fw, levels)
+                buf_a, buf_b, buf_w, buffered = [], [], [], 0
+
+        fa, fb, fw = _msf(n, np.concatenate([fa] + buf_a),
+                          np.concatenate([fb] + buf_b), np.concatenate([fw] + buf_w))
+        s = np.argsort(fw, kind="stable")
+        self.edges = (fa[s], fb[s], fw[s])
+
+    # ------------------------------------------------------------
+    # 核心距离 + 最近邻表（逐格子：本格的点 × 3×3 邻域候选点）
+    # 设置 knn / core_dist2，返回精确的 (N, min_pts) float64 距离平方（原始下标）
+    # ------------------------------------------------------------
+    def _core_distances(self, index):
+        n, k = len(self.X), self.min_pts
+        Xs, order = index.X_sorted, index.order
+        limit = self.max_eps * self.max_eps
+
+        dtype = np.int32 if n < 2 ** 31 else np.int64
+        knn = np.zeros((n, k), dtype=dtype)
+        knn_d2 = np.full((n, k), np.inf)
+
+        for c in range(len(index.cell_keys)):
+            cand = index.cell_neighborhood(c)
+            m = min(k, len(cand))
+            rows = max(1, _BLOCK // len(cand))
+            for s in range(index.offsets[c], index.offsets[c + 1], rows):
+                e = min(s + rows, index.offsets[c + 1])
+                d = Xs[s:e, None, :] - Xs[None, cand, :]
+                d2 = np.einsum('ijk,ijk->ij', d, d)
+                part = np.argpartition(d2, m - 1, axis=1)[:, :m] if m < len(cand) \
+                    else np.broadcast_to(np.arange(m), (e - s, m))
+                part_d2 = np.take_along_axis(d2, part, axis=1)
+                srt = np.argsort(part_d2, axis=1, kind="stable")
+                knn[s:e, :m] = cand[np.take_along_axis(part, srt, axis=1)]
+                knn_d2[s:e, :m] = np.take_along_axis(part_d2, srt, axis=1)
+
+        # 超出 max_eps 的邻居不可靠（可能没被枚举到）→ 视为不存在
+        far = knn_d2 > limit
+        knn_d2[far] = np.inf
+        knn = np.where(far, -1, order[knn]).astype(dtype, copy=False)
+        del far
+
+        # 位置 → 原始下标
+        self.knn = np.empty_like(knn)
+        self.knn[order] = knn
+        del knn
+        out = np.empty_like(knn_d2)
+        out[order] = knn_d2
+        self.core_dist2 = out[:, k - 1].copy()
+        return out
+
+    # ------------------------------------------------------------
+    # 任意 eps <= max_eps 的标签
+    # ------------------------------------------------------------
+    def labels(self, eps):
+        if eps > self.max_eps:
+            raise ValueError(f"eps={eps} exceeds max_eps={self.max_eps}")
+        n = len(self.X)
+        eps2 = eps * eps
+
+        # 1) 核心点 + MSF 中 <= eps 的边
+        core = self.core_dist2 <= eps2
+        a, b, w = self.edges
+        cut = np.searchsorted(w, eps2, side="right")
+        parent = np.arange(n)
+        _union_edges(parent, a[:cut], b[:cut])
+
+        # 2) 边界点：最近邻表中 eps 内的核心点（border_reach）
+        #    先用 float32 下界筛候选（阈值向上取整），再用 float64 坐标复核
+        t = np.float32(eps2)
+        if t < eps2:
+            t = np.nextafter(t, np.float32(np.inf))
+        reach = (self.knn_dist2 <= t) & ~core[:, None]
+        nb = np.where(reach, self.knn, 0)
+        reach &= core[nb]
+        border_pts, col = np.nonzero(reach)
+        nb = self.knn[border_pts, col]
+        d = self.X[border_pts] - self.X[nb]
+        keep = np.einsum('ij,ij->i', d, d) <= eps2
+        border_pts, nb = border_pts[keep], nb[keep]
+        border_roots = _find(parent, nb)
+
+        core_idx = np.flatnonzero(core)
+        return _assign_labels(n, core_idx, _find(parent, core_idx), border_pts, border_roots)
@@ -13,25 +13,28 @@ run_experiment.py
 
 import numpy as np
 import matplotlib.pyplot as plt
-from pathlib import Path
 
-from dbscan import dbscan
+from cache import cached_dbscan
+from point_store import STORE_PATH, load_points
+from utils import timer, report_at_exit
 
 # ==============================
 # 参数设置
 # ==============================
-DATA_PATH = Path("../data/processed/pickups_sample.npy")
 eps = 300.0    # 半径：300米
 min_pts = 20   # 最小核心点数
 
 
+@timer
 def main():
     print("📥 正在加载点云数据...")
-    X = np.load(DATA_PATH)
+    with timer("读取数据"):
+        X = load_points("x", "y")
     print(f"数据加载成功！形状：{X.shape}")
 
     print("🚀 DBSCAN 聚类开始...")
-    labels = dbscan(X, eps=eps, min_pts=min_pts)
+    with timer("聚类"):
+        labels = cached_dbscan(STORE_PATH, eps, min_pts, X=X)
     print("🎯 聚类完成！")
 
     # 统计结果
@@ -72,4 +75,5 @@ def main():
 
 
 if __name__ == "__main__":
+    report_at_exit()
     main()
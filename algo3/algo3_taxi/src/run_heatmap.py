@@ -1,14 +1,43 @@
 # -*- coding: utf-8 -*-
-import numpy as np
+import argparse
+
 import folium
 from folium.plugins import HeatMap
-from pathlib import Path
 
-DATA_LL = Path("../data/processed/pickups_lonlat.npy")
+from heat_tiles import TILE_DIR, ensure_tiles
+from point_store import load_points
+from utils import report_at_exit
+
+
+def main_tiles(full=True):
+    # 预先分箱的瓦片金字塔：地图按需加载 {z}/{x}/{y}.png，HTML 不含原始点
+    # full=True 时瓦片来自全量数据（没有时退回样本）
+    meta = ensure_tiles(full=full)
+
+    print("🔥 Creating tiled HeatMap...")
+    m = folium.Map(location=[40.75, -74.0], zoom_start=11, tiles="cartodbpositron")
+
+    folium.TileLayer(
+        tiles=f"{TILE_DIR.name}/{{z}}/{{x}}/{{y}}.png",   # 相对于 output/ 下的 HTML
+        attr="NYC taxi pickups",
+        name="Pickup density",
+        overlay=True,
+        min_zoom=meta["zmin"],
+        max_native_zoom=meta["zmax"],
+        max_zoom=18,
+    ).add_to(m)
+    if "bounds" in meta:
+        m.fit_bounds(meta["bounds"])
+    folium.LayerControl().add_to(m)
+
+    out_path = "../output/taxi_heatmap_tiles.html"
+    m.save(out_path)
+    print(f"🎯 Heatmap saved → {out_path}")
+
 
 def main():
     print("📥 Loading geolocation data...")
-    LL = np.load(DATA_LL)  # shape: (N,2) → (lon, lat)
+    LL = load_points("lon", "lat")  # shape: (N,2) → (lon, lat)
 
     print("🔥 Creating HeatMap...")
     m = folium.Map(location=[40.75, -74.0], zoom_start=11)
@@ -29,4 +58,15 @@ def main():
     print(f"🎯 Heatmap saved → {out_path}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Taxi pickup heatmap")
+    parser.add_argument("--raw", action="store_true",
+                        help="pass every point to folium HeatMap (old behaviour)")
+    parser.add_argument("--sample", action="store_true",
+                        help="build the tiles from the 50k sample instead of the full data")
+    args = parser.parse_args()
+
+    report_at_exit()
+    if args.raw:
+        main()
+    else:
+        main_tiles(full=not args.sample)
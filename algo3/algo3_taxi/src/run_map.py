@@ -1,41 +1,32 @@
+import argparse
+
 import numpy as np
 import folium
+from folium.plugins import HeatMap
 import matplotlib.cm as cm
 import matplotlib.colors as colors
-from pathlib import Path
-
-from dbscan import dbscan
 
-DATA_XY = Path("../data/processed/pickups_sample.npy")
-DATA_LL = Path("../data/processed/pickups_lonlat.npy")
+from cache import cached_dbscan
+from cluster_summary import summarize, bin_noise
+from point_store import STORE_PATH, load_points
+from utils import report_at_exit
 
 eps = 300
 min_pts = 20
 
+# Noise density bin size in degrees (~200 m)
+NOISE_BIN = 0.002
 
-def main():
-    print("📥 Loading data...")
-    X = np.load(DATA_XY)
-    LL = np.load(DATA_LL)
-
-    print("🚀 Running DBSCAN...")
-    labels = dbscan(X, eps, min_pts)
-
-    print("🎨 Drawing map...")
-    m = folium.Map(location=[40.75, -74.0], zoom_start=11)
-
-    unique_labels = sorted(set(labels))
-    cluster_labels = [c for c in unique_labels if c != -1]
 
+def cluster_color_map(cluster_labels):
     # Assign colors to clusters
     colormap = cm.get_cmap("tab20", len(cluster_labels))
-    norm = colors.Normalize(vmin=0, vmax=len(cluster_labels)-1)
-    cluster_colors = {}
+    norm = colors.Normalize(vmin=0, vmax=max(len(cluster_labels) - 1, 1))
+    return {c: colors.to_hex(colormap(norm(idx))) for idx, c in enumerate(cluster_labels)}
 
-    for idx, c in enumerate(cluster_labels):
-        cluster_colors[c] = colors.to_hex(colormap(norm(idx)))
 
-    # Draw points
+def draw_points(m, LL, labels, cluster_colors):
+    # One CircleMarker per point (size grows with N)
     for (lon, lat), label in zip(LL, labels):
         if label == -1:  # Noise
             color = "gray"
@@ -56,6 +47,72 @@ def main():
             fill_opacity=op,
         ).add_to(m)
 
+
+def draw_summary(m, LL, labels, cluster_colors):
+    # Hulls + centroids per cluster, binned noise, canvas markers for the rest
+    # (size grows with the number of clusters / noise bins, not N)
+    s = summarize(LL, labels)
+
+    hulls = folium.FeatureGroup(name="Cluster hulls")
+    centers = folium.FeatureGroup(name="Cluster centroids")
+    leftover = []
+    for c, count, (lon, lat), hull in zip(s.clusters, s.counts, s.centroids, s.hulls):
+        color = cluster_colors[c]
+        if len(hull) >= 3:
+            folium.Polygon(
+                locations=hull[:, ::-1].tolist(),
+                color=color,
+                weight=1.5,
+                fill=True,
+                fill_color=color,
+                fill_opacity=0.25,
+                tooltip=f"Cluster {c}: {count} pickups",
+            ).add_to(hulls)
+        else:
+            # Degenerate hull (all points collinear or identical)
+            leftover.append(c)
+
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=float(3 + 2 * np.log10(count)),
+            color=color,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.9,
+            tooltip=f"Cluster {c}: {count} pickups",
+        ).add_to(centers)
+
+    # Noise → density layer over fixed bins
+    centers_ll, counts = bin_noise(LL[labels == -1], NOISE_BIN)
+    noise = folium.FeatureGroup(name="Noise density")
+    if len(counts):
+        HeatMap(
+            np.column_stack([centers_ll[:, 1], centers_ll[:, 0], counts]).tolist(),
+            radius=10,
+            blur=12,
+            min_opacity=0.2,
+        ).add_to(noise)
+
+    # Points of clusters without a drawable hull (canvas-rendered markers)
+    rest = folium.FeatureGroup(name="Other cluster points")
+    mask = np.isin(labels, leftover)
+    for (lon, lat), label in zip(LL[mask], labels[mask]):
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=3.2,
+            color=cluster_colors[label],
+            fill=True,
+            fill_opacity=0.85,
+        ).add_to(rest)
+
+    for layer in (noise, hulls, rest, centers):
+        layer.add_to(m)
+    folium.LayerControl().add_to(m)
+
+    print(f"   {len(s)} clusters, {len(counts)} noise bins, {int(mask.sum())} leftover points")
+
+
+def add_legend(m, cluster_labels, cluster_colors):
     # Build HTML legend (English)
     legend_html = """
     <div style="
@@ -75,10 +132,42 @@ def main():
     legend_html += "</div>"
     m.get_root().html.add_child(folium.Element(legend_html))
 
-    m.save("../output/dbscan_map_full_legend.html")
-    print("🎯 Map saved → output/dbscan_map_full_legend.html")
+
+def main(mode="points"):
+    print("📥 Loading data...")
+    X = load_points("x", "y")
+    LL = load_points("lon", "lat")
+
+    print("🚀 Running DBSCAN...")
+    labels = cached_dbscan(STORE_PATH, eps, min_pts, X=X)
+
+    print("🎨 Drawing map...")
+    # Canvas renderer: markers are drawn on one <canvas> instead of one SVG node each
+    m = folium.Map(location=[40.75, -74.0], zoom_start=11, prefer_canvas=True)
+
+    cluster_labels = [int(c) for c in np.unique(labels) if c != -1]
+    cluster_colors = cluster_color_map(cluster_labels)
+
+    if mode == "summary":
+        draw_summary(m, LL, labels, cluster_colors)
+        out_path = "../output/dbscan_map_summary.html"
+    else:
+        draw_points(m, LL, labels, cluster_colors)
+        out_path = "../output/dbscan_map_full_legend.html"
+
+    add_legend(m, cluster_labels, cluster_colors)
+
+    m.save(out_path)
+    print(f"🎯 Map saved → {out_path}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="DBSCAN cluster map")
+    parser.add_argument("--mode", choices=["points", "summary"], default="points",
+                        help="points: one marker per point (default); "
+                             "summary: hulls + centroids + noise density (opt-in)")
+    args = parser.parse_args()
+
+    report_at_exit()
+    main(args.mode)
 
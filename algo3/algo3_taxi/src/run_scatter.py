@@ -1,21 +1,39 @@
 # -*- coding: utf-8 -*-
+import argparse
+
 import numpy as np
 import matplotlib.pyplot as plt
-from pathlib import Path
-
-from dbscan import dbscan
 
-DATA_XY = Path("../data/processed/pickups_sample.npy")
+from cache import cached_dbscan, cached_array_dbscan
+from point_store import STORE_PATH, load_points
+from prepare_data import lonlat_to_xy
+from utils import report_at_exit
 
 eps = 300
 min_pts = 20
 
-def main():
+
+def lonlat_bbox_to_xy(lon0, lat0, lon1, lat1):
+    # lonlat_to_xy 是线性的：经纬度矩形的两个角 → 平面矩形
+    xy = lonlat_to_xy(np.array([lon0, lon1]), np.array([lat0, lat1]))
+    return (*xy.min(axis=0), *xy.max(axis=0))
+
+
+def main(bbox=None):
     print("📥 Loading data...")
-    X = np.load(DATA_XY)
+    if bbox is None:
+        X = load_points("x", "y")
+    else:
+        # 只 memory-map 与范围相交的格子（point_store 的按范围读取）
+        X = load_points("x", "y", bbox=lonlat_bbox_to_xy(*bbox))
+        print(f"范围内 {len(X)} 点")
 
     print("🚀 Running DBSCAN clustering...")
-    labels = dbscan(X, eps, min_pts)
+    if bbox is None:
+        labels = cached_dbscan(STORE_PATH, eps, min_pts, X=X)
+    else:
+        # 范围外的点不参与：靠近边界的簇可能被截断
+        labels, _ = cached_array_dbscan(X, eps, min_pts)
 
     print("🎨 Plotting scatter result...")
     plt.figure(figsize=(8, 10))
@@ -45,4 +63,10 @@ def main():
     plt.show()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="DBSCAN 散点图")
+    parser.add_argument("--bbox", nargs=4, type=float, metavar=("LON0", "LAT0", "LON1", "LAT1"),
+                        help="只读取并聚类该经纬度范围内的点")
+    args = parser.parse_args()
+
+    report_at_exit()
+    main(args.bbox)
@@ -6,23 +6,21 @@ Heatmap(背景) + DBSCAN クラスタ(前景)
 
 import numpy as np
 import matplotlib.pyplot as plt
-from dbscan import dbscan
-from pathlib import Path
+from cache import cached_dbscan
+from point_store import STORE_PATH, load_points
+from utils import report_at_exit
 import matplotlib.cm as cm
 
-DATA_LL = Path("../data/processed/pickups_lonlat.npy")
-DATA_XY = Path("../data/processed/pickups_sample.npy")
-
 eps = 300
 min_pts = 20
 
 def main():
     print("📥 Loading data...")
-    LL = np.load(DATA_LL)  # lon, lat
-    X = np.load(DATA_XY)
+    LL = load_points("lon", "lat")
+    X = load_points("x", "y")
 
     print("🚀 Running DBSCAN...")
-    labels = dbscan(X, eps, min_pts)
+    labels = cached_dbscan(STORE_PATH, eps, min_pts, X=X)
 
     print("🔥 Creating 2D Heatmap grid...")
     bins = 300  # 提高分辨率
@@ -73,4 +71,5 @@ def main():
 
 
 if __name__ == "__main__":
+    report_at_exit()
     main()
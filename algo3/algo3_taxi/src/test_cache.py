@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+test_cache.py
+cache.cached_array_dbscan 的缓存键测试
+-------------------------------------
+不同引擎（以及 approx 的不同 rho）的结果不能共用缓存条目：
+    approx 的标签与精确引擎不同，互相命中会把近似结果当成精确结果返回
+
+运行：python -m pytest -q test_cache.py   （或 python test_cache.py）
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+import cache
+from dbscan import dbscan
+
+
+def _blobs(seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0, 5000, (8, 2))
+    X = centers[rng.integers(0, 8, 3000)] + rng.normal(0, 150.0, (3000, 2))
+    return np.vstack([X, rng.uniform(0, 5000, (300, 2))])
+
+
+def test_engines_use_separate_entries():
+    X = _blobs()
+    old = cache.CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        cache.CACHE_DIR = Path(tmp)
+        try:
+            folder = cache.CACHE_DIR / "groups" / "t"
+
+            block, hit = cache.cached_array_dbscan(X, 300, 20, "block", group="t")
+            assert not hit
+            approx, hit = cache.cached_array_dbscan(X, 300, 20, "approx", rho=0.5, group="t")
+            assert not hit                      # 不会拿到 block 的条目
+            assert len(list(folder.glob("*.npy"))) == 2
+
+            keys = {cache.array_key(X, 300, 20, "block"),
+                    cache.array_key(X, 300, 20, "approx", 0.5),
+                    cache.array_key(X, 300, 20, "approx", 0.1)}
+            assert len(keys) == 3
+            # rho 对精确引擎没有影响
+            assert cache.array_key(X, 300, 20, "block", 0.5) == cache.array_key(X, 300, 20, "block")
+
+            # 各自命中自己的条目，内容与直接计算相同
+            again, hit = cache.cached_array_dbscan(X, 300, 20, "block", group="t")
+            assert hit and np.array_equal(again, block)
+            assert np.array_equal(block, dbscan(X, 300, 20, engine="block"))
+            again, hit = cache.cached_array_dbscan(X, 300, 20, "approx", rho=0.5, group="t")
+            assert hit and np.array_equal(again, approx)
+            assert np.array_equal(approx, dbscan(X, 300, 20, engine="approx", rho=0.5))
+
+            # 换一个 rho 也是新的条目
+            _, hit = cache.cached_array_dbscan(X, 300, 20, "approx", rho=0.1, group="t")
+            assert not hit
+            assert len(list(folder.glob("*.npy"))) == 3
+        finally:
+            cache.CACHE_DIR = old
+
+
+if __name__ == "__main__":
+    test_engines_use_separate_entries()
+    print("ok")
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+time_slices.py
+按时间窗切分的 DBSCAN（每小时 / 每个星期几），多进程并行
+-------------------------------------
+1. 读 point_store 的行顺序下的上车时间（prepare_data 保存的本地“墙上时钟” epoch 秒），
+   按窗口编号稳定排序，写出 order.npy：窗口 w 的点为 order[offsets[w]:offsets[w+1]]
+2. 进程池中每个 worker 以 memory-map 方式打开 store 与 order.npy（不经 pickle 传点），
+   只取自己窗口的行运行 dbscan
+3. 结果按窗口内容缓存（cache.cached_array_dbscan：键为窗口点集的字节摘要 + eps + min_pts + 引擎），
+   重新运行时输入没变的窗口直接复用；每种 by 一个缓存分组，跑完后删掉本轮没用到的条目
+   （换了 eps / min_pts / 引擎或数据后，旧结果不会越积越多）
+4. 输出每个窗口的 rows（store 行号）与 labels，以及汇总统计 summary.json
+
+by：
+    hour       24 个窗口（0~23 时）
+    weekday    7 个窗口（0=周一 … 6=周日）
+    both       168 个窗口（星期几 × 小时）
+
+输出：../output/time_slices/<by>/<窗口名>.npz, summary.json
+例：python time_slices.py --by hour --workers 4
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from cache import array_key, cached_array_dbscan, prune_group
+from dbscan import ENGINES
+from point_store import open_store, load_times
+from utils import timer, report_at_exit
+
+
+OUT_DIR = Path("../output/time_slices")
+
+eps = 300
+min_pts = 20
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+# ============================================================
+# ✅ 窗口
+# ============================================================
+def window_ids(T, by):
+    """
+    输入：T (N,) epoch 秒（本地时间），by = hour / weekday / both
+    输出：ids (N,) 窗口编号，names 窗口名列表
+    """
+    hour = (T // 3600) % 24
+    # 1970-01-01 是星期四
+    weekday = (T // 86400 + 3) % 7
+    if by == "hour":
+        return hour, [f"h{h:02d}" for h in range(24)]
+    if by == "weekday":
+        return weekday, WEEKDAYS
+    if by == "both":
+        return weekday * 24 + hour, [f"{d}_h{h:02d}" for d in WEEKDAYS for h in range(24)]
+    raise ValueError(f"unknown window type: {by!r}")
+
+
+# ============================================================
+# ✅ worker（memory-map 共享输入）
+# ============================================================
+_STORE = None
+_ORDER = None
+
+
+def _init_worker(store_path, order_path):
+    global _STORE, _ORDER
+    _STORE = np.load(store_path, mmap_mode="r")
+    _ORDER = np.load(order_path, mmap_mode="r")
+
+
+def _window_task(w, start, end, eps, min_pts, engine, rho, group):
+    rows = np.sort(np.asarray(_ORDER[start:end]))
+    X = np.asarray(_STORE[rows, :2], dtype=float)
+    if len(X) == 0:
+        return w, rows, np.full(0, -1), False, None
+    key = array_key(X, eps, min_pts, engine, rho)
+    labels, hit = cached_array_dbscan(X, eps, min_pts, engine, rho, group=group, key=key)
+    return w, rows, labels, hit, key
+
+
+def _stats(labels):
+    n = len(labels)
+    clustered = labels[labels >= 0]
+    sizes = np.bincount(clustered) if clustered.size else np.zeros(0, dtype=np.int64)
+    return {
+        "points": int(n),
+        "clusters": int(len(sizes)),
+        "noise_ratio": float((labels == -1).mean()) if n else 0.0,
+        "largest": int(sizes.max()) if len(sizes) else 0,
+    }
+
+
+# ============================================================
+# ✅ 主函数
+# ============================================================
+@timer
+def run_windows(by="hour", eps=eps, min_pts=min_pts, workers=None, engine="block", rho=0.1):
+    """
+    engine / rho: 同 dbscan.dbscan（rho 只对 approx 有效）
+    返回：{窗口名: 统计}；各窗口的 rows / labels 写入 OUT_DIR/<by>/<窗口名>.npz
+    """
+    # 读数据之前先检查引擎名
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine: {engine!r}")
+    workers = workers or os.cpu_count() or 1
+    store = open_store()
+    with timer("窗口划分"):
+        ids, names = window_ids(load_times(), by)
+        order = np.argsort(ids, kind="stable")
+        offsets = np.searchsorted(ids[order], np.arange(len(names) + 1))
+
+    out_dir = OUT_DIR / by
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix="slices_"))
+    summary = {}
+    keys = set()
+    group = f"time_slices_{by}"
+    try:
+        order_path = tmp / "order.npy"
+        np.save(order_path, order)
+
+        # 大窗口先提交，负载更均衡
+        tasks = sorted(range(len(names)), key=lambda w: offsets[w] - offsets[w + 1])
+        with timer("窗口聚类"), ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(store.path, order_path)) as pool:
+            futures = [pool.submit(_window_task, w, int(offsets[w]), int(offsets[w + 1]),
+                                   eps, min_pts, engine, rho, group) for w in tasks]
+            for f in futures:
+                w, rows, labels, hit, key = f.result()
+                keys.add(key)
+                np.savez(out_dir / f"{names[w]}.npz", rows=rows, labels=labels)
+                summary[names[w]] = dict(_stats(labels), cached=hit)
+                s = summary[names[w]]
+                print(f"  {names[w]:>10}: {s['points']:>7} 点，{s['clusters']:>4} 簇，"
+                      f"噪声 {s['noise_ratio']:.1%}{'（缓存）' if hit else ''}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    # 所有窗口都成功后再清理：只保留本轮窗口对应的缓存
+    removed = prune_group(group, keys)
+    if removed:
+        print(f"🧹 清理 {removed} 个过期的窗口缓存")
+
+    summary = {k: summary[k] for k in names}
+    meta = {"by": by, "eps": eps, "min_pts": min_pts, "engine": engine, "windows": summary}
+    if engine == "approx":
+        meta["rho"] = rho
+    (out_dir / "summary.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2),
+                                          encoding="utf-8")
+    print(f"🎯 已保存 {len(names)} 个窗口 → {out_dir}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按时间窗切分的 DBSCAN")
+    parser.add_argument("--by", choices=["hour", "weekday", "both"], default="hour")
+    parser.add_argument("--eps", type=float, default=eps)
+    parser.add_argument("--min-pts", type=int, default=min_pts)
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认 CPU 核数）")
+    parser.add_argument("--engine", choices=ENGINES, default="block", help="dbscan 引擎")
+    parser.add_argument("--rho", type=float, default=0.1, help="approx 引擎的近似精度")
+    args = parser.parse_args()
+
+    report_at_exit()
+    run_windows(args.by, args.eps, args.min_pts, args.workers, args.engine, args.rho)
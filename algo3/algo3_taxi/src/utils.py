@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+utils.py
+计时 / 内存 / 计数器埋点，每次运行输出一份 JSON 报告
+-------------------------------------
+timer：既是装饰器也是上下文管理器，可嵌套，形成阶段树
+    @timer                    阶段名取函数名
+    @timer("聚类")            指定阶段名
+    with timer("读取数据"):   代码块
+    同一父阶段下同名的阶段合并（calls 累加），循环里反复调用也只占一行
+
+count(name, k=1)：计数器，同时累加到当前阶段和全局
+    dbscan 的串行引擎记录 region_queries / neighbors_scanned / queue_pushes
+
+内存：
+    rss_peak_mb   进程常驻内存峰值（resource.getrusage；Windows 上没有则不记）
+    heap_peak_mb  阶段内 Python / NumPy 分配的峰值，只在 tracemalloc 开启时记录
+                  （开销较大，默认不开：PYTHONTRACEMALLOC=1 python param_sweep.py）
+
+报告：每个脚本的 __main__ 都调用 report_at_exit()，每次运行写出一份（只 import 库函数时不写文件），
+    进程结束时写到 ../output/reports/<脚本名>_<时间>.json
+    {"script", "argv", "started", "wall_seconds", "rss_peak_mb", "counters", "phases": [...]}
+"""
+
+import atexit
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:       # Windows
+    resource = None
+
+
+REPORT_DIR = Path("../output/reports")
+
+
+# ============================================================
+# ✅ 阶段树
+# ============================================================
+class _Phase:
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.counters = {}
+        self.heap_peak = 0
+        self.rss_peak_mb = None
+        self.children = {}
+
+    def child(self, name):
+        if name not in self.children:
+            self.children[name] = _Phase(name)
+        return self.children[name]
+
+    def to_dict(self):
+        d = {"name": self.name, "seconds": round(self.seconds, 6), "calls": self.calls}
+        if self.counters:
+            d["counters"] = dict(self.counters)
+        if tracemalloc.is_tracing():
+            d["heap_peak_mb"] = round(self.heap_peak / 2 ** 20, 3)
+        if self.rss_peak_mb is not None:
+            d["rss_peak_mb"] = self.rss_peak_mb
+        if self.children:
+            d["phases"] = [c.to_dict() for c in self.children.values()]
+        return d
+
+
+_root = _Phase("<run>")
+_stack = [_root]
+_totals = {}
+_started = None
+_report_pid = None
+
+
+def _rss_peak_mb():
+    if resource is None:
+        return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(kb / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+# ============================================================
+# ✅ timer
+# ============================================================
+class _Timer:
+    def __init__(self, name=None, func=None):
+        self.name = name
+        self.func = func
+        self._frames = []
+
+    # 装饰器用法
+    def __call__(self, *args, **kwargs):
+        if self.func is None:
+            func = args[0]
+            return functools.wraps(func)(_Timer(self.name or func.__qualname__, func))
+        with _Timer(self.name):
+            return self.func(*args, **kwargs)
+
+    def __get__(self, obj, objtype=None):
+        # 装饰方法时绑定 self
+        return self if obj is None else functools.partial(self.__call__, obj)
+
+    def __enter__(self):
+        _start_run()
+        phase = _stack[-1].child(self.name)
+        if tracemalloc.is_tracing():
+            # 父阶段先记下到目前为止的峰值，再从当前用量重新统计
+            _stack[-1].heap_peak = max(_stack[-1].heap_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        _stack.append(phase)
+        self._frames.append(time.perf_counter())
+        return phase
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._frames.pop()
+        phase = _stack.pop()
+        phase.seconds += elapsed
+        phase.calls += 1
+        phase.rss_peak_mb = _rss_peak_mb()
+        if tracemalloc.is_tracing():
+            phase.heap_peak = max(phase.heap_peak, tracemalloc.get_traced_memory()[1])
+            _stack[-1].heap_peak = max(_stack[-1].heap_peak, phase.heap_peak)
+
+        indent = "  " * (len(_stack) - 1)
+        print(f"⏱️  {indent}{phase.name}: {elapsed:.3f}s")
+        return False
+
+
+def timer(name=None):
+    """
+    @timer / @timer("阶段名") / with timer("阶段名"):
+    """
+    if callable(name):
+        return _Timer(None)(name)
+    return _Timer(name)
+
+
+def count(name, k=1):
+    """
+    计数器：累加到当前阶段和全局
+    """
+    c = _stack[-1].counters
+    c[name] = c.get(name, 0) + k
+    _totals[name] = _totals.get(name, 0) + k
+
+
+# ============================================================
+# ✅ 报告
+# ============================================================
+def _start_run():
+    global _started
+    if _started is None:
+        _started = (datetime.now(), time.perf_counter())
+
+
+def report_at_exit():
+    """
+    进程结束时写出 JSON 报告；在驱动脚本的 __main__ 中调用（重复调用只注册一次）
+    """
+    global _report_pid
+    # 进程池的子进程不写报告（只由启动脚本的主进程写一份）
+    if _report_pid is not None or multiprocessing.parent_process() is not None:
+        return
+    _report_pid = os.getpid()
+    _start_run()
+    atexit.register(_write_at_exit, _report_pid)
+
+
+def _write_at_exit(pid):
+    if os.getpid() == pid:
+        write_report()
+
+
+def report():
+    """
+    当前运行的报告（dict）
+    """
+    started, t0 = _started or (datetime.now(), time.perf_counter())
+    return {
+        "script": Path(sys.argv[0]).stem or "interactive",
+        "argv": sys.argv[1:],
+        "started": started.isoformat(timespec="seconds"),
+        "wall_seconds": round(time.perf_counter() - t0, 6),
+        "rss_peak_mb": _rss_peak_mb(),
+        "counters": dict(_totals),
+        "phases": [c.to_dict() for c in _root.children.values()],
+    }
+
+
+def write_report(path=None):
+    """
+    写出 JSON 报告，返回路径
+    """
+    rep = report()
+    if path is None:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = REPORT_DIR / f"{rep['script']}_{stamp}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(rep, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"📝 运行报告 → {path}")
+    return path